@@ -1,27 +1,79 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from sqlalchemy import func, or_, and_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
 import uvicorn
 import json
+import base64
+import asyncio
+import time
 
 # chat.py에서 함수들 import
 from chat import generate_answer
 # database 모델 및 의존성 import
-from database import get_db, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
-from database import init_db
+from database import get_db, get_async_db, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
+from database import GeneratedDocument
+from database import init_db, insert_ignore_conflict
 # matching.py에서 매칭 함수 import
 from matching import (
     calculate_matching_score, 
     match_all_professors, 
     generate_matching_rationale,
-    calculate_chat_based_score,
     calculate_final_matching_score,
     generate_final_report,
     generate_email_draft
 )
+# 채팅 품질 평가 결과 재사용
+from chat_evaluation import get_chat_evaluation
+# 턴 단위 채팅 품질 평가
+from chat_scoring import chat_turn_scorer, get_incremental_chat_score
+# 최종 리포트 단계 그래프
+from stage_graph import Stage, StageGraph
+# 생성 문서(리포트 / 이메일 초안) 저장 및 재생
+from document_store import (
+    FINAL_REPORT,
+    EMAIL_DRAFT,
+    input_fingerprint,
+    find_document,
+    get_document,
+    save_document,
+    replay_document_stream,
+    capture_document_stream
+)
+# LLM 응답 캐시 적중률
+from llm_cache import LLM_CACHE_ENABLED, cache_stats, flush_hit_counts
+# OpenAI 요청 병합 통계
+from openai_singleflight import OPENAI_SINGLEFLIGHT_ENABLED, openai_singleflight
+from openai_governor import OPENAI_GOVERNOR_ENABLED, openai_governor
+from openai_client import http_pool_stats
+from circuit_breaker import openai_breaker
+from local_engine import local_stats
+from openai_cassette import OPENAI_CASSETTE_MODE, openai_cassette
+# 요청 마감 시각 전파
+from deadline import (
+    REQUEST_TIMEOUT_HEADER,
+    DeadlineExceeded,
+    request_deadline,
+    deadline_scope,
+    check_deadline,
+    stage_timeout,
+    scoped_iter
+)
+# 채팅 메시지 write-behind 저장소
+from chat_writer import chat_message_writer
+# 매칭 요청 중복 방지
+from match_idempotency import (
+    match_payload_hash,
+    build_request_key,
+    claim_match_request,
+    complete_match_request,
+    release_match_request
+)
 # email_sender.py에서 이메일 전송 함수 import
 from email_sender import send_email
 from datetime import datetime
@@ -98,12 +150,14 @@ class ChatResponse(BaseModel):
 class ChatSessionRequest(BaseModel):
     applicant_id: int = Field(..., description="지원자 ID", example=1)
     professor_id: str = Field(..., description="교수님 ID (예: prof_001)", example="prof_001")
+    message_limit: int = Field(50, description="기존 세션일 때 함께 반환할 최근 메시지 개수 (0이면 메시지 생략)", ge=0, le=200, example=50)
     
     class Config:
         json_schema_extra = {
             "example": {
                 "applicant_id": 1,
-                "professor_id": "prof_001"
+                "professor_id": "prof_001",
+                "message_limit": 50
             }
         }
 
@@ -126,12 +180,124 @@ class ChatSessionResponse(BaseModel):
     created_at: str
     updated_at: str
     message_count: int
+    last_message_preview: Optional[str] = None  # 마지막 메시지 미리보기 (목록 조회용)
+    last_message_at: Optional[str] = None
     messages: List[ChatMessageResponse] = []
+    # 메시지 페이지네이션 커서 ((timestamp, id) 키셋)
+    has_more: bool = False  # 페이지 방향으로 더 가져올 메시지가 있는지 여부
+    prev_cursor: Optional[str] = None  # 더 이전 메시지 조회용 (before 파라미터로 전달)
+    next_cursor: Optional[str] = None  # 새 메시지 조회용 (after 파라미터로 전달)
     
     class Config:
         from_attributes = True
 
 
+# 세션 목록의 마지막 메시지 미리보기 길이
+MESSAGE_PREVIEW_LENGTH = 100
+
+
+# -----------------------------
+# 채팅 메시지 키셋 페이지네이션
+# -----------------------------
+def encode_message_cursor(message: ChatMessage) -> str:
+    """메시지의 (timestamp, id)를 커서 문자열로 변환"""
+    raw = f"{message.timestamp.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_message_cursor(cursor: str):
+    """커서 문자열을 (timestamp, id)로 변환"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail="유효하지 않은 커서입니다."
+        )
+
+
+async def load_message_page(
+    db: AsyncSession,
+    session_id: int,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+):
+    """
+    세션 메시지를 (timestamp, id) 기준 키셋 페이지네이션으로 조회
+    
+    - after: 커서 이후의 새 메시지를 오래된 순으로 조회
+    - before: 커서 이전 메시지 중 최근 limit개 조회
+    - 둘 다 없으면 최근 limit개 조회
+    
+    Returns:
+        (시간순 메시지 리스트, has_more)
+    """
+    if limit <= 0:
+        return [], False
+    
+    query = select(ChatMessage).where(ChatMessage.session_id == session_id)
+    
+    if after:
+        cursor_timestamp, cursor_id = decode_message_cursor(after)
+        query = query.where(or_(
+            ChatMessage.timestamp > cursor_timestamp,
+            and_(ChatMessage.timestamp == cursor_timestamp, ChatMessage.id > cursor_id)
+        )).order_by(ChatMessage.timestamp, ChatMessage.id)
+        messages = (await db.execute(query.limit(limit + 1))).scalars().all()
+        return messages[:limit], len(messages) > limit
+    
+    if before:
+        cursor_timestamp, cursor_id = decode_message_cursor(before)
+        query = query.where(or_(
+            ChatMessage.timestamp < cursor_timestamp,
+            and_(ChatMessage.timestamp == cursor_timestamp, ChatMessage.id < cursor_id)
+        ))
+    
+    query = query.order_by(
+        ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+    ).limit(limit + 1)
+    messages = (await db.execute(query)).scalars().all()
+    has_more = len(messages) > limit
+    return list(reversed(messages[:limit])), has_more
+
+
+def build_session_response(
+    session: ChatSession,
+    professor_name: Optional[str],
+    message_count: int,
+    messages: List[ChatMessage],
+    has_more: bool = False,
+    after: Optional[str] = None
+) -> ChatSessionResponse:
+    """채팅 세션 + 메시지 페이지 응답 구성"""
+    return ChatSessionResponse(
+        id=session.id,
+        applicant_id=session.applicant_id,
+        professor_id=session.professor_id,
+        professor_name=professor_name,
+        created_at=session.created_at.isoformat(),
+        updated_at=session.updated_at.isoformat(),
+        message_count=message_count,
+        last_message_at=session.last_message_at.isoformat() if session.last_message_at else None,
+        messages=[
+            ChatMessageResponse(
+                id=msg.id,
+                role=msg.role,
+                content=msg.content,
+                timestamp=msg.timestamp.isoformat()
+            )
+            for msg in messages
+        ],
+        has_more=has_more,
+        prev_cursor=encode_message_cursor(messages[0]) if messages else None,
+        # 새 메시지가 없으면 전달받은 커서를 그대로 돌려주어 폴링을 이어갈 수 있게 함
+        next_cursor=encode_message_cursor(messages[-1]) if messages else after
+    )
+
+
 class HealthResponse(BaseModel):
     status: str
     message: str
@@ -274,13 +440,65 @@ class EmailSendResponse(BaseModel):
     message: str
 
 
+class GeneratedDocumentResponse(BaseModel):
+    id: int
+    kind: str  # "final_report" 또는 "email_draft"
+    applicant_id: Optional[int] = None
+    professor_id: Optional[str] = None
+    session_id: Optional[int] = None
+    content: str
+    metadata: dict = {}
+    created_at: str
+
+
+def document_response(document: GeneratedDocument, stream: bool):
+    """저장된 문서를 JSON 또는 SSE(생성 시와 같은 형식)로 반환"""
+    if stream:
+        def replay():
+            # 최종 리포트는 /match/final과 같이 점수 이벤트를 먼저 전송
+            if document.kind == FINAL_REPORT:
+                metadata = json.loads(document.metadata_json or "{}")
+                yield f"data: {json.dumps({'type': 'score', 'content': '', 'done': False, **metadata}, ensure_ascii=False)}\n\n"
+            yield from replay_document_stream(document)
+        
+        return StreamingResponse(
+            replay(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no"
+            }
+        )
+    return GeneratedDocumentResponse(
+        id=document.id,
+        kind=document.kind,
+        applicant_id=document.applicant_id,
+        professor_id=document.professor_id,
+        session_id=document.session_id,
+        content=document.content,
+        metadata=json.loads(document.metadata_json or "{}"),
+        created_at=document.created_at.isoformat()
+    )
+
+
 # -----------------------------
 # 데이터베이스 초기화 (앱 시작 시)
 # -----------------------------
 @app.on_event("startup")
 async def startup_event():
-    """앱 시작 시 데이터베이스 초기화"""
+    """앱 시작 시 데이터베이스 초기화 및 채팅 메시지 writer / 턴 평가 시작"""
     init_db()
+    chat_message_writer.start()
+    chat_turn_scorer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """앱 종료 시 대기 중인 채팅 메시지 / LLM 캐시 적중 수를 동기 flush"""
+    chat_turn_scorer.stop()
+    await run_in_threadpool(chat_message_writer.stop)
+    await run_in_threadpool(flush_hit_counts)
 
 
 # -----------------------------
@@ -316,6 +534,48 @@ async def health_check():
     }
 
 
+@app.get(
+    "/metrics/llm-cache",
+    tags=["Health"],
+    summary="LLM 응답 캐시 적중률",
+    description="매칭 근거 / 최종 리포트 / 이메일 초안 LLM 응답 캐시의 기능별 적중률을 반환합니다. (워커 프로세스별, 시작 이후 누적)"
+)
+async def llm_cache_metrics():
+    """LLM 응답 캐시 적중률"""
+    return {"enabled": LLM_CACHE_ENABLED, "endpoints": cache_stats()}
+
+
+@app.get(
+    "/metrics/openai",
+    tags=["Health"],
+    summary="OpenAI 요청 병합 / 속도 제한 / 연결 풀 / 서킷 통계",
+    description="동시에 진행 중인 같은 OpenAI 요청을 병합한 결과와 전역 governor 상태를 반환합니다. issued: 실제 업스트림 요청 수, coalesced: 진행 중인 요청에 합류한 수, cancelled: 구독자가 모두 끊겨 중간에 닫은 스트림 수, governor: 대기열 대기 시간(p50/p95/max), 재시도 / 429 수, 진행 중 요청 수, classes: 우선순위 등급(interactive / near_line / batch)별 대기열 길이와 대기 / 소요 시간, http: 연결 풀 재사용률과 열린 연결 수, circuit: 서킷 상태(closed / open / half_open)와 최근 실패율, local_engine: 서킷이 열린 동안 로컬 엔진(사전 계산 테이블 / TF-IDF / FAQ)으로 처리한 수 (워커 프로세스별)"
+)
+async def openai_metrics():
+    """OpenAI single-flight / governor 통계"""
+    return {
+        "singleflight_enabled": OPENAI_SINGLEFLIGHT_ENABLED,
+        "operations": openai_singleflight.stats(),
+        "governor_enabled": OPENAI_GOVERNOR_ENABLED,
+        "governor": openai_governor.metrics(),
+        "http": http_pool_stats(),
+        "circuit": openai_breaker.snapshot(),
+        "local_engine": local_stats(),
+        "cassette": {"mode": OPENAI_CASSETTE_MODE, **openai_cassette.stats}
+    }
+
+
+@app.get(
+    "/metrics/chat-writer",
+    tags=["Health"],
+    summary="채팅 메시지 write-behind 큐 통계",
+    description="채팅 메시지 저장 큐의 대기 레코드 수와 누적 저장 / 실패 / dead-letter 수를 반환합니다. (워커 프로세스별, 시작 이후 누적)"
+)
+async def chat_writer_metrics():
+    """채팅 메시지 writer 통계"""
+    return chat_message_writer.snapshot()
+
+
 @app.post(
     "/chat",
     response_model=ChatResponse,
@@ -334,7 +594,11 @@ async def health_check():
     - 채팅 세션 지원 (메시지 저장 가능)
     """
 )
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(
+    request: ChatRequest,
+    request_timeout: Optional[str] = Header(None, alias=REQUEST_TIMEOUT_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     사용자 질문에 대한 답변 생성
     
@@ -342,7 +606,9 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
     - **professor_id**: 교수님 ID (필수, 예: "prof_001")
     - **top_k**: 검색할 관련 정보 개수 (기본값: 3)
     - **session_id**: 채팅 세션 ID (선택사항, 있으면 메시지 저장)
+    - **X-Request-Timeout** 헤더: 처리 제한 시간(초, 없으면 기본값), 초과 시 504
     """
+    deadline = request_deadline("chat", request_timeout)
     try:
         if not request.question or not request.question.strip():
             raise HTTPException(
@@ -356,43 +622,48 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
                 detail="교수님 ID를 입력해주세요."
             )
         
-        # RAG 기반 답변 생성 (professor_id로 필터링)
-        answer, references = generate_answer(
-            user_question=request.question,
-            professor_id=request.professor_id,
-            top_k=request.top_k
-        )
+        asked_at = datetime.utcnow()
+        
+        # 세션 조회는 답변 생성과 동시에 진행 (LLM 응답 이후의 대기 제거)
+        async def find_session():
+            if not request.session_id:
+                return None
+            try:
+                return await db.get(ChatSession, request.session_id)
+            except Exception:
+                return None
+        
+        session_task = asyncio.create_task(find_session())
+        try:
+            # RAG 기반 답변 생성 (professor_id로 필터링, 블로킹 호출은 스레드풀에서 실행)
+            # 검색 / LLM 호출은 요청 마감까지 남은 시간 안에서만 진행
+            with deadline_scope(deadline):
+                answer, references = await run_in_threadpool(
+                    generate_answer,
+                    user_question=request.question,
+                    professor_id=request.professor_id,
+                    top_k=request.top_k
+                )
+        finally:
+            session = await session_task
         
         session_id = None
-        # 세션이 있으면 메시지 저장
-        if request.session_id:
+        # 세션이 있으면 메시지 저장 (write-behind 큐에 넣고 바로 응답, 배치로 저장됨)
+        if session:
             try:
-                session = db.query(ChatSession).filter(ChatSession.id == request.session_id).first()
-                if session:
-                    # 사용자 메시지 저장
-                    user_message = ChatMessage(
-                        session_id=session.id,
-                        role="user",
-                        content=request.question
-                    )
-                    db.add(user_message)
-                    
-                    # 교수님 답변 저장
-                    professor_message = ChatMessage(
-                        session_id=session.id,
-                        role="professor",
-                        content=answer
-                    )
-                    db.add(professor_message)
-                    
-                    # 세션 업데이트 시간 갱신
-                    session.updated_at = datetime.utcnow()
-                    
-                    db.commit()
-                    session_id = session.id
+                await run_in_threadpool(
+                    chat_message_writer.submit,
+                    session.id,
+                    request.question,
+                    answer,
+                    asked_at
+                )
+                session_id = session.id
+                # 이번 턴만 백그라운드에서 평가하여 세션 누적값에 반영
+                chat_turn_scorer.submit(session.id, session.applicant_id, request.question, answer)
             except Exception as e:
-                db.rollback()
                 # 메시지 저장 실패해도 답변은 반환
+                print(f"채팅 메시지 저장 요청 중 오류: {e}")
         
         return ChatResponse(
             answer=answer,
@@ -403,6 +674,11 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
         
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=504,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -486,7 +762,7 @@ async def get_professors_by_school(school_id: int, db: Session = Depends(get_db)
 )
 async def create_chat_session(
     request: ChatSessionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     채팅 세션 생성
@@ -496,7 +772,7 @@ async def create_chat_session(
     """
     try:
         # 지원자 확인
-        applicant = db.query(Applicant).filter(Applicant.id == request.applicant_id).first()
+        applicant = await db.get(Applicant, request.applicant_id)
         if not applicant:
             raise HTTPException(
                 status_code=404,
@@ -504,72 +780,53 @@ async def create_chat_session(
             )
         
         # 교수님 확인
-        professor = db.query(Professor).filter(Professor.professor_id == request.professor_id).first()
-        if not professor:
+        professor_name = await db.scalar(
+            select(Professor.name).where(Professor.professor_id == request.professor_id)
+        )
+        if professor_name is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"교수님 ID {request.professor_id}를 찾을 수 없습니다."
             )
         
-        # 기존 세션이 있는지 확인 (같은 지원자-교수님 조합)
-        existing_session = db.query(ChatSession).filter(
-            ChatSession.applicant_id == request.applicant_id,
-            ChatSession.professor_id == request.professor_id
-        ).first()
+        # 세션 생성 (같은 지원자-교수님 조합이 이미 있으면 무시, 동시 요청에도 세션 1개만 생성)
+        now = datetime.utcnow()
+        result = await db.execute(insert_ignore_conflict(
+            ChatSession,
+            {
+                "applicant_id": request.applicant_id,
+                "professor_id": request.professor_id,
+                "created_at": now,
+                "updated_at": now,
+                "message_count": 0
+            },
+            conflict_columns=["applicant_id", "professor_id"]
+        ))
+        await db.commit()
+        created = result.rowcount == 1
+        
+        session = (await db.execute(
+            select(ChatSession).where(
+                ChatSession.applicant_id == request.applicant_id,
+                ChatSession.professor_id == request.professor_id
+            )
+        )).scalars().first()
         
-        if existing_session:
-            # 기존 세션 반환
-            message_count = db.query(ChatMessage).filter(
-                ChatMessage.session_id == existing_session.id
-            ).count()
-            
-            messages = db.query(ChatMessage).filter(
-                ChatMessage.session_id == existing_session.id
-            ).order_by(ChatMessage.timestamp).all()
-            
-            return ChatSessionResponse(
-                id=existing_session.id,
-                applicant_id=existing_session.applicant_id,
-                professor_id=existing_session.professor_id,
-                professor_name=professor.name,
-                created_at=existing_session.created_at.isoformat(),
-                updated_at=existing_session.updated_at.isoformat(),
-                message_count=message_count,
-                messages=[
-                    ChatMessageResponse(
-                        id=msg.id,
-                        role=msg.role,
-                        content=msg.content,
-                        timestamp=msg.timestamp.isoformat()
-                    )
-                    for msg in messages
-                ]
+        # 기존 세션이면 최근 메시지 message_limit개 포함 (메시지 수는 세션 카운터 사용)
+        messages, has_more = [], False
+        if not created and session.message_count:
+            messages, has_more = await load_message_page(
+                db, session.id, limit=request.message_limit
             )
         
-        # 새 세션 생성
-        new_session = ChatSession(
-            applicant_id=request.applicant_id,
-            professor_id=request.professor_id
-        )
-        db.add(new_session)
-        db.commit()
-        db.refresh(new_session)
-        
-        return ChatSessionResponse(
-            id=new_session.id,
-            applicant_id=new_session.applicant_id,
-            professor_id=new_session.professor_id,
-            professor_name=professor.name,
-            created_at=new_session.created_at.isoformat(),
-            updated_at=new_session.updated_at.isoformat(),
-            message_count=0,
-            messages=[]
+        return build_session_response(
+            session, professor_name, session.message_count, messages, has_more
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"채팅 세션 생성 중 오류가 발생했습니다: {str(e)}"
@@ -581,43 +838,59 @@ async def create_chat_session(
     response_model=ChatSessionResponse,
     tags=["Chat"],
     summary="채팅 세션 조회",
-    description="특정 채팅 세션의 정보와 메시지 내역을 조회합니다."
+    description="""
+    특정 채팅 세션의 정보와 메시지 내역을 조회합니다.
+    
+    메시지는 (timestamp, id) 기준 커서 페이지네이션으로 반환됩니다.
+    - 기본: 최근 `limit`개 메시지
+    - `before`: 응답의 `prev_cursor`를 전달하면 더 이전 메시지 조회
+    - `after`: 응답의 `next_cursor`를 전달하면 그 이후 새 메시지만 조회
+    """
 )
-async def get_chat_session(session_id: int, db: Session = Depends(get_db)):
-    """채팅 세션 조회"""
+async def get_chat_session(
+    session_id: int,
+    limit: int = Query(50, ge=1, le=200, description="조회할 메시지 개수"),
+    before: Optional[str] = Query(None, description="이 커서 이전 메시지 조회 (prev_cursor)"),
+    after: Optional[str] = Query(None, description="이 커서 이후 새 메시지만 조회 (next_cursor)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    채팅 세션 조회
+    
+    - **session_id**: 채팅 세션 ID
+    - **limit**: 조회할 메시지 개수 (기본값: 50)
+    - **before**: 이전 페이지 커서 (선택사항)
+    - **after**: 새 메시지 커서 (선택사항)
+    """
     try:
-        session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+        if before and after:
+            raise HTTPException(
+                status_code=400,
+                detail="before와 after는 동시에 지정할 수 없습니다."
+            )
+        
+        session = await db.get(ChatSession, session_id)
         if not session:
             raise HTTPException(
                 status_code=404,
                 detail=f"세션 ID {session_id}를 찾을 수 없습니다."
             )
         
-        professor = db.query(Professor).filter(
-            Professor.professor_id == session.professor_id
-        ).first()
+        professor_name = await db.scalar(
+            select(Professor.name).where(Professor.professor_id == session.professor_id)
+        )
         
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.timestamp).all()
-        
-        return ChatSessionResponse(
-            id=session.id,
-            applicant_id=session.applicant_id,
-            professor_id=session.professor_id,
-            professor_name=professor.name if professor else None,
-            created_at=session.created_at.isoformat(),
-            updated_at=session.updated_at.isoformat(),
-            message_count=len(messages),
-            messages=[
-                ChatMessageResponse(
-                    id=msg.id,
-                    role=msg.role,
-                    content=msg.content,
-                    timestamp=msg.timestamp.isoformat()
-                )
-                for msg in messages
-            ]
+        messages, has_more = await load_message_page(
+            db, session_id, limit=limit, before=before, after=after
+        )
+        
+        return build_session_response(
+            session,
+            professor_name,
+            session.message_count,
+            messages,
+            has_more,
+            after=after
         )
     except HTTPException:
         raise
@@ -633,33 +906,67 @@ async def get_chat_session(session_id: int, db: Session = Depends(get_db)):
     response_model=List[ChatSessionResponse],
     tags=["Chat"],
     summary="지원자 채팅 세션 목록 조회",
-    description="특정 지원자의 모든 채팅 세션 목록을 조회합니다."
+    description="""
+    특정 지원자의 모든 채팅 세션 목록을 조회합니다.
+    
+    기본적으로 메시지 수와 마지막 메시지 미리보기만 반환합니다.
+    `include_messages=true`를 지정하면 각 세션의 전체 메시지를 함께 반환합니다.
+    """
 )
-async def get_applicant_sessions(applicant_id: int, db: Session = Depends(get_db)):
-    """지원자의 모든 채팅 세션 조회"""
+async def get_applicant_sessions(
+    applicant_id: int,
+    include_messages: bool = Query(False, description="전체 메시지 포함 여부"),
+    db: Session = Depends(get_db)
+):
+    """
+    지원자의 모든 채팅 세션 조회
+    
+    - **applicant_id**: 지원자 ID
+    - **include_messages**: 전체 메시지 포함 여부 (기본값: false)
+    """
     try:
-        sessions = db.query(ChatSession).filter(
+        # 마지막 메시지 미리보기 (세션별 (session_id, timestamp, id) 인덱스로 1건만 조회)
+        last_message_preview = select(
+            func.substr(ChatMessage.content, 1, MESSAGE_PREVIEW_LENGTH)
+        ).where(
+            ChatMessage.session_id == ChatSession.id
+        ).order_by(
+            ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+        ).limit(1).correlate(ChatSession).scalar_subquery()
+        
+        # 세션 + 교수님 이름 + 마지막 메시지 미리보기를 한 번의 쿼리로 조회
+        # 메시지 수와 마지막 메시지 시각은 세션에 유지되는 카운터 사용 (메시지 집계 없음)
+        rows = db.query(
+            ChatSession,
+            Professor.name,
+            last_message_preview
+        ).outerjoin(
+            Professor, Professor.professor_id == ChatSession.professor_id
+        ).filter(
             ChatSession.applicant_id == applicant_id
         ).order_by(ChatSession.updated_at.desc()).all()
         
-        result = []
-        for session in sessions:
-            professor = db.query(Professor).filter(
-                Professor.professor_id == session.professor_id
-            ).first()
-            
+        # 전체 메시지는 요청한 경우에만 한 번의 쿼리로 조회
+        messages_by_session = {}
+        if include_messages and rows:
             messages = db.query(ChatMessage).filter(
-                ChatMessage.session_id == session.id
-            ).order_by(ChatMessage.timestamp).all()
-            
+                ChatMessage.session_id.in_([session.id for session, _, _ in rows])
+            ).order_by(ChatMessage.session_id, ChatMessage.timestamp, ChatMessage.id).all()
+            for msg in messages:
+                messages_by_session.setdefault(msg.session_id, []).append(msg)
+        
+        result = []
+        for session, professor_name, preview in rows:
             result.append(ChatSessionResponse(
                 id=session.id,
                 applicant_id=session.applicant_id,
                 professor_id=session.professor_id,
-                professor_name=professor.name if professor else None,
+                professor_name=professor_name,
                 created_at=session.created_at.isoformat(),
                 updated_at=session.updated_at.isoformat(),
-                message_count=len(messages),
+                message_count=session.message_count,
+                last_message_preview=preview,
+                last_message_at=session.last_message_at.isoformat() if session.last_message_at else None,
                 messages=[
                     ChatMessageResponse(
                         id=msg.id,
@@ -667,7 +974,7 @@ async def get_applicant_sessions(applicant_id: int, db: Session = Depends(get_db
                         content=msg.content,
                         timestamp=msg.timestamp.isoformat()
                     )
-                    for msg in messages
+                    for msg in messages_by_session.get(session.id, [])
                 ]
             ))
         
@@ -807,12 +1114,21 @@ async def update_applicant(
     - 각 교수님별로 5가지 지표의 점수와 최종 적합도 점수 제공
     - 매칭 근거 설명 포함
     - 지원자 정보는 자동으로 데이터베이스에 저장됨
+    
+    **중복 요청 처리:**
+    - `Idempotency-Key` 헤더가 같으면 저장된 응답을 그대로 반환 (지원자 재생성/재계산 없음)
+    - 헤더가 없어도 같은 클라이언트의 동일 입력은 일정 시간 동안 저장된 응답 반환
+    - 재사용된 응답에는 `Idempotent-Replayed: true` 헤더가 포함됨
     """
 )
 async def match_applicant(
     request: ApplicantRequest,
+    http_request: Request,
+    response: Response,
     professor_ids: Optional[List[str]] = None,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    request_timeout: Optional[str] = Header(None, alias=REQUEST_TIMEOUT_HEADER),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     지원자와 교수님 간의 매칭 적합도 측정
@@ -836,7 +1152,11 @@ async def match_applicant(
         - E. 교수 선호도 (Preferred Student Type)
       - **total_score**: 최종 적합도 (70-98점, 정수)
       - **rationale**: 매칭 근거 설명
+    
+    **X-Request-Timeout** 헤더: 처리 제한 시간(초, 없으면 기본값), 초과 시 504
     """
+    deadline = request_deadline("match", request_timeout)
+    claimed_key = None
     try:
         # 입력 검증
         valid_keywords = ["디지털 전환", "조직 학습", "기술 혁신", "기술 전략", "지속가능경영"]
@@ -854,6 +1174,24 @@ async def match_applicant(
                     detail=f"학습 성향은 다음 중 선택해야 합니다: {', '.join(valid_styles)}"
                 )
         
+        # 중복 요청 확인 (같은 키/입력의 완료된 요청이 있으면 저장된 응답 반환)
+        payload_hash = match_payload_hash(
+            request.name,
+            request.major,
+            request.interest_keyword,
+            request.learning_styles,
+            professor_ids,
+            client_fingerprint=f"{http_request.client.host if http_request.client else ''}|"
+                               f"{http_request.headers.get('user-agent', '')}"
+        )
+        request_key = build_request_key(idempotency_key, payload_hash)
+        if request_key:
+            stored_response = await claim_match_request(db, request_key, payload_hash)
+            if stored_response is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+                return MatchingResponse.model_validate_json(stored_response)
+            claimed_key = request_key
+        
         # 지원자 데이터 준비
         applicant_data = {
             "interest_keyword": request.interest_keyword,
@@ -869,19 +1207,21 @@ async def match_applicant(
             created_at=datetime.now().isoformat()
         )
         db.add(applicant)
-        db.commit()
-        db.refresh(applicant)
+        await db.commit()
         
-        # 매칭 점수 계산
-        matching_results = match_all_professors(applicant_data, professor_ids)
+        # 매칭 점수 계산 (블로킹 호출은 스레드풀에서 실행, 마감이 지나면 남은 교수님 계산은 중단)
+        with deadline_scope(deadline):
+            matching_results = await run_in_threadpool(match_all_professors, applicant_data, professor_ids)
         
-        # 교수님 이름 추가 (매칭 근거는 별도 API로 분리)
+        # 교수님 이름 추가 (매칭 근거는 별도 API로 분리, 한 번의 쿼리로 조회)
+        professor_names = dict((await db.execute(
+            select(Professor.professor_id, Professor.name).where(
+                Professor.professor_id.in_([result["professor_id"] for result in matching_results])
+            )
+        )).all())
         for result in matching_results:
-            professor = db.query(Professor).filter(
-                Professor.professor_id == result["professor_id"]
-            ).first()
-            if professor:
-                result["professor_name"] = professor.name
+            if result["professor_id"] in professor_names:
+                result["professor_name"] = professor_names[result["professor_id"]]
         
         # 응답 형식 변환
         formatted_results = []
@@ -903,16 +1243,27 @@ async def match_applicant(
                 rationale=None  # 초기 매칭에서는 근거 생성하지 않음 (별도 API 사용)
             ))
         
-        return MatchingResponse(
+        matching_response = MatchingResponse(
             applicant_id=applicant.id,
             results=formatted_results,
             success=True
         )
+        if claimed_key:
+            await complete_match_request(db, claimed_key, applicant.id, matching_response.model_dump_json())
+        return matching_response
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        if claimed_key:
+            # 실패한 요청은 선점 해제 (같은 키로 바로 재시도 가능)
+            await release_match_request(db, claimed_key)
+        if isinstance(e, DeadlineExceeded):
+            raise HTTPException(
+                status_code=504,
+                detail=str(e)
+            )
         raise HTTPException(
             status_code=500,
             detail=f"매칭 점수 계산 중 오류가 발생했습니다: {str(e)}"
@@ -958,6 +1309,7 @@ class RationaleResponse(BaseModel):
 )
 async def get_matching_rationale_stream(
     request: RationaleRequest,
+    request_timeout: Optional[str] = Header(None, alias=REQUEST_TIMEOUT_HEADER),
     db: Session = Depends(get_db)
 ):
     """
@@ -969,6 +1321,7 @@ async def get_matching_rationale_stream(
     Returns:
         SSE 스트리밍 응답
     """
+    deadline = request_deadline("match_rationale", request_timeout)
     try:
         # 지원자 정보 조회
         applicant = db.query(Applicant).filter(Applicant.id == request.applicant_id).first()
@@ -995,7 +1348,8 @@ async def get_matching_rationale_stream(
         }
         
         # 매칭 점수 계산
-        matching_result = calculate_matching_score(applicant_data, request.professor_id)
+        with deadline_scope(deadline):
+            matching_result = calculate_matching_score(applicant_data, request.professor_id)
         
         # 매칭 근거 스트리밍 생성
         applicant_name = applicant.name if applicant.name else "지원자"
@@ -1004,13 +1358,14 @@ async def get_matching_rationale_stream(
         
         def generate_stream():
             try:
-                for chunk in generate_matching_rationale_stream(
+                # 청크마다 마감 시각 확인 (마감이 지나면 생성 중단)
+                for chunk in scoped_iter(deadline, generate_matching_rationale_stream(
                     applicant_name=applicant_name,
                     applicant_data=applicant_data,
                     professor_id=request.professor_id,
                     professor_name=professor.name,
                     matching_result=matching_result
-                ):
+                )):
                     yield chunk
             except Exception as e:
                 # 오류 발생 시 오류 메시지 전송
@@ -1033,6 +1388,11 @@ async def get_matching_rationale_stream(
         
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=504,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1059,24 +1419,29 @@ async def get_matching_rationale_stream(
     
     **응답 형식 (SSE):**
     ```
+    data: {"type": "score", "content": "", "done": false, "initial_score": 85, "chat_score": 90, "final_score": 88}
     data: {"content": "텍스트 청크", "done": false}
     data: {"content": "텍스트 청크", "done": false}
     data: {"content": "", "done": true}
     ```
+    - 점수 이벤트(`type: score`)는 점수 계산이 끝나는 즉시 리포트 본문보다 먼저 전송됩니다
     """
 )
 async def generate_final_matching_report(
     session_id: int,
+    request_timeout: Optional[str] = Header(None, alias=REQUEST_TIMEOUT_HEADER),
     db: Session = Depends(get_db)
 ):
     """
     채팅 내역을 포함한 최종 적합도 리포트 생성
     
     - **session_id**: 채팅 세션 ID
+    - **X-Request-Timeout** 헤더: 처리 제한 시간(초, 없으면 기본값), 초과 시 오류 이벤트 후 종료
     
     Returns:
         최종 적합도 리포트 (1차 적합도 + 채팅 기반 분석)
     """
+    deadline = request_deadline("match_final", request_timeout)
     try:
         # 채팅 세션 조회
         session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
@@ -1104,70 +1469,169 @@ async def generate_final_matching_report(
                 detail=f"교수님 ID {session.professor_id}를 찾을 수 없습니다."
             )
         
-        # 채팅 메시지 조회
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.timestamp).all()
-        
         # 지원자 데이터 준비
         applicant_data = {
             "interest_keyword": applicant.interest_keyword,
             "learning_styles": [s.strip() for s in applicant.learning_styles.split(",")]
         }
+        professor_id = session.professor_id
+        applicant_id = applicant.id
+        applicant_name = applicant.name or "지원자"
+        professor_name = professor.name
+        
+        # 리포트 단계 그래프 (서로 독립인 단계는 동시에 실행)
+        # - initial: 1차 적합도 계산
+        # - messages: 대기 중인 채팅 메시지 저장 후 조회 (진행 중인 턴 평가 대기)
+        # - chat: 채팅 기반 점수 (messages 이후)
+        # - final: 최종 점수 (initial + chat 이후)
+        # 단계는 results["db"]의 스트림용 DB 세션 사용 (요청 의존성 세션은 응답 시작 시 종료됨)
+        
+        async def initial_stage(results):
+            return await run_in_threadpool(calculate_matching_score, applicant_data, professor_id)
+        
+        async def messages_stage(results):
+            await run_in_threadpool(chat_message_writer.flush, stage_timeout(5.0))
+            await run_in_threadpool(chat_turn_scorer.wait_for_session, session_id, stage_timeout(10.0))
+            return await run_in_threadpool(
+                lambda: results["db"].query(ChatMessage).filter(
+                    ChatMessage.session_id == session_id
+                ).order_by(ChatMessage.timestamp).all()
+            )
         
-        # 1차 적합도 계산
-        initial_matching = calculate_matching_score(applicant_data, session.professor_id)
-        
-        # 채팅 메시지를 딕셔너리 형식으로 변환
-        chat_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+        async def chat_stage(results):
+            messages = results["messages"]
+            chat_messages = [
+                {"role": msg.role, "content": msg.content}
+                for msg in messages
+            ]
+            results["chat_messages"] = chat_messages
+            
+            # 채팅 기반 점수 계산 (채팅이 없으면 0점)
+            # 모든 턴이 평가되어 있으면 누적값 조합, 아니면 대화 전체 평가 (변경이 없으면 저장된 결과 재사용)
+            chat_based = await run_in_threadpool(get_incremental_chat_score, results["db"], session_id)
+            if chat_based is None:
+                chat_based = await run_in_threadpool(
+                    get_chat_evaluation,
+                    results["db"],
+                    session_id,
+                    chat_messages,
+                    max((msg.id for msg in messages), default=None),
+                    applicant_data,
+                    professor_id
+                )
+            return chat_based
         
-        # 채팅 기반 점수 계산 (채팅이 없으면 0점)
-        chat_based = calculate_chat_based_score(
-            chat_messages=chat_messages,
-            applicant_data=applicant_data,
-            professor_id=session.professor_id
-        )
+        async def final_stage(results):
+            initial_matching = results["initial"]
+            chat_based = results["chat"]
+            
+            # 최종 점수 계산
+            # 채팅이 없으면 1차 적합도만 사용 (채팅 점수 0일 때는 가중치 조정)
+            if chat_based["chat_score"] == 0:
+                # 채팅이 없으면 1차 적합도를 그대로 사용
+                final_score_value = initial_matching["total_score"]
+            else:
+                # 채팅이 있으면 가중 평균 사용
+                weighted_score_data = calculate_final_matching_score(
+                    initial_score=initial_matching["total_score"],
+                    chat_score=chat_based["chat_score"],
+                    chat_analysis=chat_based.get("analysis", "")
+                )
+                final_score_value = weighted_score_data["final_score"]
+            
+            # 최종 점수 데이터 구성
+            return {
+                "final_score": final_score_value,
+                "initial_score": initial_matching["total_score"],
+                "chat_score": chat_based["chat_score"],
+                "weighted_score": final_score_value,
+                "chat_analysis": chat_based.get("analysis", "채팅 내역이 없습니다.")
+            }
         
-        # 최종 점수 계산
-        # 채팅이 없으면 1차 적합도만 사용 (채팅 점수 0일 때는 가중치 조정)
-        if chat_based["chat_score"] == 0:
-            # 채팅이 없으면 1차 적합도를 그대로 사용
-            final_score_value = initial_matching["total_score"]
-        else:
-            # 채팅이 있으면 가중 평균 사용
-            weighted_score_data = calculate_final_matching_score(
-                initial_score=initial_matching["total_score"],
-                chat_score=chat_based["chat_score"],
-                chat_analysis=chat_based.get("analysis", "")
-            )
-            final_score_value = weighted_score_data["final_score"]
-        
-        # 최종 점수 데이터 구성
-        final_score_data = {
-            "final_score": final_score_value,
-            "initial_score": initial_matching["total_score"],
-            "chat_score": chat_based["chat_score"],
-            "weighted_score": final_score_value,
-            "chat_analysis": chat_based.get("analysis", "채팅 내역이 없습니다.")
-        }
+        graph = StageGraph([
+            Stage("initial", initial_stage),
+            Stage("messages", messages_stage),
+            Stage("chat", chat_stage, deps=["messages"]),
+            Stage("final", final_stage, deps=["initial", "chat"])
+        ])
         
         # 최종 리포트 스트리밍 생성
         from matching import generate_final_report_stream
         
-        def generate_stream():
+        async def generate_stream():
+            started = time.perf_counter()
+            first_byte_ms = None
+            # 스트림용 DB 세션은 스트림 안에서 열고 닫음 (스트림이 시작되지 않으면 열지 않음)
+            stream_db = SessionLocal()
             try:
-                for chunk in generate_final_report_stream(
-                    applicant_name=applicant.name or "지원자",
+                # 각 단계는 요청 마감까지 남은 시간 안에서만 실행
+                results = await graph.run({"db": stream_db}, deadline=deadline)
+                final_score_data = results["final"]
+                
+                # 점수가 나오면 바로 점수 이벤트 전송 (리포트 본문보다 먼저)
+                score_event = json.dumps({
+                    "type": "score",
+                    "content": "",
+                    "done": False,
+                    "initial_score": final_score_data["initial_score"],
+                    "chat_score": final_score_data["chat_score"],
+                    "final_score": final_score_data["final_score"]
+                }, ensure_ascii=False)
+                first_byte_ms = (time.perf_counter() - started) * 1000
+                yield f"data: {score_event}\n\n"
+                
+                # 입력(점수, 메시지 수 등)이 같은 저장된 리포트가 있으면 재생성 없이 재생
+                messages = results["messages"]
+                input_hash = input_fingerprint(FINAL_REPORT, {
+                    "applicant_name": applicant_name,
+                    "applicant_data": applicant_data,
+                    "professor_id": professor_id,
+                    "professor_name": professor_name,
+                    "initial_score": final_score_data["initial_score"],
+                    "chat_score": final_score_data["chat_score"],
+                    "final_score": final_score_data["final_score"],
+                    "message_count": len(messages),
+                    "last_message_id": max((msg.id for msg in messages), default=None)
+                })
+                stored_report = await run_in_threadpool(find_document, stream_db, FINAL_REPORT, input_hash)
+                if stored_report is not None:
+                    for chunk in replay_document_stream(stored_report):
+                        yield chunk
+                    return
+                
+                def save_report(content):
+                    document = save_document(
+                        stream_db,
+                        FINAL_REPORT,
+                        input_hash,
+                        content,
+                        metadata={
+                            "initial_score": final_score_data["initial_score"],
+                            "chat_score": final_score_data["chat_score"],
+                            "final_score": final_score_data["final_score"]
+                        },
+                        applicant_id=applicant_id,
+                        professor_id=professor_id,
+                        session_id=session_id
+                    )
+                    return document.id if document else None
+                
+                # 점수 계산에 시간을 다 쓴 경우 리포트 생성은 시작하지 않음
+                check_deadline("최종 리포트 생성", deadline)
+                report_stream = generate_final_report_stream(
+                    applicant_name=applicant_name,
                     applicant_data=applicant_data,
-                    professor_id=session.professor_id,
-                    professor_name=professor.name,
-                    initial_matching=initial_matching,
-                    chat_based_score=chat_based,
+                    professor_id=professor_id,
+                    professor_name=professor_name,
+                    initial_matching=results["initial"],
+                    chat_based_score=results["chat"],
                     final_score=final_score_data,
-                    chat_messages=chat_messages
+                    chat_messages=results["chat_messages"]
+                )
+                # 정상 완료된 리포트는 저장 (완료 이벤트에 document_id 포함)
+                async for chunk in capture_document_stream(
+                    iterate_in_threadpool(scoped_iter(deadline, report_stream, "최종 리포트 생성")),
+                    save_report
                 ):
                     yield chunk
             except Exception as e:
@@ -1178,6 +1642,12 @@ async def generate_final_matching_report(
                     "error": True
                 }, ensure_ascii=False)
                 yield f"data: {error_msg}\n\n"
+            finally:
+                stream_db.close()
+                total_ms = (time.perf_counter() - started) * 1000
+                first_byte = f"{first_byte_ms:.0f}ms" if first_byte_ms is not None else "-"
+                print(f"[최종 리포트] 세션 {session_id} 단계별 시간 (시작/소요): {graph.format_timings()} "
+                      f"| 첫 이벤트 {first_byte}, 전체 {total_ms:.0f}ms")
         
         return StreamingResponse(
             generate_stream(),
@@ -1198,6 +1668,31 @@ async def generate_final_matching_report(
         )
 
 
+@app.get(
+    "/match/final/{report_id}",
+    response_model=GeneratedDocumentResponse,
+    tags=["Matching"],
+    summary="저장된 최종 리포트 조회",
+    description="""
+    생성된 최종 리포트를 재생성 없이 조회합니다. (리포트 ID는 `/match/final` 완료 이벤트의 `document_id`)
+    
+    - `stream=true`이면 `/match/final`과 같은 SSE 형식으로 바로 재생합니다
+    """
+)
+async def get_final_report(
+    report_id: int,
+    stream: bool = Query(False, description="SSE 형식으로 재생"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    document = await get_document(db, report_id, FINAL_REPORT)
+    if document is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"리포트 ID {report_id}를 찾을 수 없습니다."
+        )
+    return document_response(document, stream)
+
+
 @app.post(
     "/email/draft",
     tags=["Email"],
@@ -1215,6 +1710,7 @@ async def generate_final_matching_report(
 )
 async def create_email_draft(
     request: EmailDraftRequest,
+    request_timeout: Optional[str] = Header(None, alias=REQUEST_TIMEOUT_HEADER),
     db: Session = Depends(get_db)
 ):
     """
@@ -1230,6 +1726,7 @@ async def create_email_draft(
     Returns:
         이메일 초안 텍스트
     """
+    deadline = request_deadline("email_draft", request_timeout)
     try:
         # 지원자 정보 조회
         applicant = db.query(Applicant).filter(Applicant.id == request.applicant_id).first()
@@ -1272,7 +1769,8 @@ async def create_email_draft(
                     }
                     
                     # 빠른 처리: 1차 적합도만 계산 (채팅 기반 점수는 생략하여 속도 개선)
-                    initial_matching = calculate_matching_score(applicant_data, request.professor_id)
+                    with deadline_scope(deadline):
+                        initial_matching = calculate_matching_score(applicant_data, request.professor_id)
                     final_score = initial_matching["total_score"]
                     
                     # 채팅 메시지가 있으면 간단히 확인만 (점수 계산 생략)
@@ -1281,22 +1779,61 @@ async def create_email_draft(
                 # 세션 조회 실패해도 이메일 초안은 생성 가능
                 pass
         
+        # 이메일 초안 생성 입력
+        draft_inputs = {
+            "applicant_name": applicant.name or "지원자",
+            "applicant_major": applicant.major,
+            "applicant_interest_keyword": applicant.interest_keyword,
+            "graduate_school_name": graduate_school.name,
+            "professor_name": professor.name,
+            "professor_research_fields": professor.research_fields,
+            "final_score": final_score,
+            "appointment_date": request.appointment_date,
+            "appointment_time": request.appointment_time,
+            "consultation_method": request.consultation_method
+        }
+        input_hash = input_fingerprint(EMAIL_DRAFT, draft_inputs)
+        
+        # 입력(점수, 상담 일정 등)이 같은 저장된 초안이 있으면 재생성 없이 재생
+        stored_draft = find_document(db, EMAIL_DRAFT, input_hash)
+        if stored_draft is not None:
+            return StreamingResponse(
+                replay_document_stream(stored_draft),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no"
+                }
+            )
+        
         # 이메일 초안 스트리밍 생성
         from matching import generate_email_draft_stream
         
-        def generate_stream():
+        def save_draft(content):
+            # 요청 의존성 세션은 응답 시작 시 종료되므로 별도 세션 사용
+            draft_db = SessionLocal()
             try:
-                for chunk in generate_email_draft_stream(
-                    applicant_name=applicant.name or "지원자",
-                    applicant_major=applicant.major,
-                    applicant_interest_keyword=applicant.interest_keyword,
-                    graduate_school_name=graduate_school.name,
-                    professor_name=professor.name,
-                    professor_research_fields=professor.research_fields,
-                    final_score=final_score,
-                    appointment_date=request.appointment_date,
-                    appointment_time=request.appointment_time,
-                    consultation_method=request.consultation_method
+                document = save_document(
+                    draft_db,
+                    EMAIL_DRAFT,
+                    input_hash,
+                    content,
+                    metadata={"final_score": final_score},
+                    applicant_id=request.applicant_id,
+                    professor_id=request.professor_id,
+                    session_id=request.session_id
+                )
+                return document.id if document else None
+            finally:
+                draft_db.close()
+        
+        async def generate_stream():
+            try:
+                # 정상 완료된 초안은 저장 (완료 이벤트에 document_id 포함)
+                async for chunk in capture_document_stream(
+                    iterate_in_threadpool(scoped_iter(deadline, generate_email_draft_stream(**draft_inputs))),
+                    save_draft
                 ):
                     yield chunk
             except Exception as e:
@@ -1327,6 +1864,31 @@ async def create_email_draft(
         )
 
 
+@app.get(
+    "/email/draft/{draft_id}",
+    response_model=GeneratedDocumentResponse,
+    tags=["Email"],
+    summary="저장된 이메일 초안 조회",
+    description="""
+    생성된 이메일 초안을 재생성 없이 조회합니다. (초안 ID는 `/email/draft` 완료 이벤트의 `document_id`)
+    
+    - `stream=true`이면 `/email/draft`와 같은 SSE 형식으로 바로 재생합니다
+    """
+)
+async def get_email_draft(
+    draft_id: int,
+    stream: bool = Query(False, description="SSE 형식으로 재생"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    document = await get_document(db, draft_id, EMAIL_DRAFT)
+    if document is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"이메일 초안 ID {draft_id}를 찾을 수 없습니다."
+        )
+    return document_response(document, stream)
+
+
 @app.post(
     "/email/send",
     response_model=EmailSendResponse,
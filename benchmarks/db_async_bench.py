@@ -0,0 +1,181 @@
+"""
+동기 / 비동기 DB 세션 처리량 벤치마크
+
+이벤트 루프 위에서 동시 요청을 실행하여 다음 두 방식을 비교합니다.
+- sync: async 핸들러 안에서 SessionLocal 사용 (기존 방식, 이벤트 루프를 막음)
+- async: get_async_db / AsyncSessionLocal 사용
+
+요청 하나는 /chat/session 조회(세션 + 메시지 수 + 최근 메시지 50개)를 흉내내며,
+--write-ratio 비율만큼 /chat처럼 메시지 2개를 저장하고 커밋합니다.
+--upstream-ms는 요청마다 await하는 업스트림(OpenAI 등) 대기 시간으로,
+동기 세션이 이벤트 루프를 막으면 다른 요청의 대기까지 함께 늦어집니다.
+
+사용법:
+    python benchmarks/db_async_bench.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="동기/비동기 DB 세션 처리량 벤치마크")
+    parser.add_argument("--requests", type=int, default=2000, help="모드별 총 요청 수")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시 요청 수")
+    parser.add_argument("--sessions", type=int, default=200, help="시드 채팅 세션 수")
+    parser.add_argument("--messages", type=int, default=100, help="세션당 시드 메시지 수")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="메시지 저장 요청 비율 (0~1)")
+    parser.add_argument("--upstream-ms", type=float, default=50.0, help="요청당 비동기 업스트림 대기 시간 (ms)")
+    parser.add_argument("--database-url", default=None, help="벤치마크용 DB URL (기본: 임시 SQLite 파일)")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def loop_lag_probe(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    """이벤트 루프 지연 측정 (sleep이 예정보다 늦게 깨어난 시간)"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_mode(name, handler, args, session_ids):
+    latencies = []
+    lags = []
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            session_id = session_ids[i % len(session_ids)]
+            write = (i % 100) < args.write_ratio * 100
+            start = time.perf_counter()
+            await asyncio.sleep(args.upstream_ms / 1000)
+            await handler(session_id, write)
+            latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    return {
+        "mode": name,
+        "throughput": args.requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "loop_lag_p95_ms": percentile(lags, 95) * 1000,
+        "loop_lag_max_ms": (max(lags) if lags else 0.0) * 1000,
+    }
+
+
+def main():
+    args = parse_args()
+
+    # database 모듈 import 전에 DB URL 지정 (운영 DB 사용 방지)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="advisor_bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from sqlalchemy import select, func
+    from database import (
+        init_db, SessionLocal, AsyncSessionLocal, async_engine,
+        GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
+    )
+
+    # 시드 데이터 생성
+    init_db()
+    db = SessionLocal()
+    school = GraduateSchool(name=f"bench_school_{time.time_ns()}")
+    db.add(school)
+    db.commit()
+    db.add(Professor(professor_id=f"bench_prof_{school.id}", name="벤치 교수", graduate_school_id=school.id))
+    session_ids = []
+    for i in range(args.sessions):
+        applicant = Applicant(interest_keyword="디지털 전환", learning_styles="협업형")
+        db.add(applicant)
+        db.flush()
+        session = ChatSession(applicant_id=applicant.id, professor_id=f"bench_prof_{school.id}")
+        db.add(session)
+        db.flush()
+        session_ids.append(session.id)
+        db.bulk_save_objects([
+            ChatMessage(session_id=session.id, role="user" if j % 2 == 0 else "professor", content="벤치마크 메시지 " * 20)
+            for j in range(args.messages)
+        ])
+    db.commit()
+    db.close()
+    print(f"시드 완료: 세션 {args.sessions}개 × 메시지 {args.messages}개 ({os.environ['DATABASE_URL']})")
+
+    async def sync_handler(session_id, write):
+        # 기존 핸들러 방식: async def 안에서 동기 세션 사용
+        db = SessionLocal()
+        try:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            db.query(ChatMessage).filter(ChatMessage.session_id == session_id).count()
+            db.query(ChatMessage).filter(ChatMessage.session_id == session_id).order_by(
+                ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+            ).limit(50).all()
+            if write:
+                db.add(ChatMessage(session_id=session.id, role="user", content="질문"))
+                db.add(ChatMessage(session_id=session.id, role="professor", content="답변"))
+                db.commit()
+        finally:
+            db.close()
+
+    async def async_handler(session_id, write):
+        async with AsyncSessionLocal() as db:
+            session = await db.get(ChatSession, session_id)
+            await db.scalar(select(func.count(ChatMessage.id)).where(ChatMessage.session_id == session_id))
+            (await db.execute(
+                select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(
+                    ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+                ).limit(50)
+            )).scalars().all()
+            if write:
+                db.add(ChatMessage(session_id=session.id, role="user", content="질문"))
+                db.add(ChatMessage(session_id=session.id, role="professor", content="답변"))
+                await db.commit()
+
+    async def run_all():
+        results = [
+            await run_mode("sync", sync_handler, args, session_ids),
+            await run_mode("async", async_handler, args, session_ids),
+        ]
+        await async_engine.dispose()
+        return results
+
+    results = asyncio.run(run_all())
+
+    print(f"\n요청 {args.requests}개, 동시성 {args.concurrency}, 쓰기 비율 {args.write_ratio:.0%}")
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'loop lag p95 ms':>18}{'loop lag max ms':>18}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['throughput']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['loop_lag_p95_ms']:>18.2f}{r['loop_lag_max_ms']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+사용자 여정 부하 테스트
+
+실제 사용 흐름을 하나의 여정으로 묶어 실행 중인 API 서버에 부하를 겁니다.
+    /match → /chat/session → /chat × N → /match/rationale → /match/final → /email/draft
+
+- 개방 루프(open-loop): 여정 시작 시각을 포아송 과정(--rate, 초당 여정 수)으로 정하며,
+  앞선 여정의 완료를 기다리지 않으므로 서버가 느려지면 동시 요청이 쌓입니다 (실제 트래픽과 같음)
+- 엔드포인트별 p50 / p95 / p99 지연, SSE 첫 바이트까지 시간, 오류율
+- 업스트림 호출 수: 서버의 /metrics/openai, /metrics/llm-cache 와 대체 서버의 /mock/stats 를 전후 비교
+  (/metrics/* 는 워커 프로세스별 값이므로 워커 1개로 실행할 때 정확)
+- 결과를 JSON으로 저장하고, 커밋 간 결과 비교 (--compare)
+
+사용법:
+    # 1) 대체 업스트림 서버 (OpenAI / Pinecone)
+    python mock_server.py
+    # 2) API 서버 (대체 서버 사용)
+    OPENAI_BASE_URL=http://localhost:8100/v1 PINECONE_HOST=http://localhost:8100 API_RELOAD=false python api.py
+    # 3) 부하 생성 (초당 여정 1개, 60초)
+    python benchmarks/load_test.py --rate 1 --duration 60 --mock-url http://localhost:8100 --output after.json
+    # 두 결과 비교
+    python benchmarks/load_test.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+ENDPOINTS = ["/match", "/chat/session", "/chat", "/match/rationale", "/match/final", "/email/draft"]
+SSE_ENDPOINTS = {"/match/rationale", "/match/final", "/email/draft"}
+
+INTEREST_KEYWORDS = ["디지털 전환", "조직 학습", "기술 혁신", "기술 전략", "지속가능경영"]
+LEARNING_STYLES = ["사례 기반", "협업형", "탐구형", "자율형", "피드백 선호", "실증 분석"]
+CHAT_QUESTIONS = [
+    "교수님은 어떤 연구 방법론을 선호하시나요?",
+    "연구실 미팅은 얼마나 자주 하시나요?",
+    "학생에게 가장 원하는 역량은 무엇인가요?",
+    "최근 관심 있는 연구 주제는 무엇인가요?",
+    "논문 지도는 어떤 방식으로 하시나요?",
+    "졸업 요건은 어떻게 되나요?"
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="사용자 여정 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 서버 주소")
+    parser.add_argument("--mock-url", default=None, help="대체 업스트림 서버 주소 (업스트림 호출 수 집계)")
+    parser.add_argument("--rate", type=float, default=1.0, help="초당 여정 시작 수 (개방 루프)")
+    parser.add_argument("--duration", type=float, default=60.0, help="여정을 시작하는 시간 (초)")
+    parser.add_argument("--chat-turns", type=int, default=3, help="여정당 /chat 호출 수")
+    parser.add_argument("--professor-id", default=None, help="여정에서 선택할 교수님 (기본: /match 1위)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="요청별 클라이언트 타임아웃 (초)")
+    parser.add_argument("--drain-timeout", type=float, default=180.0, help="시작 종료 후 진행 중인 여정을 기다리는 시간 (초)")
+    parser.add_argument("--seed", type=int, default=42, help="도착 간격 / 입력 선택 난수 시드")
+    parser.add_argument("--label", default=None, help="결과 이름 (기본: 현재 git 커밋)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="저장된 두 결과 비교")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+# -----------------------------
+# 1. 요청 기록
+# -----------------------------
+class Recorder:
+    """엔드포인트별 지연 / SSE 첫 바이트 / 오류 기록"""
+
+    def __init__(self):
+        self.samples = {endpoint: [] for endpoint in ENDPOINTS}
+        self.journeys = {"started": 0, "completed": 0, "failed": 0}
+        self.journey_latencies = []
+        self.errors = {}
+
+    def record(self, endpoint, latency, ok, ttfb=None, error=None):
+        self.samples[endpoint].append({"latency": latency, "ttfb": ttfb, "ok": ok})
+        if error:
+            key = f"{endpoint} {error}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def summary(self):
+        endpoints = {}
+        for endpoint, samples in self.samples.items():
+            if not samples:
+                continue
+            latencies = [s["latency"] for s in samples if s["ok"]]
+            row = {
+                "requests": len(samples),
+                "errors": sum(1 for s in samples if not s["ok"]),
+                "error_rate": round(sum(1 for s in samples if not s["ok"]) / len(samples), 4),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+            }
+            if endpoint in SSE_ENDPOINTS:
+                ttfbs = [s["ttfb"] for s in samples if s["ok"] and s["ttfb"] is not None]
+                row.update({
+                    "ttfb_p50_ms": round(percentile(ttfbs, 50) * 1000, 1),
+                    "ttfb_p95_ms": round(percentile(ttfbs, 95) * 1000, 1),
+                    "ttfb_p99_ms": round(percentile(ttfbs, 99) * 1000, 1)
+                })
+            endpoints[endpoint] = row
+        return endpoints
+
+
+# -----------------------------
+# 2. 여정 실행
+# -----------------------------
+async def timed_json(client, recorder, endpoint, method, url, **kwargs):
+    """JSON 요청 (실패 시 None)"""
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, time.perf_counter() - start, False, error=type(e).__name__)
+        return None
+    latency = time.perf_counter() - start
+    if response.status_code != 200:
+        recorder.record(endpoint, latency, False, error=str(response.status_code))
+        return None
+    recorder.record(endpoint, latency, True)
+    return response.json()
+
+
+async def timed_sse(client, recorder, endpoint, url, **kwargs):
+    """SSE 요청: 첫 바이트까지 시간과 전체 시간 (오류 이벤트나 done 없이 끝나면 실패)"""
+    start = time.perf_counter()
+    ttfb = None
+    done = False
+    failed = None
+    try:
+        async with client.stream("POST", url, **kwargs) as response:
+            if response.status_code != 200:
+                await response.aread()
+                failed = str(response.status_code)
+            else:
+                async for line in response.aiter_lines():
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - start
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    if event.get("error"):
+                        failed = "sse_error"
+                        break
+                    if event.get("done"):
+                        done = True
+    except httpx.HTTPError as e:
+        failed = type(e).__name__
+    if failed is None and not done:
+        failed = "incomplete"
+
+    recorder.record(endpoint, time.perf_counter() - start, failed is None, ttfb=ttfb, error=failed)
+    return failed is None
+
+
+async def run_journey(client, recorder, args, rng):
+    """지원자 1명의 여정 (한 단계라도 실패하면 이후 단계는 건너뜀)"""
+    recorder.journeys["started"] += 1
+    start = time.perf_counter()
+    ok = await _journey_steps(client, recorder, args, rng)
+    recorder.journeys["completed" if ok else "failed"] += 1
+    if ok:
+        recorder.journey_latencies.append(time.perf_counter() - start)
+
+
+async def _journey_steps(client, recorder, args, rng) -> bool:
+    applicant = {
+        "name": f"부하테스트 {uuid.uuid4().hex[:8]}",
+        "interest_keyword": rng.choice(INTEREST_KEYWORDS),
+        "learning_styles": rng.sample(LEARNING_STYLES, rng.randint(1, 3))
+    }
+    # 매 여정이 실제 계산을 하도록 Idempotency-Key를 새로 발급
+    match = await timed_json(
+        client, recorder, "/match", "POST", "/match",
+        json={"request": applicant}, headers={"Idempotency-Key": uuid.uuid4().hex}
+    )
+    if not match or not match.get("results"):
+        return False
+    applicant_id = match["applicant_id"]
+    professor_id = args.professor_id or match["results"][0]["professor_id"]
+
+    session = await timed_json(
+        client, recorder, "/chat/session", "POST", "/chat/session",
+        json={"applicant_id": applicant_id, "professor_id": professor_id, "message_limit": 0}
+    )
+    if not session:
+        return False
+
+    for question in rng.sample(CHAT_QUESTIONS, min(args.chat_turns, len(CHAT_QUESTIONS))):
+        answer = await timed_json(
+            client, recorder, "/chat", "POST", "/chat",
+            json={"question": question, "professor_id": professor_id, "session_id": session["id"]}
+        )
+        if not answer:
+            return False
+
+    if not await timed_sse(
+        client, recorder, "/match/rationale", "/match/rationale",
+        json={"applicant_id": applicant_id, "professor_id": professor_id}
+    ):
+        return False
+    if not await timed_sse(
+        client, recorder, "/match/final", "/match/final", params={"session_id": session["id"]}
+    ):
+        return False
+    return await timed_sse(
+        client, recorder, "/email/draft", "/email/draft",
+        json={
+            "applicant_id": applicant_id,
+            "professor_id": professor_id,
+            "session_id": session["id"],
+            "appointment_date": "2025년 12월 17일",
+            "appointment_time": "오후 3시",
+            "consultation_method": "zoom"
+        }
+    )
+
+
+# -----------------------------
+# 3. 업스트림 호출 수
+# -----------------------------
+async def fetch_counters(client, mock_url):
+    """서버 / 대체 서버의 누적 카운터 (가져오지 못한 항목은 생략)"""
+    counters = {}
+    sources = [("openai", "/metrics/openai"), ("llm_cache", "/metrics/llm-cache")]
+    for name, path in sources:
+        try:
+            counters[name] = (await client.get(path, timeout=10)).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+    if mock_url:
+        try:
+            async with httpx.AsyncClient(base_url=mock_url, timeout=10) as mock:
+                counters["mock"] = (await mock.get("/mock/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+    return counters
+
+
+def _flatten(data, prefix=""):
+    """숫자 값만 "a.b.c" 키로 펼침 (p50 등 분포 값 제외)"""
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in ("limits", "queue_wait_ms", "latency_ms", "timeouts_seconds", "http_versions"):
+                continue
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix[:-1]] = data
+    return flat
+
+
+# 누적 카운터가 아닌 현재 상태 값 (증가분 계산에서 제외)
+GAUGE_SUFFIXES = ("rate", "in_flight", "queued", "paused_ms", "open_connections", "window_calls")
+
+
+def counter_delta(before, after):
+    """테스트 동안 늘어난 카운터 (증가분이 0인 항목 제외)"""
+    before, after = _flatten(before), _flatten(after)
+    return {
+        key: round(value - before.get(key, 0), 4)
+        for key, value in sorted(after.items())
+        if value != before.get(key, 0) and not key.endswith(GAUGE_SUFFIXES)
+    }
+
+
+# -----------------------------
+# 4. 실행 / 보고
+# -----------------------------
+async def run_load(args):
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        before = await fetch_counters(client, args.mock_url)
+
+        # 개방 루프: 포아송 도착 (지수 분포 간격)으로 여정 시작
+        tasks = []
+        started = time.perf_counter()
+        next_start = 0.0
+        while next_start < args.duration:
+            delay = started + next_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run_journey(client, recorder, args, random.Random(rng.random()))))
+            next_start += rng.expovariate(args.rate)
+        issued_elapsed = time.perf_counter() - started
+
+        _, pending = await asyncio.wait(tasks, timeout=args.drain_timeout) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        elapsed = time.perf_counter() - started
+
+        after = await fetch_counters(client, args.mock_url)
+
+    return {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "base_url": args.base_url,
+            "rate": args.rate,
+            "duration": args.duration,
+            "chat_turns": args.chat_turns,
+            "seed": args.seed
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "journeys": {
+            **recorder.journeys,
+            "unfinished": len(pending),
+            "achieved_rate": round(len(tasks) / issued_elapsed, 3) if issued_elapsed else 0.0,
+            "p50_ms": round(percentile(recorder.journey_latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(recorder.journey_latencies, 95) * 1000, 1)
+        },
+        "endpoints": recorder.summary(),
+        "errors": recorder.errors,
+        "upstream": counter_delta(before, after)
+    }
+
+
+def print_report(result):
+    journeys = result["journeys"]
+    print(f"\n[{result['label']}] 여정 {journeys['started']}개 (완료 {journeys['completed']}, 실패 {journeys['failed']}, "
+          f"미완료 {journeys['unfinished']}), 도착률 {journeys['achieved_rate']}/s, 여정 p95 {journeys['p95_ms']:.0f} ms")
+    print(f"{'endpoint':<18}{'req':>6}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ttfb p50':>10}{'ttfb p95':>10}")
+    for endpoint, row in result["endpoints"].items():
+        ttfb = f"{row['ttfb_p50_ms']:>10.0f}{row['ttfb_p95_ms']:>10.0f}" if "ttfb_p50_ms" in row else f"{'-':>10}{'-':>10}"
+        print(f"{endpoint:<18}{row['requests']:>6}{row['error_rate'] * 100:>7.1f}"
+              f"{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}{ttfb}")
+    if result["errors"]:
+        print("\n오류:")
+        for key, count in sorted(result["errors"].items()):
+            print(f"  {key}: {count}")
+    if result["upstream"]:
+        print("\n업스트림 / 캐시 카운터 증가분:")
+        for key, value in result["upstream"].items():
+            print(f"  {key}: {value}")
+
+
+def compare(before_path, after_path):
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"{before['label']} → {after['label']}")
+    print(f"{'endpoint':<18}{'metric':<14}{'before':>10}{'after':>10}{'change':>10}")
+    for endpoint in ENDPOINTS:
+        old, new = before["endpoints"].get(endpoint), after["endpoints"].get(endpoint)
+        if not old or not new:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "ttfb_p95_ms", "error_rate"):
+            if metric not in old or metric not in new:
+                continue
+            change = f"{(new[metric] - old[metric]) / old[metric] * 100:+.1f}%" if old[metric] else "-"
+            print(f"{endpoint:<18}{metric:<14}{old[metric]:>10}{new[metric]:>10}{change:>10}")
+
+
+def main():
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = asyncio.run(run_load(args))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+매칭 / 검색 내부 함수 마이크로벤치마크
+
+generate_corpus.py의 합성 코퍼스(교수님 수 × 교수님당 Q&A 수 × 임베딩 차원)를 규모별로 만들어 다음 함수의 호출당 시간을 측정합니다.
+- matching: cosine_similarity, calculate_indicator_score, calculate_matching_score, match_all_professors, remove_markdown
+- chat: format_context
+
+임베딩은 텍스트별로 고정된 난수 벡터를 미리 만들어 두고 반환하므로(네트워크 없음)
+점수 계산 자체의 비용만 측정됩니다.
+
+결과를 기준값(baseline)으로 저장하고, 이후 실행 결과와 비교해 허용 오차보다 느려진 항목을 표시합니다
+(회귀가 있으면 종료 코드 1). 비교에는 반복 측정의 최솟값(다른 프로세스 간섭이 가장 적은 값)을 사용하고,
+여러 라운드로 나눠 측정한 라운드 간 편차(noise)를 함께 기록합니다. 항목별 허용 오차는 --tolerance와 기준값의
+noise 중 큰 값이며, 편차가 큰 머신에서도 실제 회귀를 놓치지 않도록 --tolerance의 2배를 넘지 않습니다.
+
+기준값은 측정한 머신에서만 의미가 있으므로 머신별 파일(benchmarks/baselines/<machine-id>.json)로 저장해
+저장소에 커밋합니다. machine-id는 Python 버전 / 플랫폼 / CPU 정보로 정해지며, 경로를 생략하면 현재 머신의
+파일을 사용합니다. 기준값의 machine 정보가 현재 머신과 다르거나 현재 머신의 기준값이 없으면 비교하지 않습니다
+(종료 코드 2). 성능이 의도적으로 바뀌는 변경은 같은 커밋에서 기준값을 다시 저장해 함께 커밋하므로,
+머신별 성능 변화는 기준값 파일의 git 이력(label = 측정한 커밋)으로 추적됩니다.
+
+사용법:
+    python benchmarks/micro_bench.py --save-baseline          # benchmarks/baselines/<machine-id>.json
+    python benchmarks/micro_bench.py --compare                # 현재 머신의 기준값과 비교
+    python benchmarks/micro_bench.py --compare path/to/baseline.json
+    python benchmarks/micro_bench.py --scales s m --benchmarks cosine_similarity calculate_matching_score
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import zlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+from generate_corpus import INDICATORS, generate_professor, load_seed_pools, school_names
+
+# 규모: (교수님 수, 교수님당 Q&A 수, 임베딩 차원)
+SCALES = {
+    "s": (3, 20, 256),
+    "m": (30, 50, 1536),
+    "l": (100, 100, 3072)
+}
+
+# 최소 허용 오차 (기준값의 라운드 간 편차가 더 크면 그 값을 쓰되, 최소 허용 오차의 2배를 넘지 않음)
+COMPARE_TOLERANCE = 0.25
+MAX_ALLOWANCE_FACTOR = 2
+
+APPLICANT = {"interest_keyword": "디지털 전환", "learning_styles": ["사례 기반", "협업형", "탐구형"]}
+
+MARKDOWN_REPORT = (
+    "# 최종 적합도 리포트\n\n"
+    "## 1. 종합 평가\n**지원자**는 교수님의 *연구 방향*과 높은 적합도를 보입니다. `디지털 전환` 분야의 "
+    "[선행 연구](https://example.com)를 꾸준히 살펴본 점이 돋보입니다.\n\n---\n\n"
+    "## 2. 세부 분석\n- **연구 키워드**: 관심 주제가 교수님의 최근 연구와 일치합니다.\n"
+    "- **연구 방법론**: *사례 기반* 접근을 선호하여 교수님의 정성 연구 방식과 잘 맞습니다.\n"
+    "- **커뮤니케이션**: 정기적인 피드백을 원하는 성향이 연구실 운영 방식과 맞습니다.\n\n===\n\n"
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="매칭 / 검색 내부 함수 마이크로벤치마크")
+    parser.add_argument("--scales", nargs="+", default=["s", "m"], choices=sorted(SCALES), help="측정할 규모")
+    parser.add_argument("--benchmarks", nargs="+", default=None, help="측정할 벤치마크 (기본: 전체)")
+    parser.add_argument("--repeat", type=int, default=5, help="라운드당 반복 측정 횟수")
+    parser.add_argument("--rounds", type=int, default=3, help="측정 라운드 수 (라운드 간 편차를 noise로 기록)")
+    parser.add_argument("--seed", type=int, default=42, help="합성 코퍼스 / 임베딩 난수 시드")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument(
+        "--save-baseline", nargs="?", const=baseline_path(), default=None,
+        help="결과를 기준값으로 저장할 경로 (생략 시 benchmarks/baselines/<machine-id>.json)"
+    )
+    parser.add_argument(
+        "--compare", nargs="?", const=baseline_path(), default=None,
+        help="비교할 기준값 JSON (생략 시 현재 머신의 기준값)"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=COMPARE_TOLERANCE, help="회귀로 판단할 느려짐 비율 (0.25 = 25%%)"
+    )
+    return parser.parse_args()
+
+
+def machine_info():
+    """측정 머신 정보 (기준값과 다르면 비교하지 않음)"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def machine_id() -> str:
+    """기준값 파일 이름용 머신 식별자 (예: linux-x86_64-py3.11.7-4cpu-1a2b3c4d)"""
+    info = machine_info()
+    digest = hashlib.sha1(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    return f"{platform.system().lower()}-{platform.machine().lower()}-py{info['python']}-{info['cpu_count']}cpu-{digest}"
+
+
+def baseline_path() -> str:
+    """현재 머신의 기준값 경로"""
+    return os.path.join(BASELINE_DIR, f"{machine_id()}.json")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+# -----------------------------
+# 1. 합성 코퍼스 / 임베딩
+# -----------------------------
+def build_corpus(professors, qa_per_professor, seed):
+    """generate_corpus.py의 합성 코퍼스 (Q&A는 5개 indicator에 고르게 배분)"""
+    pools = load_seed_pools()
+    schools = school_names(1)
+    corpus = []
+    for number in range(1, professors + 1):
+        _, chunks = generate_professor(
+            number, pools, schools, prefix="bench", seed=seed, qa_per_indicator=qa_per_professor // len(INDICATORS)
+        )
+        corpus.extend(chunks)
+    return corpus
+
+
+class RandomEmbeddingProvider:
+    """텍스트별로 고정된 단위 난수 벡터 (처음 요청 시 생성 후 캐시)"""
+
+    name = "bench"
+
+    def __init__(self, dimension, seed):
+        self.dimension = dimension
+        self.seed = seed
+        self._cache = {}
+
+    def _vector(self, text):
+        vector = self._cache.get(text)
+        if vector is None:
+            rng = random.Random(zlib.crc32(text.encode("utf-8")) ^ self.seed)
+            values = [rng.gauss(0, 1) for _ in range(self.dimension)]
+            norm = sum(v * v for v in values) ** 0.5
+            vector = self._cache[text] = [v / norm for v in values]
+        return vector
+
+    def embed_texts(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_text(self, text):
+        return self._vector(text)
+
+
+# -----------------------------
+# 2. 측정
+# -----------------------------
+def measure_round(fn, repeat):
+    """1라운드 호출당 시간 목록 (마이크로초): 한 번에 0.2초 이상 걸리도록 반복 횟수를 정하고 repeat번 측정"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return number, [elapsed / number * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+
+def summarize(rounds, repeat):
+    """
+    라운드별 측정 결과 요약
+
+    min_us: 전체 최솟값 (비교 기준)
+    noise: 라운드별 최솟값의 편차 (최대 / 최소 - 1), 코드 변경 없이도 생기는 흔들림
+    """
+    runs = [value for _, values in rounds for value in values]
+    round_mins = [min(values) for _, values in rounds]
+    return {
+        "median_us": round(statistics.median(runs), 3),
+        "min_us": round(min(runs), 3),
+        "noise": round(max(round_mins) / min(round_mins) - 1, 4),
+        "number": rounds[0][0],
+        "repeat": repeat,
+        "rounds": len(rounds)
+    }
+
+
+def scale_benchmarks(scale, args):
+    """규모 1개의 벤치마크 {이름: 함수} (합성 코퍼스 적재 및 임베딩 캐시 준비 포함)"""
+    import corpus as corpus_module
+    import matching
+    import chat
+
+    professors, qa_per_professor, dimension = SCALES[scale]
+    corpus = build_corpus(professors, qa_per_professor, args.seed)
+
+    corpus_path = os.path.join(tempfile.mkdtemp(prefix="advisor_micro_"), "corpus.json")
+    with open(corpus_path, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False)
+    corpus_module.CORPUS_PATH = corpus_path
+    matching.embedder = RandomEmbeddingProvider(dimension, args.seed)
+
+    professor_id = corpus[0]["professor_id"]
+    style_embeddings = dict(zip(APPLICANT["learning_styles"], matching.embed_texts(APPLICANT["learning_styles"])))
+    vec_a, vec_b = matching.embed_texts(["벤치마크 A", "벤치마크 B"])
+    matches = [
+        {**item, "text": corpus_module.chunk_text(item), "score": 0.5}
+        for item in corpus[:7]
+    ]
+
+    benchmarks = {
+        "cosine_similarity": lambda: matching.cosine_similarity(vec_a, vec_b),
+        "calculate_indicator_score.A": lambda: matching.calculate_indicator_score(
+            APPLICANT, professor_id, INDICATORS[0], style_embeddings
+        ),
+        "calculate_indicator_score.B": lambda: matching.calculate_indicator_score(
+            APPLICANT, professor_id, INDICATORS[1], style_embeddings
+        ),
+        "calculate_matching_score": lambda: matching.calculate_matching_score(APPLICANT, professor_id, style_embeddings),
+        "match_all_professors": lambda: matching.match_all_professors(APPLICANT),
+        "format_context": lambda: chat.format_context(matches),
+        "remove_markdown": lambda: matching.remove_markdown(MARKDOWN_REPORT)
+    }
+    if args.benchmarks:
+        benchmarks = {name: fn for name, fn in benchmarks.items() if name in args.benchmarks}
+
+    # 임베딩 캐시 / 코퍼스 로드를 미리 끝내 측정에서 제외
+    for fn in benchmarks.values():
+        fn()
+    return benchmarks
+
+
+def run(args):
+    results = {}
+    for scale in args.scales:
+        professors, qa_per_professor, dimension = SCALES[scale]
+        print(f"\n[{scale}] 교수님 {professors}명 × Q&A {qa_per_professor}개 × {dimension}차원")
+        benchmarks = scale_benchmarks(scale, args)
+        # 라운드마다 전체 벤치마크를 번갈아 측정 (일시적인 머신 부하가 한 항목에 몰리지 않도록)
+        rounds = {name: [] for name in benchmarks}
+        for _ in range(args.rounds):
+            for name, fn in benchmarks.items():
+                rounds[name].append(measure_round(fn, args.repeat))
+        for name in benchmarks:
+            result = summarize(rounds[name], args.repeat)
+            results[f"{name}@{scale}"] = result
+            print(
+                f"  {name:<32}{result['min_us']:>14,.1f} us  (중앙값 {result['median_us']:,.1f}, "
+                f"편차 {result['noise']:.0%}, {result['number']}회 × {result['repeat']} × {result['rounds']}라운드)"
+            )
+    return {
+        "label": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "scales": {scale: dict(zip(("professors", "qa_per_professor", "dimension"), SCALES[scale])) for scale in args.scales},
+        "results": results
+    }
+
+
+# -----------------------------
+# 3. 기준값 비교
+# -----------------------------
+def machine_mismatch(baseline):
+    """기준값과 현재 머신 정보 중 다른 항목 [(항목, 기준값, 현재)]"""
+    base_machine = baseline.get("machine") or {}
+    return [
+        (key, base_machine.get(key), value)
+        for key, value in machine_info().items()
+        if base_machine.get(key) != value
+    ]
+
+
+def compare(baseline, current, tolerance):
+    """
+    기준값 대비 최솟값 변화, 회귀 항목 수 반환
+
+    항목별 허용 오차는 tolerance와 기준값의 noise 중 큰 값(최대 tolerance × MAX_ALLOWANCE_FACTOR)이며,
+    느려진 비율이 이를 넘으면 회귀로 표시합니다. 현재 측정의 noise는 쓰지 않습니다
+    (측정이 흔들린 실행이 자기 회귀를 가리지 않도록).
+    """
+    print(f"\n기준값 {baseline['label']} ({baseline['timestamp']}) → 현재 {current['label']}, 최소 허용 오차 {tolerance:.0%}")
+    print(f"{'benchmark':<40}{'baseline us':>14}{'current us':>14}{'change':>10}{'allowed':>10}")
+
+    regressions = 0
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<40}{'-':>14}{result['min_us']:>14,.1f}{'new':>10}")
+            continue
+        change = result["min_us"] / base["min_us"] - 1 if base["min_us"] else 0.0
+        allowed = min(max(tolerance, base.get("noise", 0.0)), tolerance * MAX_ALLOWANCE_FACTOR)
+        flag = ""
+        if change > allowed:
+            flag = "  ← 회귀"
+            regressions += 1
+        elif change < -allowed:
+            flag = "  ← 개선"
+        print(f"{name:<40}{base['min_us']:>14,.1f}{result['min_us']:>14,.1f}{change:>+10.1%}{allowed:>10.0%}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+
+    # 모듈 import 전에 환경 설정 (운영 DB / 외부 API 사용 방지)
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='advisor_micro_')}/bench.db"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("PINECONE_API_KEY", "bench")
+    # 인덱스 이름 조회(네트워크) 없이 chat 모듈을 import하기 위한 호스트 (측정 중 검색은 하지 않음)
+    os.environ.setdefault("PINECONE_HOST", "http://localhost:8100")
+    os.environ["EMBEDDING_PROVIDER"] = "openai"
+    os.environ["OPENAI_CASSETTE_MODE"] = "off"
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"기준값이 없습니다 ({args.compare}). 이 머신에서 --save-baseline으로 먼저 저장하세요.")
+            sys.exit(2)
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        # 다른 머신의 기준값과는 비교하지 않음 (측정 전에 확인)
+        mismatch = machine_mismatch(baseline)
+        if mismatch:
+            print(f"기준값과 측정 머신이 달라 비교하지 않습니다 ({args.compare}). 이 머신에서 기준값을 다시 만드세요.")
+            for key, base_value, value in mismatch:
+                print(f"  {key}: {base_value} → {value}")
+            sys.exit(2)
+
+    current = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        directory = os.path.dirname(args.save_baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값 저장: {args.save_baseline}")
+    if baseline is not None:
+        regressions = compare(baseline, current, args.tolerance)
+        if regressions:
+            print(f"\n회귀 {regressions}건")
+            sys.exit(1)
+        print("\n회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+매칭 로컬 엔진용 유사도 테이블 생성
+- 관심 키워드 / 학습 성향(선택지가 정해진 값)과 모든 교수님 Q&A 답변의 임베딩 코사인 유사도를 미리 계산
+- OpenAI 서킷이 열린 동안 매칭은 이 테이블로 온라인 계산과 같은 점수를 냄
+
+사용법: python build_matching_tables.py  (professor_data.json 변경 후 다시 실행)
+"""
+import json
+from openai_governor import BATCH, llm_priority
+from matching import embed_texts, cosine_similarity
+from local_engine import MATCHING_TABLES_PATH
+from corpus import load_corpus
+
+# /match 요청에서 허용하는 값 (api.py 검증 목록과 동일)
+INTEREST_KEYWORDS = ["디지털 전환", "조직 학습", "기술 혁신", "기술 전략", "지속가능경영"]
+LEARNING_STYLES = ["사례 기반", "협업형", "탐구형", "자율형", "피드백 선호", "실증 분석"]
+
+BATCH_SIZE = 100
+
+
+def build_tables():
+    qa_items = [item for item in load_corpus() if item.get("type") == "qa" and item.get("chunk_id")]
+
+    terms = INTEREST_KEYWORDS + LEARNING_STYLES
+    with llm_priority(BATCH):
+        term_embeddings = embed_texts(terms)
+        answer_embeddings = []
+        for start in range(0, len(qa_items), BATCH_SIZE):
+            batch = qa_items[start:start + BATCH_SIZE]
+            answer_embeddings.extend(embed_texts([item.get("answer", "") for item in batch]))
+
+    similarities = {
+        term: {
+            item["chunk_id"]: cosine_similarity(term_embedding, answer_embedding)
+            for item, answer_embedding in zip(qa_items, answer_embeddings)
+        }
+        for term, term_embedding in zip(terms, term_embeddings)
+    }
+
+    with open(MATCHING_TABLES_PATH, "w", encoding="utf-8") as f:
+        json.dump({"similarities": similarities}, f, ensure_ascii=False)
+    print(f"✅ 유사도 테이블 저장 완료: {MATCHING_TABLES_PATH} (용어 {len(terms)}개 × Q&A {len(qa_items)}개)")
+
+
+if __name__ == "__main__":
+    build_tables()
@@ -1,7 +1,12 @@
 import os
-from openai import OpenAI
+from openai_client import OPENAI_UNAVAILABLE, create_openai_client
 from pinecone import Pinecone
 from database import SessionLocal, Professor
+from corpus import resolve_matches
+from deadline import check_deadline
+from circuit_breaker import openai_breaker
+from local_engine import faq_answer
+from embedding_provider import create_embedding_provider
 from dotenv import load_dotenv
 
 # 환경 변수 로드
@@ -13,32 +18,37 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "ai-advise")
+# 인덱스 호스트를 직접 지정 (mock_server.py 등 대체 서버, 없으면 인덱스 이름으로 조회)
+PINECONE_HOST = os.getenv("PINECONE_HOST")
 
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
 if not PINECONE_API_KEY:
     raise ValueError("PINECONE_API_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# 공유 연결 풀 클라이언트: 동시에 진행 중인 같은 요청은 업스트림 요청 1개로 병합하고,
+# 실제 업스트림 요청은 전역 governor(RPM/TPM/동시성 제한, 재시도)와 호출 종류별 타임아웃을 거침
+client = create_openai_client(OPENAI_API_KEY)
 pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(INDEX_NAME)
+index = pc.Index(INDEX_NAME, host=PINECONE_HOST) if PINECONE_HOST else pc.Index(INDEX_NAME)
+
+# 임베딩 제공자 (EMBEDDING_PROVIDER=local이면 같은 제공자로 업서트한 인덱스 필요)
+embedder = create_embedding_provider(client)
+
+# OpenAI 장애 중 FAQ에서도 비슷한 질문을 찾지 못했을 때의 응답
+FALLBACK_ANSWER = "지금은 답변을 생성할 수 없습니다. 잠시 후 다시 질문해주세요."
 
 
 # -----------------------------
 # 2. 모델 설정
 # -----------------------------
-EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 
 # -----------------------------
 # 3. 텍스트 임베딩 함수
 # -----------------------------
 def embed_text(text: str):
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text
-    )
-    return response.data[0].embedding
+    return embedder.embed_text(text)
 
 
 # -----------------------------
@@ -53,7 +63,7 @@ def search_similar_chunks(query: str, top_k: int = 3, professor_id: str = None):
     query_params = {
         "vector": query_vector,
         "top_k": top_k,
-        "include_metadata": True
+        "include_metadata": False  # 텍스트는 로컬 코퍼스에서 chunk_id로 조회
     }
     
     # professor_id 필터 추가
@@ -62,7 +72,7 @@ def search_similar_chunks(query: str, top_k: int = 3, professor_id: str = None):
     
     results = index.query(**query_params)
     
-    return results.matches
+    return resolve_matches(results.matches)
 
 
 # -----------------------------
@@ -72,18 +82,15 @@ def format_context(matches):
     context_parts = []
     
     for match in matches:
-        metadata = match.metadata
-        score = match.score
-        
-        if metadata.get("type") == "qa":
+        if match.get("type") == "qa":
             # Q&A 타입인 경우
-            question = metadata.get("question", "")
-            answer = metadata.get("answer", "")
+            question = match.get("question", "")
+            answer = match.get("answer", "")
             context_parts.append(f"질문: {question}\n답변: {answer}")
         else:
             # 프로필 타입인 경우
-            title = metadata.get("title", "")
-            text = metadata.get("text", "")
+            title = match.get("title", "")
+            text = match.get("text", "")
             context_parts.append(f"[{title}]\n{text}")
     
     return "\n\n".join(context_parts)
@@ -112,7 +119,9 @@ def get_professor_name(professor_id: str) -> str:
 # -----------------------------
 # 6. RAG 기반 답변 생성
 # -----------------------------
-def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None):
+def _generate_rag_answer(user_question: str, top_k: int = 3, professor_id: str = None):
+    # 요청 마감 시각(deadline_scope)이 있으면 각 단계 시작 전에 확인하고,
+    # 임베딩 / LLM 호출은 남은 시간을 타임아웃으로 사용
     # 1. 교수님 이름 조회
     professor_name = get_professor_name(professor_id) if professor_id else None
     
@@ -122,6 +131,7 @@ def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None
     # 3. 유사한 벡터 검색 (professor_id로 필터링)
     # 자기소개 관련 질문은 더 많은 결과를 검색하여 프로필 정보도 포함
     search_k = max(top_k * 3, 10) if is_intro_question else top_k
+    check_deadline("관련 정보 검색")
     matches = search_similar_chunks(user_question, top_k=search_k, professor_id=professor_id)
     
     if not matches:
@@ -129,19 +139,19 @@ def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None
     
     # 4. 컨텍스트 구성 (프로필 정보를 우선적으로 포함)
     # 프로필 정보와 Q&A를 분리
-    profile_matches = [m for m in matches if m.metadata.get("type") == "profile"]
-    qa_matches = [m for m in matches if m.metadata.get("type") == "qa"]
+    profile_matches = [m for m in matches if m.get("type") == "profile"]
+    qa_matches = [m for m in matches if m.get("type") == "qa"]
     
     # 자기소개 질문인 경우 프로필 정보를 강제로 포함
     if is_intro_question and professor_id:
         # 프로필 정보를 별도로 검색하여 추가
         profile_query = f"{professor_name if professor_name else '교수님'} 소개 경력 학력"
         profile_search_results = search_similar_chunks(profile_query, top_k=5, professor_id=professor_id)
-        additional_profiles = [m for m in profile_search_results if m.metadata.get("type") == "profile"]
+        additional_profiles = [m for m in profile_search_results if m.get("type") == "profile"]
         # 중복 제거
-        existing_chunk_ids = {m.metadata.get("chunk_id") for m in profile_matches}
+        existing_chunk_ids = {m.get("chunk_id") for m in profile_matches}
         for m in additional_profiles:
-            if m.metadata.get("chunk_id") not in existing_chunk_ids:
+            if m.get("chunk_id") not in existing_chunk_ids:
                 profile_matches.append(m)
     
     # 자기소개 질문인 경우 프로필 정보를 우선적으로 포함
@@ -177,6 +187,7 @@ def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None
 - 교수님의 실제 답변 스타일을 참고하여 자연스럽게 답변해주세요"""
 
     # 4. LLM으로 답변 생성
+    check_deadline("답변 생성")
     response = client.chat.completions.create(
         model=CHAT_MODEL,
         messages=[
@@ -192,15 +203,32 @@ def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None
     # 5. 참고한 정보도 함께 반환
     references = []
     for match in matches:
-        metadata = match.metadata
-        if metadata.get("type") == "qa":
-            references.append(f"- {metadata.get('question', '')}")
+        if match.get("type") == "qa":
+            references.append(f"- {match.get('question', '')}")
         else:
-            references.append(f"- {metadata.get('title', '')}")
+            references.append(f"- {match.get('title', '')}")
     
     return answer, references
 
 
+def generate_answer(user_question: str, top_k: int = 3, professor_id: str = None):
+    """
+    질문에 대한 답변과 참고 정보
+
+    OpenAI 서킷이 열려 있거나 호출 중 OpenAI 장애가 나면 가장 비슷한 교수님 Q&A의 실제 답변으로 대신 응답합니다.
+    """
+    if not openai_breaker.is_open():
+        try:
+            return _generate_rag_answer(user_question, top_k, professor_id)
+        except OPENAI_UNAVAILABLE as e:
+            print(f"OpenAI 장애로 FAQ 응답 사용: {e}")
+
+    fallback = faq_answer(user_question, professor_id)
+    if fallback is None:
+        return FALLBACK_ANSWER, []
+    return fallback
+
+
 # -----------------------------
 # 6. 대화 루프
 # -----------------------------
@@ -0,0 +1,94 @@
+"""
+채팅 품질 평가 결과 저장 / 재사용
+- calculate_chat_based_score(LLM 호출) 결과를 세션별로 저장
+- 평가 시점의 메시지 수 / 마지막 메시지 ID / 지원자 정보가 그대로면 저장된 결과 반환
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from database import ChatEvaluation, insert_ignore_conflict
+from matching import calculate_chat_based_score, CHAT_MODEL
+
+
+def evaluation_context_hash(applicant_data: Dict, professor_id: str) -> str:
+    """평가 결과에 영향을 주는 입력(지원자 정보, 교수님, 평가 모델) 해시"""
+    context = {
+        "interest_keyword": applicant_data.get("interest_keyword", ""),
+        "learning_styles": list(applicant_data.get("learning_styles", [])),
+        "professor_id": professor_id,
+        "model": CHAT_MODEL
+    }
+    return hashlib.sha256(json.dumps(context, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_chat_evaluation(
+    db: Session,
+    session_id: int,
+    chat_messages: List[Dict],
+    last_message_id: Optional[int],
+    applicant_data: Dict,
+    professor_id: str
+) -> Dict:
+    """
+    세션의 채팅 기반 점수 조회 (변경이 없으면 저장된 결과, 있으면 새로 평가 후 저장)
+
+    Returns:
+        calculate_chat_based_score와 같은 형식 (저장된 결과 사용 시 "cached": True)
+    """
+    context_hash = evaluation_context_hash(applicant_data, professor_id)
+
+    stored = db.query(ChatEvaluation).filter(ChatEvaluation.session_id == session_id).first()
+    if (
+        stored is not None
+        and stored.message_count == len(chat_messages)
+        and stored.last_message_id == last_message_id
+        and stored.context_hash == context_hash
+    ):
+        return {**json.loads(stored.result_json), "cached": True}
+
+    result = calculate_chat_based_score(
+        chat_messages=chat_messages,
+        applicant_data=applicant_data,
+        professor_id=professor_id
+    )
+
+    # LLM 평가 실패 시의 대체 점수는 저장하지 않음 (다음 요청에서 다시 평가)
+    if not result.get("fallback"):
+        save_chat_evaluation(db, session_id, len(chat_messages), last_message_id, context_hash, result)
+
+    return result
+
+
+def save_chat_evaluation(
+    db: Session,
+    session_id: int,
+    message_count: int,
+    last_message_id: Optional[int],
+    context_hash: str,
+    result: Dict
+):
+    """세션의 평가 결과 저장 (세션당 1건, 동시 저장 시 마지막 결과 유지)"""
+    values = {
+        "message_count": message_count,
+        "last_message_id": last_message_id,
+        "context_hash": context_hash,
+        "result_json": json.dumps(result, ensure_ascii=False),
+        "created_at": datetime.utcnow()
+    }
+    try:
+        inserted = db.execute(insert_ignore_conflict(
+            ChatEvaluation,
+            {"session_id": session_id, **values},
+            conflict_columns=["session_id"]
+        ))
+        if inserted.rowcount == 0:
+            db.query(ChatEvaluation).filter(
+                ChatEvaluation.session_id == session_id
+            ).update(values, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        # 저장 실패해도 평가 결과는 그대로 사용
+        db.rollback()
+        print(f"채팅 평가 결과 저장 중 오류: {e}")
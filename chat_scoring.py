@@ -0,0 +1,144 @@
+"""
+턴 단위 채팅 품질 평가 (백그라운드)
+- /chat 응답 후 최신 질문/답변 한 쌍만 평가하여 세션의 항목별 누적값에 더함
+- 최종 리포트는 누적값을 조합하여 채팅 점수를 바로 계산 (대화 전체 재평가 불필요)
+- 평가되지 않은 턴이 있으면 (실패, 기능 도입 전 대화 등) 기존 전체 평가로 대체
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from database import SessionLocal, ChatSession, Applicant
+from matching import evaluate_chat_turn, combine_turn_scores
+from openai_governor import NEAR_LINE, llm_priority
+
+# 환경 변수 로드
+load_dotenv()
+
+# incremental: 턴별 백그라운드 평가 + 누적값 조합, full: 리포트 시 대화 전체 평가만 사용
+CHAT_SCORING_MODE = os.getenv("CHAT_SCORING_MODE", "incremental")
+CHAT_SCORING_WORKERS = int(os.getenv("CHAT_SCORING_WORKERS", "2"))
+
+# 누적값 컬럼 (평가 항목 → ChatSession 컬럼)
+SUM_COLUMNS = {
+    "depth_quality": ChatSession.depth_quality_sum,
+    "answer_quality": ChatSession.answer_quality_sum,
+    "engagement": ChatSession.engagement_sum,
+    "relevance": ChatSession.relevance_sum
+}
+
+
+class ChatTurnScorer:
+    """채팅 턴을 백그라운드 스레드에서 평가하고 세션 누적값을 갱신"""
+
+    def __init__(self, max_workers: int = CHAT_SCORING_WORKERS, session_factory=SessionLocal):
+        self.max_workers = max(1, max_workers)
+        self.session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cond = threading.Condition()
+        self._in_flight: Dict[int, int] = {}  # 세션별 평가 중인 턴 수
+        self.stats = {"submitted": 0, "scored": 0, "failures": 0}
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chat-turn-scorer")
+
+    def stop(self):
+        """종료 (대기 중인 평가는 버림, 해당 세션은 리포트 시 전체 평가로 대체)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, session_id: int, applicant_id: int, question: str, answer: str):
+        """질문/답변 한 쌍 평가 예약 (바로 반환)"""
+        if CHAT_SCORING_MODE != "incremental" or self._executor is None:
+            return
+        with self._cond:
+            self._in_flight[session_id] = self._in_flight.get(session_id, 0) + 1
+            self.stats["submitted"] += 1
+        try:
+            self._executor.submit(self._score_turn, session_id, applicant_id, question, answer)
+        except RuntimeError:
+            # 종료 중
+            self._done(session_id)
+
+    def wait_for_session(self, session_id: int, timeout: float) -> bool:
+        """세션의 평가 중인 턴이 끝날 때까지 대기 (리포트 직전 호출)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight.get(session_id):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _done(self, session_id: int):
+        with self._cond:
+            remaining = self._in_flight.get(session_id, 1) - 1
+            if remaining > 0:
+                self._in_flight[session_id] = remaining
+            else:
+                self._in_flight.pop(session_id, None)
+            self._cond.notify_all()
+
+    def _score_turn(self, session_id: int, applicant_id: int, question: str, answer: str):
+        db = self.session_factory()
+        try:
+            applicant = db.query(Applicant).filter(Applicant.id == applicant_id).first()
+            if applicant is None:
+                return
+            applicant_data = {
+                "interest_keyword": applicant.interest_keyword,
+                "learning_styles": [s.strip() for s in applicant.learning_styles.split(",")]
+            }
+
+            # 응답이 이미 나간 뒤의 작업이므로 interactive 요청보다 뒤에 실행
+            with llm_priority(NEAR_LINE):
+                scores = evaluate_chat_turn(question, answer, applicant_data)
+
+            # 누적값은 SQL 증가 연산으로 갱신 (동시에 여러 턴이 평가되어도 유실 없음)
+            values = {ChatSession.scored_turns: ChatSession.scored_turns + 1}
+            for criterion, column in SUM_COLUMNS.items():
+                values[column] = column + scores[criterion]
+            db.query(ChatSession).filter(ChatSession.id == session_id).update(values, synchronize_session=False)
+            db.commit()
+            self.stats["scored"] += 1
+        except Exception as e:
+            db.rollback()
+            self.stats["failures"] += 1
+            print(f"채팅 턴 평가 중 오류 (세션 {session_id}): {e}")
+        finally:
+            db.close()
+            self._done(session_id)
+
+
+def get_incremental_chat_score(db: Session, session_id: int) -> Optional[Dict]:
+    """
+    누적된 턴별 평가로 채팅 점수 계산
+
+    Returns:
+        calculate_chat_based_score와 같은 형식, 평가되지 않은 턴이 있으면 None
+    """
+    if CHAT_SCORING_MODE != "incremental":
+        return None
+
+    session = db.query(ChatSession).filter(ChatSession.id == session_id).populate_existing().first()
+    if session is None:
+        return None
+
+    turn_count = session.message_count // 2
+    if turn_count == 0 or session.scored_turns < turn_count:
+        return None
+
+    return combine_turn_scores(
+        session.scored_turns,
+        {criterion: getattr(session, column.key) for criterion, column in SUM_COLUMNS.items()}
+    )
+
+
+# 프로세스 전역 scorer (api.py 시작/종료 시 start/stop)
+chat_turn_scorer = ChatTurnScorer()
@@ -0,0 +1,443 @@
+"""
+채팅 메시지 write-behind 저장소
+- /chat은 답변이 생성되면 메시지 쌍을 큐에 넣고 바로 응답
+- 백그라운드 스레드가 배치 크기 또는 flush 간격 조건으로 배치 트랜잭션 저장
+- 내구성: 종료 시 동기 flush + 로컬 저널(JSONL)로 크래시 복구
+  (저널은 배치마다 새 segment로 넘기고, 레코드가 모두 저장된 segment는 삭제)
+- 배치 저장 실패 시 배치를 나눠 정상 레코드는 저장하고, 혼자서도 계속 실패하는 레코드는
+  CHAT_WRITE_MAX_ATTEMPTS회 후 dead-letter 파일로 옮김 (한 레코드가 뒤의 모든 메시지를 막지 않도록)
+"""
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, or_
+from sqlalchemy.exc import OperationalError, InterfaceError, DisconnectionError
+from dotenv import load_dotenv
+from database import SessionLocal, ChatSession, ChatMessage
+
+# 환경 변수 로드
+load_dotenv()
+
+# 저장 모드
+# - sync: 요청 안에서 바로 저장 (기존 방식)
+# - memory: 인메모리 큐만 사용 (종료 시 flush, 크래시 시 미저장분 유실)
+# - journal: 큐 + 로컬 저널 (크래시 후 재시작 시 저널 재생)
+CHAT_WRITE_MODE = os.getenv("CHAT_WRITE_MODE", "journal")
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "50"))  # 메시지 쌍 개수
+CHAT_WRITE_FLUSH_INTERVAL_MS = int(os.getenv("CHAT_WRITE_FLUSH_INTERVAL_MS", "200"))
+CHAT_WRITE_JOURNAL_DIR = os.getenv("CHAT_WRITE_JOURNAL_DIR", "./chat_journal")
+CHAT_WRITE_JOURNAL_FSYNC = os.getenv("CHAT_WRITE_JOURNAL_FSYNC", "true").lower() == "true"
+# 레코드 단독 저장 실패 허용 횟수 (초과 시 dead-letter 파일로 이동)
+CHAT_WRITE_MAX_ATTEMPTS = int(os.getenv("CHAT_WRITE_MAX_ATTEMPTS", "3"))
+
+JOURNAL_PREFIX = "chat_messages"
+DEAD_LETTER_FILE = f"{JOURNAL_PREFIX}_dead.jsonl"  # 저널 재생 대상(chat_messages.<pid>.<seq>.jsonl)과 이름이 겹치지 않음
+
+# DB 연결 / 잠금 오류: 레코드 문제가 아니므로 배치를 나누지 않고 시도 횟수도 세지 않고 재시도
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError, DisconnectionError)
+
+
+def _pid_alive(pid: int) -> bool:
+    """프로세스 생존 여부 (다른 워커의 저널인지 판단)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ChatMessageWriter:
+    """채팅 메시지 쌍(질문/답변)을 모아 배치로 저장하는 write-behind 큐"""
+
+    def __init__(
+        self,
+        mode: str = CHAT_WRITE_MODE,
+        batch_size: int = CHAT_WRITE_BATCH_SIZE,
+        flush_interval_ms: int = CHAT_WRITE_FLUSH_INTERVAL_MS,
+        journal_dir: str = CHAT_WRITE_JOURNAL_DIR,
+        journal_fsync: bool = CHAT_WRITE_JOURNAL_FSYNC,
+        max_attempts: int = CHAT_WRITE_MAX_ATTEMPTS,
+        session_factory=SessionLocal
+    ):
+        if mode not in ("sync", "memory", "journal"):
+            raise ValueError(f"지원하지 않는 CHAT_WRITE_MODE입니다: {mode}")
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.journal_dir = journal_dir
+        self.journal_fsync = journal_fsync
+        self.max_attempts = max(1, max_attempts)
+        self.session_factory = session_factory
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Dict] = {}  # 저장 대기 중인 레코드 (id → record, 입력 순서 유지)
+        self._in_flight = 0  # 현재 저장 중인 레코드 수
+        self._attempts: Dict[str, int] = {}  # 레코드 id → 단독 저장 실패 횟수
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._journal_path: Optional[str] = None  # 지금 기록 중인 저널 segment
+        self._journal_file = None
+        self._segment_seq = 0
+        self._segments: Dict[str, set] = {}  # segment 경로 → 아직 저장되지 않은 레코드 id
+        self._record_segments: Dict[str, str] = {}  # 레코드 id → segment 경로
+        self.stats = {
+            "submitted": 0, "written": 0, "batches": 0, "failures": 0, "replayed": 0, "dropped": 0, "dead_lettered": 0
+        }
+
+    # -----------------------------
+    # 1. 시작 / 종료
+    # -----------------------------
+    def start(self):
+        """백그라운드 flush 스레드 시작 (journal 모드는 이전 저널 먼저 재생)"""
+        if self.mode == "sync" or self._thread is not None:
+            return
+
+        if self.mode == "journal":
+            os.makedirs(self.journal_dir, exist_ok=True)
+            claimed_paths = self.replay_journals()
+            with self._cond:
+                self._open_segment()
+                # 재생 중 저장하지 못한 레코드는 새 segment에 옮겨 적은 뒤 이전 저널 삭제
+                if self._pending:
+                    self._append_journal(list(self._pending.values()))
+            for path in claimed_paths:
+                os.remove(path)
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="chat-message-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = 30.0):
+        """종료: 남은 메시지를 동기 flush 후 스레드 종료"""
+        if self._thread is None:
+            return
+        if flush:
+            self.flush(timeout=timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+            # 모두 저장되었으면 저널 삭제 (남은 레코드가 있는 segment는 다음 시작 시 재생)
+            if not self._pending:
+                for path in self._segments:
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._segments.clear()
+                self._record_segments.clear()
+            self._journal_path = None
+
+    # -----------------------------
+    # 2. 메시지 제출 / flush
+    # -----------------------------
+    def submit(
+        self,
+        session_id: int,
+        question: str,
+        answer: str,
+        asked_at: Optional[datetime] = None,
+        answered_at: Optional[datetime] = None
+    ):
+        """질문/답변 메시지 쌍 저장 요청"""
+        answered_at = answered_at or datetime.utcnow()
+        record = {
+            "id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "question": question,
+            "answer": answer,
+            "asked_at": (asked_at or answered_at).isoformat(),
+            "answered_at": answered_at.isoformat()
+        }
+
+        if self.mode == "sync" or self._thread is None:
+            # 동기 모드 (또는 writer 미시작): 바로 저장
+            self._write_batch([record])
+            return
+
+        with self._cond:
+            if self._journal_file is not None:
+                self._append_journal([record])
+            self._pending[record["id"]] = record
+            self.stats["submitted"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """대기 중인 메시지를 모두 저장할 때까지 대기 (읽기 전 일관성 필요 시 사용)"""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else self.flush_interval)
+                self._cond.notify_all()
+        return True
+
+    # -----------------------------
+    # 3. 백그라운드 flush 루프
+    # -----------------------------
+    def _run(self):
+        retry_delay = self.flush_interval
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping and not self._pending:
+                    return
+                batch = list(self._pending.values())[:self.batch_size]
+                self._in_flight = len(batch)
+                if batch:
+                    # 이후 제출은 새 segment에 기록 (저장이 끝난 segment는 통째로 삭제)
+                    self._rotate_segment()
+
+            if not batch:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+                continue
+
+            try:
+                done = self._write_or_isolate(batch)
+                with self._cond:
+                    for record in done:
+                        self._pending.pop(record["id"], None)
+                        self._attempts.pop(record["id"], None)
+                    self._release_segments(done)
+                if len(done) == len(batch):
+                    retry_delay = self.flush_interval
+                else:
+                    # 남은 레코드는 큐에 두고 재시도 (최대 5초 간격)
+                    time.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, 5.0)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _write_or_isolate(self, batch: List[Dict]) -> List[Dict]:
+        """
+        배치 저장, 실패하면 반씩 나눠 다시 저장해 문제 레코드만 골라냄
+
+        Returns:
+            큐에서 제거할 레코드 (저장 완료 + dead-letter로 이동)
+        """
+        done: List[Dict] = []
+        try:
+            self._write_parts(batch, done)
+        except TRANSIENT_DB_ERRORS as e:
+            # DB 연결 / 잠금 문제: 나머지는 그대로 두고 재시도
+            self.stats["failures"] += 1
+            print(f"채팅 메시지 배치 저장 중 오류 (재시도): {e}")
+        return done
+
+    def _write_parts(self, records: List[Dict], done: List[Dict]):
+        try:
+            self._write_batch(records)
+            done.extend(records)
+            return
+        except TRANSIENT_DB_ERRORS:
+            raise
+        except Exception as e:
+            self.stats["failures"] += 1
+            if len(records) == 1:
+                if self._record_failure(records[0], e):
+                    done.append(records[0])
+                return
+        mid = len(records) // 2
+        self._write_parts(records[:mid], done)
+        self._write_parts(records[mid:], done)
+
+    def _record_failure(self, record: Dict, error: Exception) -> bool:
+        """단독 저장 실패 기록, 허용 횟수를 넘으면 dead-letter 파일로 옮기고 True"""
+        attempts = self._attempts.get(record["id"], 0) + 1
+        self._attempts[record["id"]] = attempts
+        print(f"채팅 메시지 저장 실패 ({attempts}/{self.max_attempts}, session_id={record['session_id']}): {error}")
+        if attempts < self.max_attempts:
+            return False
+
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(os.path.join(self.journal_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                **record,
+                "error": f"{type(error).__name__}: {error}"[:1000],
+                "attempts": attempts,
+                "failed_at": datetime.utcnow().isoformat()
+            }, ensure_ascii=False) + "\n")
+        self.stats["dead_lettered"] += 1
+        print(f"채팅 메시지를 dead-letter로 이동: {os.path.join(self.journal_dir, DEAD_LETTER_FILE)}")
+        return True
+
+    def snapshot(self) -> Dict:
+        """모드 / 대기 레코드 수 / 누적 통계"""
+        with self._cond:
+            return {"mode": self.mode, "pending": len(self._pending), "in_flight": self._in_flight, **self.stats}
+
+    def _write_batch(self, records: List[Dict]):
+        """메시지 쌍 배치를 하나의 트랜잭션으로 저장 (세션 카운터 함께 갱신)"""
+        db = self.session_factory()
+        try:
+            session_ids = {record["session_id"] for record in records}
+            existing_ids = {
+                session_id
+                for (session_id,) in db.query(ChatSession.id).filter(ChatSession.id.in_(session_ids)).all()
+            }
+
+            messages = []
+            counts: Dict[int, int] = {}
+            latest: Dict[int, datetime] = {}
+            for record in records:
+                session_id = record["session_id"]
+                if session_id not in existing_ids:
+                    # 삭제된 세션의 메시지는 버림
+                    self.stats["dropped"] += 1
+                    continue
+                asked_at = datetime.fromisoformat(record["asked_at"])
+                answered_at = datetime.fromisoformat(record["answered_at"])
+                messages.append(ChatMessage(
+                    session_id=session_id, role="user", content=record["question"], timestamp=asked_at
+                ))
+                messages.append(ChatMessage(
+                    session_id=session_id, role="professor", content=record["answer"], timestamp=answered_at
+                ))
+                counts[session_id] = counts.get(session_id, 0) + 2
+                latest[session_id] = max(latest.get(session_id, answered_at), answered_at)
+
+            db.add_all(messages)
+
+            # 세션 카운터는 SQL 증가 연산으로 갱신 (여러 워커가 동시에 저장해도 유실 없음)
+            for session_id, count in counts.items():
+                last_at = latest[session_id]
+                newer = or_(ChatSession.last_message_at.is_(None), ChatSession.last_message_at < last_at)
+                db.query(ChatSession).filter(ChatSession.id == session_id).update({
+                    ChatSession.message_count: ChatSession.message_count + count,
+                    ChatSession.last_message_at: case((newer, last_at), else_=ChatSession.last_message_at),
+                    ChatSession.updated_at: case((newer, last_at), else_=ChatSession.updated_at)
+                }, synchronize_session=False)
+
+            db.commit()
+            self.stats["written"] += len(messages) // 2
+            self.stats["batches"] += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # -----------------------------
+    # 4. 저널 관리
+    # -----------------------------
+    def _open_segment(self):
+        """새 저널 segment 시작 (호출 시 _cond 보유)"""
+        self._segment_seq += 1
+        self._journal_path = os.path.join(
+            self.journal_dir, f"{JOURNAL_PREFIX}.{os.getpid()}.{self._segment_seq}.jsonl"
+        )
+        self._journal_file = open(self._journal_path, "a", encoding="utf-8")
+        self._segments[self._journal_path] = set()
+
+    def _append_journal(self, records: List[Dict]):
+        """현재 segment 끝에 레코드 추가 (호출 시 _cond 보유)"""
+        ids = self._segments[self._journal_path]
+        for record in records:
+            self._journal_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            ids.add(record["id"])
+            self._record_segments[record["id"]] = self._journal_path
+        self._journal_file.flush()
+        if self.journal_fsync:
+            os.fsync(self._journal_file.fileno())
+
+    def _rotate_segment(self):
+        """현재 segment를 닫고 새 segment 시작, 기록된 레코드가 없으면 그대로 사용 (호출 시 _cond 보유)"""
+        if self._journal_file is None or not self._segments[self._journal_path]:
+            return
+        self._journal_file.close()
+        self._open_segment()
+
+    def _release_segments(self, records: List[Dict]):
+        """저장 완료(또는 dead-letter)된 레코드를 segment에서 지우고, 비워진 닫힌 segment는 삭제 (호출 시 _cond 보유)"""
+        for record in records:
+            path = self._record_segments.pop(record["id"], None)
+            if path is None:
+                continue
+            ids = self._segments[path]
+            ids.discard(record["id"])
+            if not ids and path != self._journal_path:
+                del self._segments[path]
+                os.remove(path)
+
+    def replay_journals(self) -> List[str]:
+        """
+        종료된 워커가 남긴 저널을 읽어 저장 (DB 커밋 직후 크래시 시 중복 저장될 수 있음)
+
+        저장하지 못한 레코드는 큐에 남기고, 그 레코드가 있던 저널 경로를 반환합니다
+        (새 저널 segment에 옮겨 적은 뒤 호출한 쪽에서 삭제).
+        """
+        kept_paths = []
+        journal_paths = glob.glob(os.path.join(self.journal_dir, f"{JOURNAL_PREFIX}.*.jsonl"))
+        # 재생 도중 종료된 워커가 선점해 둔 저널 (<저널>.replay.<선점한 pid>)
+        journal_paths += glob.glob(os.path.join(self.journal_dir, f"{JOURNAL_PREFIX}.*.jsonl.replay.*"))
+        for source_path in journal_paths:
+            # 원래 저널 경로와 그 저널을 가진 워커 pid (선점된 저널은 선점한 워커 pid)
+            path, _, owner = source_path.partition(".replay.")
+            try:
+                owner_pid = int(owner or os.path.basename(path).split(".")[1])
+            except (IndexError, ValueError):
+                continue
+            # 저널을 쓰거나 재생 중인 워커가 살아 있으면 건너뜀 (같은 pid는 재시작 전 프로세스)
+            if owner_pid != os.getpid() and _pid_alive(owner_pid):
+                continue
+
+            # 다른 워커와 동시에 재생하지 않도록 파일 이름 변경으로 선점
+            claimed_path = f"{path}.replay.{os.getpid()}"
+            try:
+                os.rename(source_path, claimed_path)
+            except OSError:
+                continue
+
+            records = []
+            with open(claimed_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 크래시로 마지막 줄이 잘린 경우
+                        continue
+
+            leftover = 0
+            for i in range(0, len(records), self.batch_size):
+                batch = records[i:i + self.batch_size]
+                done_ids = {record["id"] for record in self._write_or_isolate(batch)}
+                for record in batch:
+                    if record["id"] not in done_ids:
+                        self._pending[record["id"]] = record
+                        leftover += 1
+            self.stats["replayed"] += len(records)
+            if leftover:
+                kept_paths.append(claimed_path)
+            else:
+                os.remove(claimed_path)
+            if records:
+                print(f"채팅 저널 재생: {os.path.basename(path)} ({len(records)}건, 재시도 대기 {leftover}건)")
+        return kept_paths
+
+
+# 프로세스 전역 writer (api.py 시작/종료 시 start/stop)
+chat_message_writer = ChatMessageWriter()
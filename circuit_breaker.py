@@ -0,0 +1,160 @@
+"""
+OpenAI 서킷 브레이커
+- 최근 호출 중 실패(타임아웃 / 연결 오류 / 5xx) 또는 느린 호출 비율이 임계값을 넘으면 열림(open)
+- 열려 있는 동안 호출은 바로 CircuitOpenError (호출한 쪽은 로컬 엔진으로 대체)
+- 일정 시간 후 반열림(half-open): 소수의 시험 호출이 연속 성공하면 닫힘, 실패하면 다시 열림
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+OPENAI_CIRCUIT_ENABLED = os.getenv("OPENAI_CIRCUIT_ENABLED", "true").lower() == "true"
+OPENAI_CIRCUIT_WINDOW = int(os.getenv("OPENAI_CIRCUIT_WINDOW", "20"))  # 실패율 계산에 쓰는 최근 호출 수
+OPENAI_CIRCUIT_MIN_CALLS = int(os.getenv("OPENAI_CIRCUIT_MIN_CALLS", "5"))
+OPENAI_CIRCUIT_FAILURE_RATE = float(os.getenv("OPENAI_CIRCUIT_FAILURE_RATE", "0.5"))
+OPENAI_CIRCUIT_SLOW_CALL_MS = float(os.getenv("OPENAI_CIRCUIT_SLOW_CALL_MS", "20000"))  # 이보다 느린 호출은 실패로 집계
+OPENAI_CIRCUIT_OPEN_SECONDS = float(os.getenv("OPENAI_CIRCUIT_OPEN_SECONDS", "30"))
+OPENAI_CIRCUIT_HALF_OPEN_SUCCESSES = int(os.getenv("OPENAI_CIRCUIT_HALF_OPEN_SUCCESSES", "2"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 있어 업스트림 호출을 하지 않은 경우"""
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} 서킷이 열려 있어 호출하지 않았습니다.")
+
+
+class CircuitBreaker:
+    """실패율 / 지연 기반 서킷 브레이커 (반열림 상태에서는 시험 호출을 한 번에 하나만 허용)"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = OPENAI_CIRCUIT_WINDOW,
+        min_calls: int = OPENAI_CIRCUIT_MIN_CALLS,
+        failure_rate: float = OPENAI_CIRCUIT_FAILURE_RATE,
+        slow_call_ms: float = OPENAI_CIRCUIT_SLOW_CALL_MS,
+        open_seconds: float = OPENAI_CIRCUIT_OPEN_SECONDS,
+        half_open_successes: int = OPENAI_CIRCUIT_HALF_OPEN_SUCCESSES,
+        enabled: bool = OPENAI_CIRCUIT_ENABLED
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.half_open_successes = half_open_successes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True = 실패 또는 느린 호출
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_successes = 0
+        self.stats = {"opened": 0, "rejected": 0, "failures": 0, "slow_calls": 0}
+
+    # -----------------------------
+    # 1. 호출 허용 여부
+    # -----------------------------
+    def _refresh(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            self._probe_successes = 0
+
+    def is_open(self) -> bool:
+        """지금 호출하면 거절되는 상태인지 (호출 전에 로컬 엔진으로 바로 전환할 때 사용)"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state == OPEN or (self._state == HALF_OPEN and self._probe_in_flight)
+
+    def before_call(self):
+        """호출 직전 확인 (거절 시 CircuitOpenError, 반열림이면 이 호출이 시험 호출)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == OPEN or (self._state == HALF_OPEN and self._probe_in_flight):
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name)
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = True
+
+    # -----------------------------
+    # 2. 호출 결과 기록
+    # -----------------------------
+    def on_success(self, latency_ms: float):
+        if latency_ms >= self.slow_call_ms:
+            with self._lock:
+                self.stats["slow_calls"] += 1
+            self._record(failed=True)
+        else:
+            self._record(failed=False)
+
+    def on_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+        self._record(failed=True)
+
+    def on_ignored(self):
+        """업스트림 상태와 무관한 결과 (4xx, 429 등): 집계하지 않고 시험 호출 자리만 반납"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _record(self, failed: bool):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_successes:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                        print(f"[서킷] {self.name} 복구 (closed)")
+                return
+            if self._state == OPEN:
+                # 열리기 전에 시작된 호출의 결과
+                return
+
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.stats["opened"] += 1
+        print(f"[서킷] {self.name} 열림 (open), {self.open_seconds:.0f}초 후 시험 호출")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._refresh(time.monotonic())
+            calls = len(self._outcomes)
+            return {
+                "enabled": self.enabled,
+                "state": self._state,
+                "failure_rate": round(sum(self._outcomes) / calls, 4) if calls else 0.0,
+                "window_calls": calls,
+                **self.stats
+            }
+
+
+# 프로세스 전역 OpenAI 서킷 (모든 OpenAI 호출이 공유)
+openai_breaker = CircuitBreaker("OpenAI")
@@ -0,0 +1,92 @@
+"""
+교수님 데이터 코퍼스 (professor_data.json) 로더
+- 벡터 인덱스에는 ID와 필터 필드만 저장하고, 텍스트는 여기서 chunk_id로 조회
+"""
+import json
+import os
+import threading
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+CORPUS_PATH = os.getenv("PROFESSOR_DATA_PATH", "professor_data.json")
+
+# 벡터 메타데이터에 남기는 필드 (Pinecone 필터용)
+FILTER_FIELDS = ("professor_id", "chunk_id", "type", "indicator")
+
+_lock = threading.Lock()
+_corpus: List[Dict] = []
+_by_chunk_id: Dict[str, Dict] = {}
+_loaded_key: Optional[tuple] = None  # (경로, 수정 시각)
+
+
+# -----------------------------
+# 1. 코퍼스 로드 (파일 변경 시 자동 재로드)
+# -----------------------------
+def _ensure_loaded():
+    global _corpus, _by_chunk_id, _loaded_key
+
+    # CORPUS_PATH를 바꾸면(벤치마크의 합성 코퍼스 등) 다른 파일로 다시 로드
+    key = (CORPUS_PATH, os.path.getmtime(CORPUS_PATH))
+    if _loaded_key == key:
+        return
+
+    with _lock:
+        if _loaded_key == key:
+            return
+        with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _by_chunk_id = {item["chunk_id"]: item for item in data}
+        _corpus = data
+        _loaded_key = key
+
+
+def load_corpus() -> List[Dict]:
+    """전체 코퍼스 반환 (인메모리 캐시)"""
+    _ensure_loaded()
+    return _corpus
+
+
+def get_chunk(chunk_id: str) -> Optional[Dict]:
+    """chunk_id로 코퍼스 항목 조회"""
+    _ensure_loaded()
+    return _by_chunk_id.get(chunk_id)
+
+
+# -----------------------------
+# 2. 청크 텍스트 / 메타데이터 구성
+# -----------------------------
+def chunk_text(item: Dict) -> str:
+    """임베딩 및 컨텍스트에 사용하는 청크 텍스트"""
+    # Q&A 타입인 경우 question과 answer를 함께 사용
+    if item.get("type") == "qa" and "question" in item and "answer" in item:
+        return f"질문: {item['question']}\n답변: {item['answer']}"
+    return item["content"]
+
+
+def filter_metadata(item: Dict) -> Dict:
+    """벡터에 저장할 메타데이터 (ID와 필터 필드만)"""
+    return {field: item[field] for field in FILTER_FIELDS if item.get(field)}
+
+
+# -----------------------------
+# 3. 검색 결과를 코퍼스 항목으로 변환
+# -----------------------------
+def resolve_matches(matches) -> List[Dict]:
+    """
+    벡터 검색 결과(id, score)를 코퍼스 항목으로 변환
+
+    코퍼스에 없는 chunk_id(인덱스에만 남은 항목)는 제외합니다.
+
+    Returns:
+        [{"chunk_id", "professor_id", "type", ..., "text", "score"}]
+    """
+    resolved = []
+    for match in matches:
+        item = get_chunk(match.id)
+        if item is None:
+            continue
+        resolved.append({**item, "text": chunk_text(item), "score": match.score})
+    return resolved
@@ -1,24 +1,108 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import create_engine, event, func, inspect, text, Column, Integer, String, Text, ForeignKey, DateTime, Index
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from typing import Generator
+from typing import Generator, AsyncGenerator, List
 from datetime import datetime
 import os
+import time
 from dotenv import load_dotenv
 
 # 환경 변수 로드
 load_dotenv()
 
-# SQLite 데이터베이스 설정
+# 데이터베이스 설정 (기본: SQLite, DATABASE_URL로 PostgreSQL 등 지정 가능)
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_adviser.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL in ("sqlite://", "sqlite:///"))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite용
-)
+# 커넥션 풀 설정 (워커 프로세스당)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # 초
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 초
+
+# SQLite 성능 설정 (여러 Gunicorn 워커의 동시 쓰기 대비)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # 쓰기 잠금 대기 시간
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # 페이지 캐시 (64MB)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 메모리 맵 (256MB)
+
+
+def _build_engine_options() -> dict:
+    """DB 종류에 맞는 create_engine 옵션 구성"""
+    if IS_SQLITE_MEMORY:
+        return {"connect_args": {"check_same_thread": False}}
+    
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    if IS_SQLITE:
+        # SQLite용: 스레드 공유 허용 + 잠금 대기
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000
+        }
+    else:
+        options["pool_recycle"] = DB_POOL_RECYCLE
+    return options
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_build_engine_options())
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite 연결마다 WAL 및 성능 PRAGMA 적용"""
+    cursor = dbapi_connection.cursor()
+    if not IS_SQLITE_MEMORY:
+        # WAL: 읽기와 쓰기가 서로 막지 않음 (WAL 모드는 DB 파일에 유지됨)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL로도 충돌 시 DB가 손상되지 않음 (마지막 커밋 일부만 유실 가능)
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# -----------------------------
+# 비동기 엔진 (FastAPI 핸들러용)
+# -----------------------------
+def _to_async_url(url: str) -> str:
+    """동기 DATABASE_URL을 비동기 드라이버 URL로 변환 (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    if url.startswith("postgresql+psycopg2:") or url.startswith("postgresql+psycopg:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(SQLALCHEMY_DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_build_engine_options())
+
+if IS_SQLITE:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# 커밋 후에도 로드된 속성을 그대로 사용 (비동기에서는 지연 로딩 불가)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -78,12 +162,25 @@ class Applicant(Base):
 class ChatSession(Base):
     """채팅 세션 테이블"""
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # 지원자-교수님 조합당 세션 1개
+        Index("ux_chat_sessions_applicant_professor", "applicant_id", "professor_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     applicant_id = Column(Integer, ForeignKey("applicants.id"), nullable=False, index=True)
     professor_id = Column(String(50), nullable=False, index=True)  # professor_id (prof_001 등)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # 메시지 저장 시 함께 갱신 (세션 조회/목록에서 chat_messages 집계 불필요)
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)
+    last_message_at = Column(DateTime, nullable=True)
+    # 턴별 채팅 품질 평가 누적값 (최종 리포트에서 LLM 재평가 없이 채팅 점수 계산)
+    scored_turns = Column(Integer, default=0, server_default="0", nullable=False)
+    depth_quality_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    answer_quality_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    engagement_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    relevance_sum = Column(Integer, default=0, server_default="0", nullable=False)
     
     # 관계 설정
     applicant = relationship("Applicant", back_populates="chat_sessions")
@@ -93,6 +190,10 @@ class ChatSession(Base):
 class ChatMessage(Base):
     """채팅 메시지 테이블"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # 세션별 메시지 키셋 페이지네이션 (session_id, timestamp, id)
+        Index("ix_chat_messages_session_timestamp_id", "session_id", "timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False, index=True)
@@ -104,12 +205,210 @@ class ChatMessage(Base):
     session = relationship("ChatSession", back_populates="messages")
 
 
+class ChatEvaluation(Base):
+    """채팅 품질 평가(LLM) 결과 저장 테이블 (세션이 바뀌지 않았으면 재사용)"""
+    __tablename__ = "chat_evaluations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False, unique=True)
+    message_count = Column(Integer, nullable=False)  # 평가 시점의 메시지 수
+    last_message_id = Column(Integer, nullable=True)  # 평가 시점의 마지막 메시지 ID
+    context_hash = Column(String(64), nullable=False)  # 지원자 정보 + 평가 모델 해시 (변경 시 재평가)
+    result_json = Column(Text, nullable=False)  # calculate_chat_based_score 결과
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class GeneratedDocument(Base):
+    """생성된 최종 리포트 / 이메일 초안 저장 테이블 (입력이 같으면 재생성 없이 재사용)"""
+    __tablename__ = "generated_documents"
+    __table_args__ = (
+        Index("ix_generated_documents_kind_input_hash", "kind", "input_hash"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)  # "final_report" 또는 "email_draft"
+    input_hash = Column(String(64), nullable=False)  # 생성 입력(점수, 메시지 수, 상담 일정 등) 지문
+    applicant_id = Column(Integer, ForeignKey("applicants.id"), nullable=True, index=True)
+    professor_id = Column(String(50), nullable=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=True)
+    content = Column(Text, nullable=False)  # 생성된 본문
+    metadata_json = Column(Text, nullable=True)  # 점수 등 완료 이벤트에 포함할 정보
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LLMCompletionCache(Base):
+    """LLM 응답 캐시 테이블 (같은 모델/프롬프트/파라미터 요청이면 저장된 응답 재사용)"""
+    __tablename__ = "llm_completion_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True)  # 요청 파라미터 SHA-256
+    endpoint = Column(String(50), nullable=False)  # 호출한 기능 (적중률 집계용)
+    model = Column(String(100), nullable=False)
+    content = Column(Text, nullable=False)  # 응답 텍스트
+    hit_count = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_hit_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)  # None이면 만료 없음
+
+
+class MatchRequest(Base):
+    """매칭 요청 중복 방지 테이블 (Idempotency-Key / 동일 입력 재요청 시 저장된 응답 반환)"""
+    __tablename__ = "match_requests"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    request_key = Column(String(255), nullable=False, unique=True)  # "key:<Idempotency-Key>" 또는 "hash:<입력 해시>"
+    payload_hash = Column(String(64), nullable=False)  # 정규화된 요청 입력의 SHA-256
+    status = Column(String(20), nullable=False, default="pending")  # "pending" 또는 "completed"
+    applicant_id = Column(Integer, ForeignKey("applicants.id"), nullable=True)
+    response_json = Column(Text, nullable=True)  # 저장된 MatchingResponse
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # 만료 시 정리 대상
+
+
 # -----------------------------
 # 데이터베이스 초기화
 # -----------------------------
+def _add_missing_columns() -> List[str]:
+    """기존 테이블에 모델에 새로 추가된 컬럼 추가 (create_all은 기존 테이블을 변경하지 않음)"""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def backfill_chat_session_counters():
+    """chat_messages 기준으로 세션별 message_count / last_message_at 재계산"""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE chat_sessions SET
+                message_count = (
+                    SELECT COUNT(*) FROM chat_messages WHERE chat_messages.session_id = chat_sessions.id
+                ),
+                last_message_at = (
+                    SELECT MAX(timestamp) FROM chat_messages WHERE chat_messages.session_id = chat_sessions.id
+                )
+        """))
+
+
 def init_db():
     """데이터베이스 테이블 생성"""
     Base.metadata.create_all(bind=engine)
+    
+    # 기존 DB에 새 컬럼 추가 (세션 메시지 카운터는 추가 시 기존 메시지로 채움)
+    added_columns = _add_missing_columns()
+    if added_columns:
+        print(f"새 컬럼 추가: {', '.join(added_columns)}")
+    if "chat_sessions.message_count" in added_columns:
+        backfill_chat_session_counters()
+    
+    # 기존 테이블에 새로 추가된 인덱스 생성 (create_all은 기존 테이블의 인덱스를 추가하지 않음)
+    for table in Base.metadata.sorted_tables:
+        for table_index in table.indexes:
+            try:
+                table_index.create(bind=engine, checkfirst=True)
+            except IntegrityError:
+                if table_index.name != "ux_chat_sessions_applicant_professor":
+                    raise
+                # 세션 생성은 이 unique 인덱스의 ON CONFLICT에 의존하므로 중복 세션을 병합한 뒤 다시 생성
+                # (병합 후에도 만들 수 없으면 예외로 시작 중단)
+                print("⚠️  중복된 채팅 세션이 있어 unique 인덱스를 만들 수 없습니다. 중복 세션을 병합합니다.")
+                _with_lock_retry(merge_duplicate_chat_sessions)
+                table_index.create(bind=engine, checkfirst=True)
+
+
+def _with_lock_retry(fn, attempts: int = 3):
+    """여러 워커가 동시에 시작할 때의 잠금 / 직렬화 충돌은 잠시 후 재시도"""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.5 * (attempt + 1))
+
+
+def merge_duplicate_chat_sessions() -> int:
+    """같은 지원자-교수님 조합의 중복 세션을 가장 오래된 세션으로 병합 (병합한 조합 수 반환)"""
+    db = SessionLocal()
+    try:
+        duplicates = db.query(
+            ChatSession.applicant_id,
+            ChatSession.professor_id
+        ).group_by(
+            ChatSession.applicant_id,
+            ChatSession.professor_id
+        ).having(func.count(ChatSession.id) > 1).all()
+
+        if not duplicates:
+            return 0
+
+        for applicant_id, professor_id in duplicates:
+            sessions = db.query(ChatSession).filter(
+                ChatSession.applicant_id == applicant_id,
+                ChatSession.professor_id == professor_id
+            ).order_by(ChatSession.created_at, ChatSession.id).all()
+
+            keep = sessions[0]
+            for duplicate in sessions[1:]:
+                # 메시지 / 생성 문서를 유지할 세션으로 이동
+                db.query(ChatMessage).filter(
+                    ChatMessage.session_id == duplicate.id
+                ).update({ChatMessage.session_id: keep.id}, synchronize_session=False)
+                db.query(GeneratedDocument).filter(
+                    GeneratedDocument.session_id == duplicate.id
+                ).update({GeneratedDocument.session_id: keep.id}, synchronize_session=False)
+                # 메시지 구성이 바뀌므로 저장된 채팅 평가는 삭제 (다음 리포트에서 재평가)
+                db.query(ChatEvaluation).filter(
+                    ChatEvaluation.session_id.in_([keep.id, duplicate.id])
+                ).delete(synchronize_session=False)
+                # 턴별 채팅 품질 평가 누적값 합산 (이동한 메시지의 평가 점수 유지)
+                keep.scored_turns += duplicate.scored_turns
+                keep.depth_quality_sum += duplicate.depth_quality_sum
+                keep.answer_quality_sum += duplicate.answer_quality_sum
+                keep.engagement_sum += duplicate.engagement_sum
+                keep.relevance_sum += duplicate.relevance_sum
+                keep.updated_at = max(keep.updated_at, duplicate.updated_at)
+                db.delete(duplicate)
+
+            print(f"  - 지원자 {applicant_id} / {professor_id}: 세션 {len(sessions)}개 → {keep.id}번으로 병합")
+
+        db.commit()
+        print(f"✅ 중복 세션 {len(duplicates)}건을 병합했습니다.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # 병합된 세션의 메시지 수 / 마지막 메시지 시각 재계산
+    backfill_chat_session_counters()
+    return len(duplicates)
+
+
+# -----------------------------
+# 원자적 upsert
+# -----------------------------
+def insert_ignore_conflict(model, values: dict, conflict_columns: List[str]):
+    """INSERT ... ON CONFLICT DO NOTHING 구문 생성 (SQLite / PostgreSQL)"""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model).values(**values).on_conflict_do_nothing(index_elements=conflict_columns)
 
 
 # -----------------------------
@@ -123,3 +422,9 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """비동기 데이터베이스 세션 의존성 (이벤트 루프를 막지 않음)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
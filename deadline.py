@@ -0,0 +1,159 @@
+"""
+요청 마감 시각(deadline) 전파
+- 요청 헤더(X-Request-Timeout, 초) 또는 엔드포인트별 기본값으로 마감 시각 설정
+- 마감 시각은 contextvar로 전달되어 임베딩 / 검색 / LLM / DB 단계가 남은 시간을 타임아웃으로 사용
+- 마감이 지난 작업은 시작하지 않고 DeadlineExceeded로 중단
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, TypeVar, Union
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# 헤더로 요청할 수 있는 최대값 (Gunicorn --timeout 120 보다 짧게)
+DEADLINE_MAX_SECONDS = float(os.getenv("DEADLINE_MAX_SECONDS", "110"))
+
+# 엔드포인트별 기본 마감 시간 (초)
+ENDPOINT_DEADLINES = {
+    "chat": float(os.getenv("DEADLINE_CHAT_SECONDS", "30")),
+    "match": float(os.getenv("DEADLINE_MATCH_SECONDS", "60")),
+    "match_rationale": float(os.getenv("DEADLINE_MATCH_RATIONALE_SECONDS", "60")),
+    "match_final": float(os.getenv("DEADLINE_MATCH_FINAL_SECONDS", "90")),
+    "email_draft": float(os.getenv("DEADLINE_EMAIL_DRAFT_SECONDS", "60"))
+}
+
+class SharedDeadline:
+    """
+    여러 요청이 함께 기다리는 작업(병합된 OpenAI 호출)의 마감 시각
+
+    기다리는 요청 중 가장 늦은 마감 시각이며, 더 늦게 끝나는 요청이 합류하면 연장됩니다.
+    마감 시각이 없는 요청이 합류하면 작업에도 마감 시각이 없습니다(None).
+    모든 요청의 마감이 지나면(= 기다리는 요청이 없으면) 작업도 마감이 지나 중단됩니다.
+    """
+
+    def __init__(self, deadline: Optional[float]):
+        self._lock = threading.Lock()
+        self._value = deadline
+
+    def extend(self, deadline: Optional[float]):
+        """합류한 요청의 마감 시각까지 연장"""
+        with self._lock:
+            if self._value is not None:
+                self._value = None if deadline is None else max(self._value, deadline)
+
+    @property
+    def value(self) -> Optional[float]:
+        with self._lock:
+            return self._value
+
+
+_deadline: ContextVar[Union[float, SharedDeadline, None]] = ContextVar("request_deadline", default=None)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """요청 마감 시각이 지나 작업을 중단한 경우"""
+
+    def __init__(self, stage: str = ""):
+        self.stage = stage
+        super().__init__(f"요청 처리 시간이 초과되었습니다{f' ({stage})' if stage else ''}.")
+
+
+def request_deadline(endpoint: str, header_value: Optional[str] = None) -> float:
+    """
+    요청의 마감 시각 (time.monotonic 기준)
+
+    헤더 값(초)이 올바르면 그 값을, 아니면 엔드포인트 기본값을 사용하며 DEADLINE_MAX_SECONDS를 넘지 않습니다.
+    """
+    seconds = ENDPOINT_DEADLINES.get(endpoint, DEADLINE_MAX_SECONDS)
+    if header_value:
+        try:
+            requested = float(header_value)
+            if requested > 0:
+                seconds = requested
+        except ValueError:
+            pass
+    return time.monotonic() + min(seconds, DEADLINE_MAX_SECONDS)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """with 블록 안의 작업에 마감 시각 적용 (이미 더 이른 마감 시각이 있으면 그 값 유지)"""
+    current = current_deadline()
+    if deadline is None or (current is not None and current <= deadline):
+        yield
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def shared_deadline_scope(shared: SharedDeadline):
+    """
+    with 블록 안의 작업에 공유 마감 시각 적용
+
+    호출한 요청의 마감 시각 대신 shared의 현재 값을 사용하므로, 작업 도중 다른 요청이 합류해
+    연장하면 governor 대기 / 호출 타임아웃 / 재시도 확인에도 바로 반영됩니다.
+    """
+    token = _deadline.set(shared)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    deadline = _deadline.get()
+    return deadline.value if isinstance(deadline, SharedDeadline) else deadline
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """마감까지 남은 시간 (초, 마감 시각이 없으면 None)"""
+    deadline = deadline if deadline is not None else current_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(stage: str, deadline: Optional[float] = None):
+    """마감 시각이 지났으면 DeadlineExceeded (단계 시작 전 호출)"""
+    left = remaining(deadline)
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(stage)
+
+
+def stage_timeout(default: float, deadline: Optional[float] = None) -> float:
+    """단계 타임아웃: 기본값과 마감까지 남은 시간 중 작은 값"""
+    left = remaining(deadline)
+    return default if left is None else max(0.0, min(default, left))
+
+
+def scoped_iter(deadline: Optional[float], iterator: Iterator[T], stage: str = "스트리밍") -> Iterator[T]:
+    """
+    반복할 때마다 마감 시각을 적용하고 확인하는 이터레이터 (스트림 생성기용)
+
+    iterate_in_threadpool은 next()마다 컨텍스트를 새로 복사하므로, 생성기 안의 호출이
+    마감 시각을 보려면 매 단계 deadline_scope를 다시 적용해야 합니다.
+    """
+    try:
+        while True:
+            with deadline_scope(deadline):
+                check_deadline(stage)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
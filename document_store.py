@@ -0,0 +1,135 @@
+"""
+생성 문서(최종 리포트 / 이메일 초안) 저장 및 재생
+- 입력 지문(점수, 메시지 수, 상담 일정 등)이 같으면 저장된 문서를 SSE로 바로 재생
+- 입력이 바뀐 경우에만 LLM으로 새로 생성하고, 스트리밍이 정상 완료되면 저장
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database import GeneratedDocument
+
+# 문서 종류
+FINAL_REPORT = "final_report"
+EMAIL_DRAFT = "email_draft"
+
+# 저장된 문서 재생 시 content 이벤트 하나의 최대 길이 (프론트엔드 스트리밍 표시 호환)
+REPLAY_CHUNK_SIZE = 200
+
+
+def input_fingerprint(kind: str, inputs: Dict) -> str:
+    """문서 생성 입력의 SHA-256 (같은 입력이면 같은 문서 재사용)"""
+    payload = json.dumps({"kind": kind, **inputs}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sse_event(data: Dict) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# -----------------------------
+# 1. 조회 / 저장
+# -----------------------------
+def find_document(db: Session, kind: str, input_hash: str) -> Optional[GeneratedDocument]:
+    """같은 입력으로 생성된 가장 최근 문서"""
+    return db.query(GeneratedDocument).filter(
+        GeneratedDocument.kind == kind,
+        GeneratedDocument.input_hash == input_hash
+    ).order_by(GeneratedDocument.id.desc()).first()
+
+
+async def get_document(db: AsyncSession, document_id: int, kind: str) -> Optional[GeneratedDocument]:
+    """ID로 저장된 문서 조회 (종류가 다르면 None)"""
+    document = await db.get(GeneratedDocument, document_id)
+    if document is None or document.kind != kind:
+        return None
+    return document
+
+
+def save_document(
+    db: Session,
+    kind: str,
+    input_hash: str,
+    content: str,
+    metadata: Dict,
+    applicant_id: Optional[int] = None,
+    professor_id: Optional[str] = None,
+    session_id: Optional[int] = None
+) -> Optional[GeneratedDocument]:
+    """생성된 문서 저장 (실패해도 스트리밍 응답에는 영향 없음)"""
+    try:
+        document = GeneratedDocument(
+            kind=kind,
+            input_hash=input_hash,
+            applicant_id=applicant_id,
+            professor_id=professor_id,
+            session_id=session_id,
+            content=content,
+            metadata_json=json.dumps(metadata, ensure_ascii=False),
+            created_at=datetime.utcnow()
+        )
+        db.add(document)
+        db.commit()
+        return document
+    except Exception as e:
+        db.rollback()
+        print(f"생성 문서 저장 중 오류: {e}")
+        return None
+
+
+# -----------------------------
+# 2. SSE 재생 / 생성 스트림 저장
+# -----------------------------
+def replay_document_stream(document: GeneratedDocument, done_fields: Optional[Dict] = None) -> Iterator[str]:
+    """저장된 문서를 생성 시와 같은 SSE 형식으로 재생"""
+    metadata = json.loads(document.metadata_json or "{}")
+    content = document.content
+    for start in range(0, len(content), REPLAY_CHUNK_SIZE):
+        yield sse_event({"type": "content", "content": content[start:start + REPLAY_CHUNK_SIZE], "done": False})
+    yield sse_event({
+        "type": "done",
+        "content": "",
+        "done": True,
+        **metadata,
+        **(done_fields or {}),
+        "document_id": document.id,
+        "cached": True
+    })
+
+
+async def capture_document_stream(
+    chunks: AsyncIterator[str],
+    on_complete
+) -> AsyncIterator[str]:
+    """
+    생성 중인 SSE 청크를 그대로 전달하면서 본문을 모아, 정상 완료되면 on_complete(content)로 저장
+
+    on_complete는 저장된 문서 ID(또는 None)를 반환하며, 완료 이벤트에 document_id로 포함됩니다.
+    LLM 실패 시의 대체 문서(완료 이벤트에 본문 포함)나 오류 이벤트는 저장하지 않습니다.
+    """
+    parts = []
+    async for chunk in chunks:
+        try:
+            event = json.loads(chunk[len("data: "):]) if chunk.startswith("data: ") else None
+        except json.JSONDecodeError:
+            event = None
+
+        if event is None or event.get("error"):
+            yield chunk
+            continue
+
+        if not event.get("done"):
+            parts.append(event.get("content", ""))
+            yield chunk
+            continue
+
+        if not event.get("content"):
+            document_id = await run_in_threadpool(on_complete, "".join(parts))
+            if document_id is not None:
+                event["document_id"] = document_id
+                event["cached"] = False
+                chunk = sse_event(event)
+        yield chunk
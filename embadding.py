@@ -1,9 +1,11 @@
-import json
 import os
 from tqdm import tqdm
-from openai import OpenAI
+from openai_client import create_openai_client
+from openai_governor import BATCH
 from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
+from corpus import load_corpus, chunk_text, filter_metadata
+from embedding_provider import create_embedding_provider
 
 # 환경 변수 로드
 load_dotenv()
@@ -14,15 +16,21 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "ai-advise")
+# 인덱스 호스트를 직접 지정 (mock_server.py 등 대체 서버, 없으면 인덱스 이름으로 조회)
+PINECONE_HOST = os.getenv("PINECONE_HOST")
 
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
 if not PINECONE_API_KEY:
     raise ValueError("PINECONE_API_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# 일괄 임베딩도 전역 governor(RPM/TPM 제한, 429 재시도)를 거치며, batch 등급으로 여유 용량만 사용
+client = create_openai_client(OPENAI_API_KEY, priority=BATCH, coalesce=False)
 pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(INDEX_NAME)
+index = pc.Index(INDEX_NAME, host=PINECONE_HOST) if PINECONE_HOST else pc.Index(INDEX_NAME)
+
+# 임베딩 제공자 (EMBEDDING_PROVIDER=local이면 로컬 임베딩으로 업서트, 검색도 같은 제공자 사용 필요)
+embedder = create_embedding_provider(client)
 
 # -----------------------------
 # 2. JSON 파일 읽기
@@ -36,24 +44,15 @@ index = pc.Index(INDEX_NAME)
 #   },
 #   ...
 # ]
-with open("professor_data.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+data = load_corpus()
 
 
 # -----------------------------
-# 3. 모델 설정
-# -----------------------------
-EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-
-# -----------------------------
-# 4. 텍스트 임베딩 함수
+# 3. 텍스트 임베딩 함수
 # -----------------------------
 def embed_text(text: str):
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,  # 1536 차원 (인덱스와 일치)
-        input=text
-    )
-    return response.data[0].embedding
+    # 1536 차원 (인덱스와 일치, 로컬 임베딩은 LOCAL_EMBEDDING_DIMENSION)
+    return embedder.embed_text(text)
 
 
 # -----------------------------
@@ -63,31 +62,10 @@ def upsert_chunks(data):
     vectors = []
 
     for item in tqdm(data):
-        # Q&A 타입인 경우 question과 answer를 함께 사용
-        if item.get("type") == "qa" and "question" in item and "answer" in item:
-            text = f"질문: {item['question']}\n답변: {item['answer']}"
-        else:
-            text = item["content"]
-        
-        vector = embed_text(text)
-
-        metadata = {
-            "professor_id": item["professor_id"],
-            "chunk_id": item["chunk_id"],
-            "type": item.get("type", ""),
-            "text": text
-        }
-        
-        # Q&A인 경우 question, answer, indicator도 메타데이터에 추가
-        if item.get("type") == "qa":
-            if "question" in item:
-                metadata["question"] = item["question"]
-            if "answer" in item:
-                metadata["answer"] = item["answer"]
-            if "indicator" in item:
-                metadata["indicator"] = item["indicator"]
-        elif "title" in item:
-            metadata["title"] = item["title"]
+        vector = embed_text(chunk_text(item))
+
+        # 메타데이터에는 ID와 필터 필드만 저장 (텍스트는 corpus.py에서 chunk_id로 조회)
+        metadata = filter_metadata(item)
 
         vectors.append({
             "id": item["chunk_id"],                   # 고유 ID
@@ -0,0 +1,126 @@
+"""
+임베딩 제공자 (EMBEDDING_PROVIDER)
+- openai: OpenAI 임베딩 API (기본값)
+- local: 해시 글자 n-gram TF-IDF를 고정 차원으로 투영한 결정적 로컬 임베딩 (네트워크 / 비용 없음)
+  개발, 벤치마크, OpenAI 장애 시 로컬 엔진에서 사용
+
+로컬 임베딩은 OpenAI 임베딩과 벡터 공간이 다르므로, Pinecone 검색에 쓰려면
+같은 제공자로 업서트한 별도 인덱스(PINECONE_INDEX_NAME)가 필요합니다.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import List
+from dotenv import load_dotenv
+from corpus import load_corpus, chunk_text
+
+# 환경 변수 로드
+load_dotenv()
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+# 로컬 임베딩 차원 (기본값은 text-embedding-3-small / Pinecone 인덱스와 같은 1536)
+LOCAL_EMBEDDING_DIMENSION = int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "1536"))
+
+
+class EmbeddingProvider(ABC):
+    """임베딩 제공자 인터페이스"""
+
+    name = ""
+
+    @abstractmethod
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트를 한 번에 벡터로 변환"""
+
+    def embed_text(self, text: str) -> List[float]:
+        """텍스트 1개를 벡터로 변환"""
+        return self.embed_texts([text])[0]
+
+
+# -----------------------------
+# 1. OpenAI 임베딩
+# -----------------------------
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI 임베딩 API (클라이언트의 single-flight / governor / 타임아웃 / 서킷을 그대로 거침)"""
+
+    name = "openai"
+
+    def __init__(self, client, model: str = EMBEDDING_MODEL):
+        self.client = client
+        self.model = model
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in response.data]
+
+    def embed_text(self, text: str) -> List[float]:
+        response = self.client.embeddings.create(model=self.model, input=text)
+        return response.data[0].embedding
+
+
+# -----------------------------
+# 2. 로컬 임베딩 (해시 글자 n-gram TF-IDF)
+# -----------------------------
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    해시 글자 n-gram TF-IDF 임베딩
+
+    글자 n-gram(한국어는 형태소 분석 없이 글자 단위가 안정적)을 해시로 dimension 차원에 투영하고,
+    코퍼스로 학습한 IDF 가중치를 곱한 뒤 L2 정규화합니다 (코사인 유사도 = 내적).
+    해시 함수와 IDF가 고정이므로 같은 코퍼스에서는 항상 같은 벡터를 냅니다.
+    """
+
+    name = "local"
+
+    def __init__(self, dimension: int = LOCAL_EMBEDDING_DIMENSION):
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._model = None  # (코퍼스, 해시 벡터라이저, TF-IDF 변환기)
+
+    def _fitted(self):
+        """코퍼스로 IDF를 학습한 모델 (코퍼스 변경 시 재학습)"""
+        corpus = load_corpus()
+        with self._lock:
+            if self._model is not None and self._model[0] is corpus:
+                return self._model[1], self._model[2]
+
+        # scikit-learn은 로컬 임베딩을 처음 사용할 때 로드
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+        hashing = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(2, 3),
+            n_features=self.dimension,
+            alternate_sign=False,
+            norm=None
+        )
+        texts = [chunk_text(item) for item in corpus]
+        tfidf = TfidfTransformer(sublinear_tf=True).fit(hashing.transform(texts))
+        with self._lock:
+            self._model = (corpus, hashing, tfidf)
+        return hashing, tfidf
+
+    def embed_matrix(self, texts: List[str]):
+        """임베딩 희소 행렬 (len(texts) × dimension, 행마다 L2 정규화)"""
+        hashing, tfidf = self._fitted()
+        return tfidf.transform(hashing.transform(texts))
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.embed_matrix(texts).toarray().tolist()
+
+
+# 프로세스 공유 로컬 임베딩 (IDF 학습 결과 공유)
+local_embedding_provider = LocalEmbeddingProvider()
+
+
+def create_embedding_provider(client) -> EmbeddingProvider:
+    """EMBEDDING_PROVIDER 설정에 맞는 임베딩 제공자 (local이면 client는 사용하지 않음)"""
+    if EMBEDDING_PROVIDER == "local":
+        return local_embedding_provider
+    if EMBEDDING_PROVIDER != "openai":
+        print(f"알 수 없는 EMBEDDING_PROVIDER={EMBEDDING_PROVIDER}, openai를 사용합니다.")
+    return OpenAIEmbeddingProvider(client)
@@ -0,0 +1,395 @@
+"""
+합성 교수님 코퍼스 생성 (규모 테스트용)
+
+professor_data.json과 같은 형식의 코퍼스를 원하는 교수님 수만큼 만듭니다.
+- 교수님마다 프로필 청크 5개(기본 정보 / 교수 소개 / 학력 / 경력 / 담당 과목)와
+  5개 indicator(A~E)별 Q&A 청크 (질문과 답변 문장은 실제 코퍼스의 같은 indicator에서 가져와 조합)
+- 대학원 배정 및 DB 행 (graduate_schools.json, professors.jsonl, --database면 DATABASE_URL에 적재)
+- 선택: 청크 순서대로 미리 계산한 임베딩 (embeddings.npy, float32, random 또는 local)
+
+교수님별 난수는 (seed, 교수님 번호)로 정해지므로 규모를 바꿔도 같은 번호의 교수님은 같은 내용입니다.
+
+사용법:
+    python generate_corpus.py --professors 1000 --output synthetic/1k
+    python generate_corpus.py --professors 10000 --output synthetic/10k --embeddings local --database
+    PROFESSOR_DATA_PATH=synthetic/10k/corpus.json python ...
+
+임베딩 파일 크기는 청크 수 × 차원 × 4바이트입니다 (10만 명 × 25청크 × 1536차원 ≈ 15GB, --dimension으로 조절).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SEED_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "professor_data.json")
+
+INDICATORS = [
+    "A. 연구 키워드 (Research Keyword)",
+    "B. 연구 방법론 (Research Methodology)",
+    "C. 커뮤니케이션 (Communication)",
+    "D. 학문 접근도 (Academic Approach)",
+    "E. 교수 선호도 (Preferred Student Type)"
+]
+
+# 합성 대학원 이름 접두어 (--database 재실행 시 이 이름의 대학원만 교체)
+SCHOOL_PREFIX = "합성대학교"
+
+SURNAMES = "김 이 박 최 정 강 조 윤 장 임 한 오 서 신 권 황 안 송 류 홍 우 진".split()
+GIVEN_SYLLABLES = "민 서 현 준 지 우 도 하 윤 진 혁 규 성 영 수 호 재 은 태 경 한 균 석 훈".split()
+MAJORS = [
+    "기술경영학", "경영학(경영정보시스템, 기술경영)", "기술경제학", "산업공학",
+    "경영전략", "혁신경제학", "데이터사이언스", "조직행동론"
+]
+RESEARCH_FIELDS = [
+    "디지털 전환", "조직 학습", "기술 혁신", "기술 전략", "지속가능경영",
+    "디지털 기업가 정신", "전략기획도구", "정성연구방법론", "AI adoption", "Technology Forecasting",
+    "R&D 전략", "지적재산권", "특허정보분석", "다국적기업", "기술추격", "M&A",
+    "플랫폼 전략", "오픈 이노베이션", "스타트업 생태계", "ESG 경영", "기술사업화", "벤처투자"
+]
+UNIVERSITIES = [
+    "Seoul National University", "KAIST", "POSTECH", "Yonsei University", "Korea University",
+    "University of Cambridge", "MIT", "Stanford University", "University of Michigan", "London Business School"
+]
+COMPANIES = ["삼성전자", "LG CNS", "SK텔레콤", "현대자동차", "네이버", "카카오", "KISTEP", "STEPI", "ETRI", "McKinsey & Company"]
+COURSES = [
+    "기술혁신론", "기술로드매핑 이론과 실습", "정성연구와 사례개발", "R&D 관리", "기술경제학",
+    "데이터 분석 방법론", "디지털 전환 전략", "기술사업화 실무", "연구방법론", "플랫폼 비즈니스"
+]
+SCHOOL_FIELDS = ["기술경영", "기술혁신", "정보통신", "데이터사이언스", "경영", "산업공학"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="합성 교수님 코퍼스 생성 (규모 테스트용)")
+    parser.add_argument("--professors", type=int, required=True, help="교수님 수 (예: 1000, 10000, 100000)")
+    parser.add_argument("--qa-per-indicator", type=int, default=4, help="교수님당 indicator별 Q&A 수 (실제 코퍼스: 4)")
+    parser.add_argument("--graduate-schools", type=int, default=None, help="대학원 수 (기본: 교수님 50명당 1개)")
+    parser.add_argument("--prefix", default="syn", help="professor_id 접두어 (syn → syn_000001)")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드")
+    parser.add_argument("--output", required=True, help="출력 디렉터리")
+    parser.add_argument("--embeddings", choices=["none", "random", "local"], default="none",
+                        help="미리 계산할 임베딩 (local: EMBEDDING_PROVIDER=local과 같은 벡터)")
+    parser.add_argument("--dimension", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--database", action="store_true", help="대학원 / 교수님 행을 DATABASE_URL에 적재")
+    return parser.parse_args()
+
+
+# -----------------------------
+# 1. 실제 코퍼스에서 질문 / 답변 문장 수집
+# -----------------------------
+def load_seed_pools(path: str = SEED_CORPUS_PATH) -> Dict[str, Tuple[List[str], List[str]]]:
+    """indicator별 (질문 목록, 답변 문장 목록)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    pools = {indicator: (set(), set()) for indicator in INDICATORS}
+    for item in data:
+        if item.get("type") != "qa" or item.get("indicator") not in pools:
+            continue
+        questions, sentences = pools[item["indicator"]]
+        questions.add(item["question"])
+        sentences.update(s for s in re.split(r"(?<=[.!?])\s+", item["answer"].strip()) if s)
+    # 집합 순서는 실행마다 다르므로 정렬해 시드별 결과를 고정
+    return {indicator: (sorted(q), sorted(s)) for indicator, (q, s) in pools.items()}
+
+
+# -----------------------------
+# 2. 교수님 1명 생성
+# -----------------------------
+def professor_id_for(prefix: str, number: int) -> str:
+    return f"{prefix}_{number:06d}"
+
+
+def school_names(count: int) -> List[str]:
+    return [f"{SCHOOL_PREFIX} {i + 1:03d} {SCHOOL_FIELDS[i % len(SCHOOL_FIELDS)]}전문대학원" for i in range(count)]
+
+
+def generate_professor(
+    number: int,
+    pools,
+    schools: List[str],
+    prefix: str = "syn",
+    seed: int = 42,
+    qa_per_indicator: int = 4
+) -> Tuple[Dict, List[Dict]]:
+    """(DB 행, 코퍼스 청크 목록)"""
+    rng = random.Random(f"{seed}:{number}")
+    professor_id = professor_id_for(prefix, number)
+    name = rng.choice(SURNAMES) + "".join(rng.sample(GIVEN_SYLLABLES, 2))
+    school = schools[(number - 1) % len(schools)]
+    major = rng.choice(MAJORS)
+    fields = rng.sample(RESEARCH_FIELDS, rng.randint(3, 6))
+    research_fields = ", ".join(fields)
+
+    phd, master, bachelor = rng.sample(UNIVERSITIES, 3)
+    education = "\n".join([
+        f"Ph.D. {major}, {phd}",
+        f"MS {rng.choice(MAJORS)}, {master}",
+        f"BA {rng.choice(MAJORS)}, {bachelor}"
+    ])
+    start_year = rng.randint(2005, 2023)
+    company = rng.choice(COMPANIES)
+    career = "\n".join([
+        f"{start_year}.03~현재 {school} 교수",
+        f"{start_year - rng.randint(2, 5)}.09~{start_year}.02 {company} 책임연구원"
+    ])
+    courses = ", ".join(rng.sample(COURSES, rng.randint(2, 4)))
+    introduction = (
+        f"{name} 교수는 {phd}에서 {major} 박사학위를 취득하고 현재 {school} 교수로 재직 중이다. "
+        f"주요 연구분야는 {fields[0]}, {fields[1]} 등이며, {company}에서의 실무 경험을 바탕으로 "
+        f"{fields[-1]} 관련 연구를 수행한다."
+    )
+
+    row = {
+        "professor_id": professor_id,
+        "name": name,
+        "graduate_school": school,
+        "major": major,
+        "research_fields": research_fields,
+        "introduction": introduction,
+        "education": education,
+        "career": career,
+        "courses": courses,
+        "email": f"{professor_id}@synthetic.example"
+    }
+
+    profiles = [
+        ("기본 정보", f"이름: {name}\n전공: {major}\n연구 분야: {research_fields}"),
+        ("교수 소개", introduction),
+        ("학력", education),
+        ("경력", career),
+        ("담당 과목", f"석사 과정 - {courses}")
+    ]
+    chunks = [
+        {
+            "professor_id": professor_id,
+            "chunk_id": f"{professor_id}_profile_{i + 1:02d}",
+            "type": "profile",
+            "title": title,
+            "content": content
+        }
+        for i, (title, content) in enumerate(profiles)
+    ]
+
+    q_number = 0
+    for indicator in INDICATORS:
+        questions, sentences = pools[indicator]
+        picked = rng.sample(questions, min(qa_per_indicator, len(questions)))
+        picked += rng.choices(questions, k=qa_per_indicator - len(picked))
+        for question in picked:
+            q_number += 1
+            answer_sentences = rng.sample(sentences, min(rng.randint(1, 3), len(sentences)))
+            # 연구 키워드 답변에는 교수님의 연구 분야를 넣어 키워드 매칭 점수가 교수님마다 달라지도록 함
+            if indicator == INDICATORS[0]:
+                answer_sentences.insert(0, f"{rng.choice(fields)} 분야를 중심으로 연구하고 있습니다.")
+            answer = " ".join(answer_sentences)
+            chunks.append({
+                "professor_id": professor_id,
+                "chunk_id": f"{professor_id}_Q{q_number}",
+                "type": "qa",
+                "question": question,
+                "answer": answer,
+                "content": f"Q{q_number}. {question} {answer}",
+                "indicator": indicator
+            })
+    return row, chunks
+
+
+def generate(args, pools, schools: List[str]) -> Iterator[Tuple[Dict, List[Dict]]]:
+    for number in range(1, args.professors + 1):
+        yield generate_professor(number, pools, schools, args.prefix, args.seed, args.qa_per_indicator)
+
+
+# -----------------------------
+# 3. 파일 저장 (교수님 단위로 바로 기록, 전체를 메모리에 올리지 않음)
+# -----------------------------
+def write_corpus(args, pools, schools: List[str]) -> int:
+    """corpus.json / professors.jsonl / graduate_schools.json 저장, 청크 수 반환"""
+    chunk_count = 0
+    with open(os.path.join(args.output, "corpus.json"), "w", encoding="utf-8") as corpus_file, \
+            open(os.path.join(args.output, "professors.jsonl"), "w", encoding="utf-8") as rows_file:
+        corpus_file.write("[\n")
+        for row, chunks in generate(args, pools, schools):
+            rows_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            for chunk in chunks:
+                corpus_file.write((",\n" if chunk_count else "") + json.dumps(chunk, ensure_ascii=False))
+                chunk_count += 1
+        corpus_file.write("\n]\n")
+
+    school_rows = [
+        {
+            "name": name,
+            "education_fields": SCHOOL_FIELDS[i % len(SCHOOL_FIELDS)],
+            "keywords": ", ".join(RESEARCH_FIELDS[i % len(RESEARCH_FIELDS):][:3])
+        }
+        for i, name in enumerate(schools)
+    ]
+    with open(os.path.join(args.output, "graduate_schools.json"), "w", encoding="utf-8") as f:
+        json.dump(school_rows, f, ensure_ascii=False, indent=2)
+    return chunk_count
+
+
+def write_embeddings(args, chunk_count: int, block_size: int = 10000) -> Optional[str]:
+    """청크 순서대로 L2 정규화된 float32 임베딩 행렬을 embeddings.npy로 저장"""
+    if args.embeddings == "none":
+        return None
+    import numpy as np
+
+    path = os.path.join(args.output, "embeddings.npy")
+    matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(chunk_count, args.dimension))
+
+    if args.embeddings == "random":
+        rng = np.random.default_rng(args.seed)
+        for start in range(0, chunk_count, block_size):
+            block = rng.standard_normal((min(block_size, chunk_count - start), args.dimension), dtype=np.float32)
+            block /= np.linalg.norm(block, axis=1, keepdims=True)
+            matrix[start:start + len(block)] = block
+    else:
+        # 로컬 임베딩은 코퍼스로 IDF를 학습하므로 생성한 코퍼스를 로드해서 계산
+        import corpus as corpus_module
+        from embedding_provider import LocalEmbeddingProvider
+
+        corpus_module.CORPUS_PATH = os.path.join(args.output, "corpus.json")
+        provider = LocalEmbeddingProvider(args.dimension)
+        texts = [corpus_module.chunk_text(item) for item in corpus_module.load_corpus()]
+        for start in range(0, chunk_count, block_size):
+            block = provider.embed_matrix(texts[start:start + block_size])
+            matrix[start:start + block.shape[0]] = block.toarray()
+    matrix.flush()
+    return path
+
+
+def load_embeddings(directory: str):
+    """generate_corpus.py로 만든 임베딩 행렬 (메모리 매핑, 행 순서 = corpus.json 청크 순서)"""
+    import numpy as np
+
+    return np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+
+
+# -----------------------------
+# 4. DB 적재
+# -----------------------------
+def delete_synthetic_rows(db, school_ids: List[int]) -> int:
+    """
+    합성 대학원과 소속 교수님, 그 교수님을 참조하는 채팅 / 생성 문서 행 삭제 (삭제한 채팅 세션 수 반환)
+
+    chat_sessions / generated_documents는 professor_id(문자열)로 교수님을 참조하므로,
+    교수님만 지우면 부하 테스트 등으로 쌓인 세션 / 메시지 / 평가 / 문서가 고아 행으로 남습니다.
+    자식 테이블부터 지워 외래 키(Postgres)를 위반하지 않습니다.
+    """
+    from database import GraduateSchool, Professor, ChatSession, ChatMessage, ChatEvaluation, GeneratedDocument
+
+    professor_ids = db.query(Professor.professor_id).filter(Professor.graduate_school_id.in_(school_ids))
+    session_ids = db.query(ChatSession.id).filter(ChatSession.professor_id.in_(professor_ids))
+    session_count = session_ids.count()
+
+    db.query(ChatMessage).filter(ChatMessage.session_id.in_(session_ids)).delete(synchronize_session=False)
+    db.query(ChatEvaluation).filter(ChatEvaluation.session_id.in_(session_ids)).delete(synchronize_session=False)
+    db.query(GeneratedDocument).filter(
+        GeneratedDocument.session_id.in_(session_ids) | GeneratedDocument.professor_id.in_(professor_ids)
+    ).delete(synchronize_session=False)
+    db.query(ChatSession).filter(ChatSession.professor_id.in_(professor_ids)).delete(synchronize_session=False)
+    db.query(Professor).filter(Professor.graduate_school_id.in_(school_ids)).delete(synchronize_session=False)
+    db.query(GraduateSchool).filter(GraduateSchool.id.in_(school_ids)).delete(synchronize_session=False)
+    return session_count
+
+
+def load_database(directory: str, batch_size: int = 5000) -> Tuple[int, int]:
+    """graduate_schools.json / professors.jsonl을 DATABASE_URL에 적재 (같은 이름의 합성 데이터는 교체)"""
+    from database import init_db, SessionLocal, GraduateSchool, Professor
+
+    with open(os.path.join(directory, "graduate_schools.json"), "r", encoding="utf-8") as f:
+        school_rows = json.load(f)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        # 이전에 적재한 합성 대학원과 소속 교수님(및 그 교수님의 채팅 / 문서) 삭제
+        old_school_ids = [
+            school_id for (school_id,) in
+            db.query(GraduateSchool.id).filter(GraduateSchool.name.like(f"{SCHOOL_PREFIX} %")).all()
+        ]
+        if old_school_ids:
+            removed_sessions = delete_synthetic_rows(db, old_school_ids)
+            if removed_sessions:
+                print(f"이전 합성 교수님의 채팅 세션 {removed_sessions:,}개(메시지 / 평가 / 문서 포함)를 삭제했습니다.")
+
+        db.bulk_insert_mappings(GraduateSchool, school_rows)
+        db.flush()
+        school_ids = dict(db.query(GraduateSchool.name, GraduateSchool.id).filter(
+            GraduateSchool.name.like(f"{SCHOOL_PREFIX} %")
+        ).all())
+
+        professor_count = 0
+        batch = []
+        with open(os.path.join(directory, "professors.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                row["graduate_school_id"] = school_ids[row.pop("graduate_school")]
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    db.bulk_insert_mappings(Professor, batch)
+                    professor_count += len(batch)
+                    batch = []
+        if batch:
+            db.bulk_insert_mappings(Professor, batch)
+            professor_count += len(batch)
+        db.commit()
+        return len(school_rows), professor_count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# -----------------------------
+# 5. 실행
+# -----------------------------
+def main():
+    args = parse_args()
+    if args.professors < 1 or args.qa_per_indicator < 1:
+        raise SystemExit("--professors와 --qa-per-indicator는 1 이상이어야 합니다.")
+    os.makedirs(args.output, exist_ok=True)
+
+    school_count = args.graduate_schools or max(1, args.professors // 50)
+    schools = school_names(school_count)
+    pools = load_seed_pools()
+
+    started = time.monotonic()
+    chunk_count = write_corpus(args, pools, schools)
+    print(f"✅ 코퍼스 생성: 교수님 {args.professors:,}명, 청크 {chunk_count:,}개, 대학원 {school_count:,}개 "
+          f"({time.monotonic() - started:.1f}s)")
+
+    embeddings_path = None
+    if args.embeddings != "none":
+        started = time.monotonic()
+        embeddings_path = write_embeddings(args, chunk_count)
+        print(f"✅ 임베딩 저장: {embeddings_path} ({args.embeddings}, {chunk_count:,} × {args.dimension}, "
+              f"{time.monotonic() - started:.1f}s)")
+
+    manifest = {
+        "professors": args.professors,
+        "chunks": chunk_count,
+        "qa_per_indicator": args.qa_per_indicator,
+        "graduate_schools": school_count,
+        "prefix": args.prefix,
+        "seed": args.seed,
+        "embeddings": {"kind": args.embeddings, "dimension": args.dimension, "path": "embeddings.npy"}
+        if embeddings_path else None
+    }
+    with open(os.path.join(args.output, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if args.database:
+        started = time.monotonic()
+        schools_loaded, professors_loaded = load_database(args.output)
+        print(f"✅ DB 적재: 대학원 {schools_loaded:,}개, 교수님 {professors_loaded:,}명 ({time.monotonic() - started:.1f}s)")
+
+    print(f"사용: PROFESSOR_DATA_PATH={os.path.join(args.output, 'corpus.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+LLM 응답(chat completion) 캐시
+- 키: (model, messages, temperature, max_tokens 등 요청 파라미터)의 SHA-256
+- 저장소: 데이터베이스 llm_completion_cache 테이블 (워커/재시작 간 공유)
+- 스트리밍 요청은 캐시 적중 시 저장된 응답을 토큰 스트림처럼 잘라서 재생
+- 엔드포인트별 적중률 집계
+- 항목별 적중 수(hit_count / last_hit_at)는 메모리에 모았다가 주기적으로 한 트랜잭션에 반영 (적중마다 DB 쓰기 없음)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from database import SessionLocal, LLMCompletionCache, insert_ignore_conflict
+
+# 환경 변수 로드
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 0이면 만료 없음
+LLM_CACHE_REPLAY_CHUNK_CHARS = int(os.getenv("LLM_CACHE_REPLAY_CHUNK_CHARS", "8"))  # 재생 시 청크 크기 (글자)
+LLM_CACHE_REPLAY_DELAY_MS = float(os.getenv("LLM_CACHE_REPLAY_DELAY_MS", "0"))  # 재생 시 청크 간 지연
+LLM_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("LLM_CACHE_HIT_FLUSH_SECONDS", "60"))  # 항목별 적중 수 DB 반영 주기
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+_hits_lock = threading.Lock()
+_pending_hits: Dict[str, List] = {}  # cache_key → [적중 수, 마지막 적중 시각] (아직 DB에 반영 안 됨)
+_last_hit_flush = time.monotonic()
+
+
+# -----------------------------
+# 1. 캐시 키 / 통계
+# -----------------------------
+def completion_cache_key(params: Dict) -> str:
+    """요청 파라미터(model, messages, temperature, max_tokens, ...)의 SHA-256"""
+    payload = json.dumps(
+        {key: value for key, value in params.items() if key != "stream"},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _record(endpoint: str, hit: bool):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """엔드포인트별 적중/미적중 수와 적중률"""
+    with _stats_lock:
+        return {
+            endpoint: {
+                **stats,
+                "hit_rate": round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
+                if stats["hits"] + stats["misses"] else 0.0
+            }
+            for endpoint, stats in _stats.items()
+        }
+
+
+# -----------------------------
+# 2. 저장소
+# -----------------------------
+def _load(key: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        entry = db.query(LLMCompletionCache).filter(LLMCompletionCache.cache_key == key).first()
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= datetime.utcnow():
+            db.delete(entry)
+            db.commit()
+            return None
+        content = entry.content
+        db.rollback()  # 읽기만 했으므로 쓰기 없이 트랜잭션 종료
+        _count_hit(key)
+        return content
+    except Exception as e:
+        db.rollback()
+        print(f"LLM 캐시 조회 중 오류: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def _count_hit(key: str):
+    """적중 수를 메모리에 누적, 반영 주기가 지났으면 모아 둔 적중 수를 DB에 기록"""
+    global _pending_hits, _last_hit_flush
+
+    with _hits_lock:
+        pending = _pending_hits.setdefault(key, [0, None])
+        pending[0] += 1
+        pending[1] = datetime.utcnow()
+        if time.monotonic() - _last_hit_flush < LLM_CACHE_HIT_FLUSH_SECONDS:
+            return
+        hits, _pending_hits = _pending_hits, {}
+        _last_hit_flush = time.monotonic()
+    _write_hits(hits)
+
+
+def flush_hit_counts():
+    """모아 둔 적중 수를 바로 DB에 반영 (서버 종료 시)"""
+    global _pending_hits, _last_hit_flush
+
+    with _hits_lock:
+        hits, _pending_hits = _pending_hits, {}
+        _last_hit_flush = time.monotonic()
+    if hits:
+        _write_hits(hits)
+
+
+def _write_hits(hits: Dict[str, List]):
+    db = SessionLocal()
+    try:
+        for key, (count, last_hit_at) in hits.items():
+            db.query(LLMCompletionCache).filter(LLMCompletionCache.cache_key == key).update({
+                LLMCompletionCache.hit_count: LLMCompletionCache.hit_count + count,
+                LLMCompletionCache.last_hit_at: last_hit_at
+            }, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        # 적중 수는 통계용이므로 반영 실패 시 버림
+        db.rollback()
+        print(f"LLM 캐시 적중 수 반영 중 오류: {e}")
+    finally:
+        db.close()
+
+
+def _store(key: str, endpoint: str, model: str, content: str):
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(insert_ignore_conflict(
+            LLMCompletionCache,
+            {
+                "cache_key": key,
+                "endpoint": endpoint,
+                "model": model,
+                "content": content,
+                "hit_count": 0,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=LLM_CACHE_TTL_SECONDS) if LLM_CACHE_TTL_SECONDS > 0 else None
+            },
+            conflict_columns=["cache_key"]
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"LLM 캐시 저장 중 오류: {e}")
+    finally:
+        db.close()
+
+
+# -----------------------------
+# 3. 캐시를 거치는 chat completion 호출
+# -----------------------------
+def cached_completion(client, endpoint: str, **params) -> str:
+    """
+    chat completion 호출 (같은 요청이면 저장된 응답 반환)
+
+    Returns:
+        응답 텍스트 (response.choices[0].message.content)
+    """
+    key = completion_cache_key(params) if LLM_CACHE_ENABLED else None
+    if key:
+        cached = _load(key)
+        _record(endpoint, cached is not None)
+        if cached is not None:
+            return cached
+
+    response = client.chat.completions.create(**params)
+    content = response.choices[0].message.content
+
+    if key and content:
+        _store(key, endpoint, params.get("model", ""), content)
+    return content
+
+
+def cached_completion_stream(client, endpoint: str, **params) -> Iterator[str]:
+    """
+    스트리밍 chat completion 호출 (텍스트 조각 단위로 반환)
+
+    캐시 적중 시 저장된 응답을 LLM_CACHE_REPLAY_CHUNK_CHARS 글자씩 잘라 재생하고,
+    미적중 시 실제 스트림을 그대로 전달하면서 끝까지 받은 응답만 저장합니다.
+    """
+    key = completion_cache_key(params) if LLM_CACHE_ENABLED else None
+    if key:
+        cached = _load(key)
+        _record(endpoint, cached is not None)
+        if cached is not None:
+            for start in range(0, len(cached), LLM_CACHE_REPLAY_CHUNK_CHARS):
+                if start and LLM_CACHE_REPLAY_DELAY_MS > 0:
+                    time.sleep(LLM_CACHE_REPLAY_DELAY_MS / 1000)
+                yield cached[start:start + LLM_CACHE_REPLAY_CHUNK_CHARS]
+            return
+
+    parts = []
+    stream = client.chat.completions.create(**params, stream=True)
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content is not None:
+            content = chunk.choices[0].delta.content
+            parts.append(content)
+            yield content
+
+    # 중간에 끊긴 스트림(클라이언트 연결 종료, 오류)은 여기까지 오지 않으므로 저장되지 않음
+    if key and parts:
+        _store(key, endpoint, params.get("model", ""), "".join(parts))
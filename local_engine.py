@@ -0,0 +1,128 @@
+"""
+OpenAI 장애(서킷 열림) 시 사용하는 로컬 엔진
+- 매칭: 사전 계산 유사도 테이블(build_matching_tables.py로 생성) → 테이블에 없으면 로컬 임베딩(해시 글자 n-gram TF-IDF) 유사도
+- 채팅: FAQ 빠른 응답 (질문과 가장 비슷한 교수님 Q&A의 실제 답변)
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from corpus import load_corpus
+from embedding_provider import local_embedding_provider
+
+# 환경 변수 로드
+load_dotenv()
+
+MATCHING_TABLES_PATH = os.getenv("MATCHING_TABLES_PATH", "matching_tables.json")
+FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", "0.25"))
+
+# TF-IDF 코사인 유사도(0~TFIDF_SIMILARITY_MAX)를 임베딩 유사도 범위로 옮겨 기존 점수 변환을 그대로 사용
+TFIDF_SIMILARITY_MAX = 0.1
+EMBEDDING_SIMILARITY_RANGE = (0.15, 0.4)
+
+_lock = threading.Lock()
+_tables: Optional[Dict[str, Dict[str, float]]] = None
+_tables_mtime: Optional[float] = None
+_stats = {"matching_table": 0, "matching_tfidf": 0, "faq_hits": 0, "faq_misses": 0}
+
+
+def local_stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+
+def _count(key: str, amount: int = 1):
+    with _lock:
+        _stats[key] += amount
+
+
+# -----------------------------
+# 1. TF-IDF 유사도 (로컬 임베딩)
+# -----------------------------
+def tfidf_similarities(queries: List[str], texts: List[str]) -> List[List[float]]:
+    """queries × texts 로컬 임베딩(해시 글자 n-gram TF-IDF) 코사인 유사도 (L2 정규화되어 있으므로 내적)"""
+    if not queries or not texts:
+        return [[] for _ in queries]
+    matrix = local_embedding_provider.embed_matrix(queries) @ local_embedding_provider.embed_matrix(texts).T
+    return matrix.toarray().tolist()
+
+
+def _calibrate(similarity: float) -> float:
+    low, high = EMBEDDING_SIMILARITY_RANGE
+    return low + min(similarity, TFIDF_SIMILARITY_MAX) / TFIDF_SIMILARITY_MAX * (high - low)
+
+
+# -----------------------------
+# 2. 매칭 유사도 (사전 계산 테이블 → TF-IDF)
+# -----------------------------
+def _load_tables() -> Dict[str, Dict[str, float]]:
+    """{용어(관심 키워드/학습 성향): {chunk_id: 임베딩 코사인 유사도}} (파일 변경 시 재로드)"""
+    global _tables, _tables_mtime
+    if not os.path.exists(MATCHING_TABLES_PATH):
+        return {}
+    mtime = os.path.getmtime(MATCHING_TABLES_PATH)
+    with _lock:
+        if _tables is not None and _tables_mtime == mtime:
+            return _tables
+    with open(MATCHING_TABLES_PATH, "r", encoding="utf-8") as f:
+        tables = json.load(f).get("similarities", {})
+    with _lock:
+        _tables, _tables_mtime = tables, mtime
+    return tables
+
+
+def local_similarity_matrix(terms: List[str], qa_list: List[Dict]) -> List[List[float]]:
+    """
+    용어(관심 키워드 / 학습 성향) × 교수님 Q&A 답변 유사도
+
+    사전 계산 테이블에 있으면 OpenAI 임베딩 기준 값을 그대로 쓰고,
+    없는 용어는 TF-IDF 유사도를 임베딩 유사도 범위로 변환하여 사용합니다.
+    """
+    tables = _load_tables()
+    rows: List[Optional[List[float]]] = []
+    missing = []
+    for term in terms:
+        table = tables.get(term, {})
+        if all(qa["chunk_id"] in table for qa in qa_list):
+            rows.append([table[qa["chunk_id"]] for qa in qa_list])
+        else:
+            rows.append(None)
+            missing.append(term)
+
+    if len(missing) < len(terms):
+        _count("matching_table")
+    if missing:
+        _count("matching_tfidf")
+        computed = iter(tfidf_similarities(missing, [qa["answer"] for qa in qa_list]))
+        rows = [row if row is not None else [_calibrate(s) for s in next(computed)] for row in rows]
+    return rows
+
+
+# -----------------------------
+# 3. 채팅 FAQ 빠른 응답
+# -----------------------------
+def faq_answer(question: str, professor_id: Optional[str] = None) -> Optional[Tuple[str, List[str]]]:
+    """
+    질문과 가장 비슷한 교수님 Q&A의 실제 답변 (유사도가 FAQ_MIN_SIMILARITY 미만이면 None)
+
+    Returns:
+        (답변, 참고 정보 리스트) - generate_answer와 같은 형식
+    """
+    candidates = [
+        item for item in load_corpus()
+        if item.get("type") == "qa" and item.get("question")
+        and (professor_id is None or item.get("professor_id") == professor_id)
+    ]
+    if not candidates:
+        _count("faq_misses")
+        return None
+
+    similarities = tfidf_similarities([question], [item["question"] for item in candidates])[0]
+    best = max(range(len(candidates)), key=lambda i: similarities[i])
+    if similarities[best] < FAQ_MIN_SIMILARITY:
+        _count("faq_misses")
+        return None
+
+    _count("faq_hits")
+    return candidates[best]["answer"], [f"- {candidates[best]['question']}"]
@@ -0,0 +1,179 @@
+"""
+POST /match 중복 요청 방지
+- Idempotency-Key 헤더: 같은 키로 재요청하면 저장된 MatchingResponse 반환 (프론트엔드 재시도)
+- 키가 없으면 같은 클라이언트의 동일 입력을 일정 시간 동안 중복으로 처리 (더블 클릭/중복 제출)
+- 처리 중인 동일 요청은 완료될 때까지 잠시 대기 후 같은 응답 반환
+- 만료된 레코드는 주기적으로 삭제 (TTL)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+from database import MatchRequest, insert_ignore_conflict
+
+# 환경 변수 로드
+load_dotenv()
+
+MATCH_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("MATCH_IDEMPOTENCY_TTL_SECONDS", "86400"))  # Idempotency-Key 보관 기간
+MATCH_DEDUPE_TTL_SECONDS = int(os.getenv("MATCH_DEDUPE_TTL_SECONDS", "120"))  # 동일 입력 중복 판단 기간 (0이면 사용 안 함)
+MATCH_PENDING_TIMEOUT_SECONDS = int(os.getenv("MATCH_PENDING_TIMEOUT_SECONDS", "120"))  # 처리 중 레코드 만료 (워커 크래시 대비)
+MATCH_PENDING_WAIT_SECONDS = float(os.getenv("MATCH_PENDING_WAIT_SECONDS", "15"))  # 처리 중인 동일 요청 대기 시간
+MATCH_CLEANUP_INTERVAL_SECONDS = int(os.getenv("MATCH_CLEANUP_INTERVAL_SECONDS", "300"))
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 200
+
+_last_cleanup: Optional[float] = None
+
+
+# -----------------------------
+# 1. 요청 키 구성
+# -----------------------------
+def match_payload_hash(
+    name: Optional[str],
+    major: Optional[str],
+    interest_keyword: str,
+    learning_styles: List[str],
+    professor_ids: Optional[List[str]],
+    client_fingerprint: str = ""
+) -> str:
+    """정규화된 매칭 요청 입력의 SHA-256 (학습 성향/교수님 순서 무시)"""
+    payload = {
+        "name": (name or "").strip(),
+        "major": (major or "").strip(),
+        "interest_keyword": interest_keyword,
+        "learning_styles": sorted(learning_styles),
+        "professor_ids": sorted(professor_ids) if professor_ids is not None else None,
+        "client": client_fingerprint
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_request_key(idempotency_key: Optional[str], payload_hash: str) -> Optional[str]:
+    """중복 판단 키 (Idempotency-Key 우선, 없으면 입력 해시, 둘 다 사용하지 않으면 None)"""
+    if idempotency_key is not None:
+        idempotency_key = idempotency_key.strip()
+        if not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key는 1~{MAX_IDEMPOTENCY_KEY_LENGTH}자여야 합니다."
+            )
+        return f"key:{idempotency_key}"
+    if MATCH_DEDUPE_TTL_SECONDS > 0:
+        return f"hash:{payload_hash}"
+    return None
+
+
+# -----------------------------
+# 2. 요청 선점 / 완료 / 해제
+# -----------------------------
+async def claim_match_request(db: AsyncSession, request_key: str, payload_hash: str) -> Optional[str]:
+    """
+    매칭 요청 선점
+
+    Returns:
+        None이면 이 요청이 처리 담당 (완료 후 complete_match_request 호출),
+        문자열이면 저장된 MatchingResponse JSON (그대로 반환)
+    """
+    await purge_expired_match_requests(db)
+
+    deadline = time.monotonic() + MATCH_PENDING_WAIT_SECONDS
+    while True:
+        now = datetime.utcnow()
+        result = await db.execute(insert_ignore_conflict(
+            MatchRequest,
+            {
+                "request_key": request_key,
+                "payload_hash": payload_hash,
+                "status": "pending",
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=MATCH_PENDING_TIMEOUT_SECONDS)
+            },
+            conflict_columns=["request_key"]
+        ))
+        await db.commit()
+        if result.rowcount == 1:
+            return None
+
+        # 이미 같은 키의 요청이 있음 (ORM 객체 캐시를 피하기 위해 컬럼으로 조회)
+        record = (await db.execute(
+            select(
+                MatchRequest.id,
+                MatchRequest.payload_hash,
+                MatchRequest.status,
+                MatchRequest.response_json,
+                MatchRequest.expires_at
+            ).where(MatchRequest.request_key == request_key)
+        )).first()
+        if record is None:
+            # 그 사이 만료 삭제됨 → 다시 선점 시도
+            continue
+
+        if record.expires_at <= now:
+            # 만료된 레코드 (완료 후 TTL 경과 또는 처리 중 크래시) → 삭제 후 다시 선점
+            await db.execute(delete(MatchRequest).where(
+                MatchRequest.id == record.id,
+                MatchRequest.expires_at == record.expires_at
+            ))
+            await db.commit()
+            continue
+
+        if record.payload_hash != payload_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="같은 Idempotency-Key로 다른 내용의 요청이 전달되었습니다. 새 키를 사용해주세요."
+            )
+
+        if record.status == "completed":
+            return record.response_json
+
+        # 처리 중인 동일 요청 → 완료될 때까지 잠시 대기
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="같은 매칭 요청이 처리 중입니다. 잠시 후 다시 시도해주세요."
+            )
+        await asyncio.sleep(0.2)
+
+
+async def complete_match_request(db: AsyncSession, request_key: str, applicant_id: int, response_json: str):
+    """처리 완료된 응답 저장 (Idempotency-Key / 입력 해시별 보관 기간 적용)"""
+    ttl = MATCH_IDEMPOTENCY_TTL_SECONDS if request_key.startswith("key:") else MATCH_DEDUPE_TTL_SECONDS
+    await db.execute(update(MatchRequest).where(MatchRequest.request_key == request_key).values(
+        status="completed",
+        applicant_id=applicant_id,
+        response_json=response_json,
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+    ))
+    await db.commit()
+
+
+async def release_match_request(db: AsyncSession, request_key: str):
+    """처리 실패 시 선점 해제 (같은 키로 바로 재시도 가능)"""
+    await db.execute(delete(MatchRequest).where(
+        MatchRequest.request_key == request_key,
+        MatchRequest.status == "pending"
+    ))
+    await db.commit()
+
+
+# -----------------------------
+# 3. 만료 레코드 정리
+# -----------------------------
+async def purge_expired_match_requests(db: AsyncSession, force: bool = False) -> int:
+    """만료된 레코드 삭제 (MATCH_CLEANUP_INTERVAL_SECONDS마다 한 번)"""
+    global _last_cleanup
+
+    if not force and _last_cleanup is not None and time.monotonic() - _last_cleanup < MATCH_CLEANUP_INTERVAL_SECONDS:
+        return 0
+    _last_cleanup = time.monotonic()
+
+    result = await db.execute(delete(MatchRequest).where(MatchRequest.expires_at < datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
@@ -1,13 +1,20 @@
 """
 매칭 시스템: 지원자와 교수님 간의 적합도 측정
 """
+import contextvars
 import json
 import re
 from typing import List, Dict, Optional, Generator
-from openai import OpenAI
+from openai_client import OPENAI_UNAVAILABLE, create_openai_client
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from database import SessionLocal, Professor
+from llm_cache import cached_completion, cached_completion_stream
+from deadline import DeadlineExceeded, check_deadline, remaining
+from circuit_breaker import openai_breaker
+from local_engine import local_similarity_matrix
+from embedding_provider import create_embedding_provider
+from corpus import load_corpus
 from dotenv import load_dotenv
 
 # 환경 변수 로드
@@ -20,10 +27,14 @@ if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
 
 # OpenAI 클라이언트 초기화
-client = OpenAI(api_key=OPENAI_API_KEY)
+# 공유 연결 풀 클라이언트: 동시에 진행 중인 같은 요청은 업스트림 요청 1개로 병합하고,
+# 실제 업스트림 요청은 전역 governor(RPM/TPM/동시성 제한, 재시도)와 호출 종류별 타임아웃을 거침
+client = create_openai_client(OPENAI_API_KEY)
+
+# 임베딩 제공자 (EMBEDDING_PROVIDER=local이면 네트워크 없이 로컬 임베딩)
+embedder = create_embedding_provider(client)
 
 # 모델 설정
-EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 
 # -----------------------------
@@ -31,14 +42,7 @@ CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 # -----------------------------
 def embed_texts(texts: List[str]) -> List[List[float]]:
     """여러 텍스트를 한 번에 벡터로 변환 (배치 처리)"""
-    if not texts:
-        return []
-    
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=texts
-    )
-    return [item.embedding for item in response.data]
+    return embedder.embed_texts(texts)
 
 
 # -----------------------------
@@ -61,11 +65,8 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
 # -----------------------------
 def get_professor_qa_by_indicator(professor_id: str, indicator: str) -> List[Dict]:
     """특정 교수님의 특정 indicator에 해당하는 Q&A 검색"""
-    with open("professor_data.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
     qa_list = []
-    for item in data:
+    for item in load_corpus():
         if (item.get("professor_id") == professor_id and 
             item.get("type") == "qa" and 
             item.get("indicator") == indicator):
@@ -85,7 +86,8 @@ def calculate_indicator_score(
     applicant_data: Dict,
     professor_id: str,
     indicator: str,
-    learning_style_embeddings: Optional[Dict[str, List[float]]] = None
+    learning_style_embeddings: Optional[Dict[str, List[float]]] = None,
+    local: bool = False
 ) -> Dict:
     """
     특정 indicator에 대한 매칭 점수 계산
@@ -94,6 +96,7 @@ def calculate_indicator_score(
         applicant_data: 지원자 데이터 (interest_keyword, learning_styles)
         professor_id: 교수님 ID
         indicator: indicator 카테고리
+        local: True면 OpenAI 대신 로컬 엔진(사전 계산 테이블 / TF-IDF) 유사도 사용
     
     Returns:
         {
@@ -115,22 +118,27 @@ def calculate_indicator_score(
     
     scores = []
     details = []
+    answer_texts = [qa["answer"] for qa in qa_list]
     
     if indicator == "A. 연구 키워드 (Research Keyword)":
         # A. 연구 키워드: 지원자의 관심 키워드와 교수님의 연구 키워드 관련 Q&A 비교
         applicant_keyword = applicant_data.get("interest_keyword", "")
         
-        # 모든 답변을 한 번에 임베딩
-        answer_texts = [qa["answer"] for qa in qa_list]
-        all_texts = [applicant_keyword] + answer_texts
-        embeddings = embed_texts(all_texts)
-        
-        applicant_embedding = embeddings[0]
-        answer_embeddings = embeddings[1:]
+        if local:
+            # 로컬 엔진 (사전 계산 테이블 / TF-IDF)
+            similarities = local_similarity_matrix([applicant_keyword], qa_list)[0]
+        else:
+            # 모든 답변을 한 번에 임베딩
+            all_texts = [applicant_keyword] + answer_texts
+            embeddings = embed_texts(all_texts)
+            
+            applicant_embedding = embeddings[0]
+            answer_embeddings = embeddings[1:]
+            similarities = [cosine_similarity(applicant_embedding, embedding) for embedding in answer_embeddings]
         
         # 각 Q&A와의 유사도 계산
         for i, qa in enumerate(qa_list):
-            similarity = cosine_similarity(applicant_embedding, answer_embeddings[i])
+            similarity = similarities[i]
             scores.append(similarity)
             details.append({
                 "question": qa["question"],
@@ -152,31 +160,32 @@ def calculate_indicator_score(
                 "qa_count": len(qa_list)
             }
         
-        # 학습 성향 임베딩 재사용 (캐싱)
-        if learning_style_embeddings is None:
-            learning_style_embeddings = {}
-        
-        # 캐시에 없는 학습 성향만 임베딩
-        style_embeddings = []
-        styles_to_embed = []
-        for style in learning_styles:
-            if style in learning_style_embeddings:
-                style_embeddings.append(learning_style_embeddings[style])
-            else:
-                styles_to_embed.append(style)
-        
-        # 새로 임베딩이 필요한 학습 성향 처리
-        if styles_to_embed:
-            new_embeddings = embed_texts(styles_to_embed)
-            for i, style in enumerate(styles_to_embed):
-                learning_style_embeddings[style] = new_embeddings[i]
-        
-        # 학습 성향 순서대로 임베딩 재구성
-        style_embeddings = [learning_style_embeddings[style] for style in learning_styles]
-        
-        # 답변만 임베딩 (학습 성향은 이미 임베딩됨)
-        answer_texts = [qa["answer"] for qa in qa_list]
-        answer_embeddings = embed_texts(answer_texts)
+        if local:
+            # 로컬 엔진 (사전 계산 테이블 / TF-IDF): [학습 성향][Q&A] 유사도
+            style_similarities = local_similarity_matrix(learning_styles, qa_list)
+        else:
+            # 학습 성향 임베딩 재사용 (캐싱)
+            if learning_style_embeddings is None:
+                learning_style_embeddings = {}
+            
+            # 캐시에 없는 학습 성향만 임베딩
+            styles_to_embed = [style for style in learning_styles if style not in learning_style_embeddings]
+            
+            # 새로 임베딩이 필요한 학습 성향 처리
+            if styles_to_embed:
+                new_embeddings = embed_texts(styles_to_embed)
+                for i, style in enumerate(styles_to_embed):
+                    learning_style_embeddings[style] = new_embeddings[i]
+            
+            # 학습 성향 순서대로 임베딩 재구성
+            style_embeddings = [learning_style_embeddings[style] for style in learning_styles]
+            
+            # 답변만 임베딩 (학습 성향은 이미 임베딩됨)
+            answer_embeddings = embed_texts(answer_texts)
+            style_similarities = [
+                [cosine_similarity(style_embedding, answer_embedding) for answer_embedding in answer_embeddings]
+                for style_embedding in style_embeddings
+            ]
         
         # 각 Q&A에 대해 가장 높은 유사도 찾기
         for i, qa in enumerate(qa_list):
@@ -184,7 +193,7 @@ def calculate_indicator_score(
             best_style = ""
             
             for j, style in enumerate(learning_styles):
-                similarity = cosine_similarity(style_embeddings[j], answer_embeddings[i])
+                similarity = style_similarities[j][i]
                 if similarity > max_similarity:
                     max_similarity = similarity
                     best_style = style
@@ -258,14 +267,18 @@ def calculate_indicator_score(
 def calculate_matching_score(
     applicant_data: Dict,
     professor_id: str,
-    learning_style_embeddings: Optional[Dict[str, List[float]]] = None
+    learning_style_embeddings: Optional[Dict[str, List[float]]] = None,
+    local: bool = False
 ) -> Dict:
     """
     지원자와 교수님 간의 전체 매칭 점수 계산
     
+    OpenAI 서킷이 열려 있거나 계산 중 OpenAI 장애가 나면 로컬 엔진으로 계산합니다.
+    
     Args:
         applicant_data: 지원자 데이터
         professor_id: 교수님 ID
+        local: True면 처음부터 로컬 엔진 사용
     
     Returns:
         {
@@ -275,6 +288,7 @@ def calculate_matching_score(
             "breakdown": 상세 분석
         }
     """
+    check_deadline("1차 적합도 계산")
     indicators = [
         "A. 연구 키워드 (Research Keyword)",
         "B. 연구 방법론 (Research Methodology)",
@@ -298,14 +312,21 @@ def calculate_matching_score(
     weighted_sum = 0
     total_weight = 0
     
-    for indicator in indicators:
-        score_data = calculate_indicator_score(
-            applicant_data, 
-            professor_id, 
-            indicator,
-            learning_style_embeddings
-        )
-        indicator_scores.append(score_data)
+    local = local or openai_breaker.is_open()
+    try:
+        indicator_scores = [
+            calculate_indicator_score(applicant_data, professor_id, indicator, learning_style_embeddings, local)
+            for indicator in indicators
+        ]
+    except OPENAI_UNAVAILABLE:
+        # 계산 도중 서킷이 열렸거나 재시도 후에도 OpenAI 장애: 로컬 엔진으로 다시 계산
+        local = True
+        indicator_scores = [
+            calculate_indicator_score(applicant_data, professor_id, indicator, local=True)
+            for indicator in indicators
+        ]
+    
+    for indicator, score_data in zip(indicators, indicator_scores):
         total_score += score_data["score"]
         
         # 가중 평균 계산
@@ -379,12 +400,14 @@ def match_all_professors(
     
     Returns:
         매칭 점수 리스트 (점수 높은 순으로 정렬)
+    
+    Raises:
+        DeadlineExceeded: 요청 마감 시각까지 모든 교수님의 계산이 끝나지 않은 경우
     """
-    # professor_ids가 없으면 professor_data.json에서 모든 교수님 ID 가져오기
+    check_deadline("매칭 계산")
+    # professor_ids가 없으면 코퍼스(professor_data.json)의 모든 교수님 ID 사용
     if professor_ids is None:
-        with open("professor_data.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        professor_ids = list(set([item["professor_id"] for item in data]))
+        professor_ids = list(set([item["professor_id"] for item in load_corpus()]))
     
     # 학습 성향 임베딩을 미리 생성하여 재사용 (모든 교수님과 indicator에서 공통 사용)
     learning_styles = applicant_data.get("learning_styles", [])
@@ -392,36 +415,51 @@ def match_all_professors(
         learning_styles = [s.strip() for s in learning_styles.split(",")]
     
     learning_style_embeddings = {}
-    if learning_styles:
+    local = openai_breaker.is_open()
+    if learning_styles and not local:
         # 학습 성향을 한 번만 임베딩하여 재사용
-        style_embeddings = embed_texts(learning_styles)
-        for i, style in enumerate(learning_styles):
-            learning_style_embeddings[style] = style_embeddings[i]
+        try:
+            style_embeddings = embed_texts(learning_styles)
+            for i, style in enumerate(learning_styles):
+                learning_style_embeddings[style] = style_embeddings[i]
+        except OPENAI_UNAVAILABLE:
+            # OpenAI 장애: 모든 교수님을 로컬 엔진으로 계산
+            local = True
     
     # 병렬 처리로 여러 교수님의 매칭을 동시에 계산
     results = []
     with ThreadPoolExecutor(max_workers=min(len(professor_ids), 5)) as executor:
         # 각 교수님에 대해 매칭 점수 계산 작업 제출 (학습 성향 임베딩 전달)
+        # 작업 스레드에도 호출한 쪽의 컨텍스트(요청 마감 시각, OpenAI 호출 우선순위)를 전달
         future_to_prof = {
-            executor.submit(calculate_matching_score, applicant_data, prof_id, learning_style_embeddings): prof_id
+            executor.submit(
+                contextvars.copy_context().run,
+                calculate_matching_score, applicant_data, prof_id, learning_style_embeddings, local
+            ): prof_id
             for prof_id in professor_ids
         }
         
-        # 완료된 작업부터 결과 수집
-        for future in as_completed(future_to_prof):
-            try:
-                matching_result = future.result()
-                results.append(matching_result)
-            except Exception as e:
-                prof_id = future_to_prof[future]
-                print(f"교수님 {prof_id} 매칭 계산 중 오류: {e}")
-                # 오류 발생 시 기본 점수로 처리
-                results.append({
-                    "professor_id": prof_id,
-                    "total_score": 70,
-                    "indicator_scores": [],
-                    "breakdown": {"A": 70, "B": 70, "C": 70, "D": 70, "E": 70}
-                })
+        # 완료된 작업부터 결과 수집 (마감 시각이 지나면 남은 작업은 취소하고 중단)
+        try:
+            for future in as_completed(future_to_prof, timeout=remaining()):
+                try:
+                    matching_result = future.result()
+                    results.append(matching_result)
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    prof_id = future_to_prof[future]
+                    print(f"교수님 {prof_id} 매칭 계산 중 오류: {e}")
+                    # 오류 발생 시 기본 점수로 처리
+                    results.append({
+                        "professor_id": prof_id,
+                        "total_score": 70,
+                        "indicator_scores": [],
+                        "breakdown": {"A": 70, "B": 70, "C": 70, "D": 70, "E": 70}
+                    })
+        except (DeadlineExceeded, FuturesTimeoutError):
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise DeadlineExceeded("교수님별 매칭 계산")
     
     # 점수 높은 순으로 정렬
     results.sort(key=lambda x: x["total_score"], reverse=True)
@@ -531,7 +569,9 @@ def generate_matching_rationale(
 매칭 근거:"""
     
     try:
-        response = client.chat.completions.create(
+        content = cached_completion(
+            client,
+            "matching_rationale",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -547,7 +587,7 @@ def generate_matching_rationale(
             max_tokens=500
         )
         
-        rationale = response.choices[0].message.content.strip()
+        rationale = content.strip()
         return rationale
     except Exception as e:
         # 오류 발생 시 기본 템플릿 반환
@@ -653,7 +693,9 @@ def generate_matching_rationale_stream(
     
     try:
         # 스트리밍 응답 생성
-        stream = client.chat.completions.create(
+        stream = cached_completion_stream(
+            client,
+            "matching_rationale",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -666,19 +708,19 @@ def generate_matching_rationale_stream(
                 }
             ],
             temperature=0.7,
-            max_tokens=500,
-            stream=True  # 스트리밍 활성화
+            max_tokens=500
         )
         
         # 스트리밍 응답을 SSE 형식으로 변환
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                yield f"data: {json.dumps({'content': content, 'done': False}, ensure_ascii=False)}\n\n"
+        for content in stream:
+            yield f"data: {json.dumps({'content': content, 'done': False}, ensure_ascii=False)}\n\n"
         
         # 완료 신호
         yield f"data: {json.dumps({'content': '', 'done': True}, ensure_ascii=False)}\n\n"
         
+    except DeadlineExceeded:
+        # 마감이 지난 요청은 대체 문서 없이 중단
+        raise
     except Exception as e:
         # 오류 발생 시 기본 템플릿 반환
         default_text = f"{applicant_name} 학생과 {professor_name} 교수의 매칭은 관심 키워드({applicant_data.get('interest_keyword', '')})와 연구 분야({professor_research_fields})의 일치, 그리고 학습 성향({learning_styles_text})과 교수님의 지도 스타일 간의 시너지를 보입니다. 전체 적합도는 {matching_result['total_score']}점으로, 특히 {highest_name_short} 영역에서 {highest_score}점의 높은 적합도를 보입니다."
@@ -735,6 +777,9 @@ def calculate_chat_based_score(
             "details": []
         }
     
+    # 마감 시각이 지났으면 평가하지 않고 중단 (대체 점수로 리포트를 이어가지 않음)
+    check_deadline("채팅 평가")
+    
     # 대화 내용을 하나의 텍스트로 결합
     conversation_text = "\n".join([f"질문: {q}\n답변: {a}" for q, a in zip(user_questions, professor_answers)])
     
@@ -802,6 +847,8 @@ def calculate_chat_based_score(
                 "relevance": evaluation.get("relevance", 0)
             }
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         # 기본 점수 계산 (대화 길이 기반)
         avg_length = sum(len(msg["content"]) for msg in chat_messages) / len(chat_messages)
@@ -813,8 +860,114 @@ def calculate_chat_based_score(
             "details": {
                 "message_count": len(chat_messages),
                 "avg_length": int(avg_length)
+            },
+            "fallback": True  # LLM 평가 실패 시 대체 점수 (저장/재사용하지 않음)
+        }
+
+
+CHAT_SCORE_CRITERIA = ("depth_quality", "answer_quality", "engagement", "relevance")
+
+
+def evaluate_chat_turn(
+    question: str,
+    answer: str,
+    applicant_data: Dict
+) -> Dict:
+    """
+    질문/답변 한 쌍(턴)만 평가 (대화 전체를 다시 보내지 않음)
+    
+    Returns:
+        {"depth_quality", "answer_quality", "engagement", "relevance"} 각 0-25점
+    """
+    applicant_context = f"관심 키워드: {applicant_data.get('interest_keyword', '')}\n학습 성향: {', '.join(applicant_data.get('learning_styles', []))}"
+    
+    evaluation_prompt = f"""다음은 지원자와 교수님의 대화 중 한 턴(질문 1개와 답변 1개)입니다. 이 턴의 품질과 적합성을 평가해주세요.
+
+지원자 정보:
+{applicant_context}
+
+질문: {question}
+답변: {answer}
+
+평가 기준:
+1. 질문의 깊이와 질 (0-25점)
+2. 교수님 답변의 적절성과 상세도 (0-25점)
+3. 지원자의 관심도와 참여도 (0-25점)
+4. 연구 주제와의 관련성 (0-25점)
+
+각 항목별 점수를 JSON 형식으로 반환해주세요:
+{{
+    "depth_quality": 점수,
+    "answer_quality": 점수,
+    "engagement": 점수,
+    "relevance": 점수
+}}"""
+    
+    response = client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "당신은 대학원 진학 상담 전문가입니다. 지원자와 교수님의 대화를 객관적으로 평가합니다."
+            },
+            {
+                "role": "user",
+                "content": evaluation_prompt
             }
+        ],
+        temperature=0.5,
+        max_tokens=100,
+        response_format={"type": "json_object"}
+    )
+    
+    evaluation = json.loads(response.choices[0].message.content)
+    return {
+        criterion: min(25, max(0, int(evaluation.get(criterion, 0))))
+        for criterion in CHAT_SCORE_CRITERIA
+    }
+
+
+def combine_turn_scores(turn_count: int, criterion_sums: Dict[str, int]) -> Dict:
+    """
+    턴별 평가 누적값으로 채팅 기반 점수 계산 (LLM 호출 없음)
+    
+    Returns:
+        calculate_chat_based_score와 같은 형식
+    """
+    if turn_count <= 0:
+        return {
+            "chat_score": 0,
+            "analysis": "대화가 충분하지 않습니다.",
+            "details": []
         }
+    
+    averages = {criterion: round(criterion_sums.get(criterion, 0) / turn_count) for criterion in CHAT_SCORE_CRITERIA}
+    total_score = sum(averages.values())
+    
+    chat_score = 0
+    if total_score > 0:
+        # 점수를 70-98 범위로 조정 (calculate_chat_based_score와 동일)
+        chat_score = min(98, max(70, int((total_score / 100) * 28 + 70)))
+    
+    labels = {
+        "depth_quality": "질문의 깊이",
+        "answer_quality": "답변의 적절성",
+        "engagement": "관심도와 참여도",
+        "relevance": "연구 주제 관련성"
+    }
+    strongest = max(CHAT_SCORE_CRITERIA, key=lambda criterion: averages[criterion])
+    weakest = min(CHAT_SCORE_CRITERIA, key=lambda criterion: averages[criterion])
+    analysis = (
+        f"{turn_count}개 대화 턴을 평가한 결과 평균 {total_score}점입니다. "
+        f"{labels[strongest]} 점수({averages[strongest]}/25)가 가장 높고, "
+        f"{labels[weakest]} 점수({averages[weakest]}/25)가 상대적으로 낮습니다."
+    )
+    
+    return {
+        "chat_score": chat_score,
+        "analysis": analysis,
+        "details": {**averages, "turn_count": turn_count}
+    }
 
 
 # -----------------------------
@@ -940,7 +1093,9 @@ def generate_final_report(
 리포트:"""
     
     try:
-        response = client.chat.completions.create(
+        content = cached_completion(
+            client,
+            "final_report",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -956,7 +1111,7 @@ def generate_final_report(
             max_tokens=2000
         )
         
-        report = response.choices[0].message.content.strip()
+        report = content.strip()
         return report
     except Exception as e:
         # 기본 리포트 템플릿
@@ -1071,7 +1226,9 @@ def generate_final_report_stream(
             yield f"data: {json.dumps(metadata, ensure_ascii=False)}\n\n"
         
         # 스트리밍 응답 생성
-        stream = client.chat.completions.create(
+        stream = cached_completion_stream(
+            client,
+            "final_report",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -1084,16 +1241,13 @@ def generate_final_report_stream(
                 }
             ],
             temperature=0.5,
-            max_tokens=1800,
-            stream=True  # 스트리밍 활성화
+            max_tokens=1800
         )
         
         # 스트리밍 응답을 SSE 형식으로 변환
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                # 리포트 텍스트 청크 전송
-                yield f"data: {json.dumps({'type': 'content', 'content': content, 'done': False}, ensure_ascii=False)}\n\n"
+        for content in stream:
+            # 리포트 텍스트 청크 전송
+            yield f"data: {json.dumps({'type': 'content', 'content': content, 'done': False}, ensure_ascii=False)}\n\n"
         
         # 완료 신호 (메타데이터 포함)
         completion_data = {
@@ -1109,6 +1263,9 @@ def generate_final_report_stream(
             })
         yield f"data: {json.dumps(completion_data, ensure_ascii=False)}\n\n"
         
+    except DeadlineExceeded:
+        # 마감이 지난 요청은 대체 문서 없이 중단
+        raise
     except Exception as e:
         # 오류 발생 시 기본 리포트 템플릿 반환
         default_report = f"""{applicant_name} 학생과 {professor_name} 교수 매칭 리포트
@@ -1266,7 +1423,9 @@ Advisor.AI 분석 결과:
 이메일 초안:"""
     
     try:
-        response = client.chat.completions.create(
+        content = cached_completion(
+            client,
+            "email_draft",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -1282,7 +1441,7 @@ Advisor.AI 분석 결과:
             max_tokens=2000
         )
         
-        email_draft = response.choices[0].message.content.strip()
+        email_draft = content.strip()
         # 마크다운 제거
         email_draft = remove_markdown(email_draft)
         return email_draft
@@ -1368,7 +1527,9 @@ def generate_email_draft_stream(
     
     try:
         # 스트리밍 응답 생성
-        stream = client.chat.completions.create(
+        stream = cached_completion_stream(
+            client,
+            "email_draft",
             model=CHAT_MODEL,
             messages=[
                 {
@@ -1381,22 +1542,22 @@ def generate_email_draft_stream(
                 }
             ],
             temperature=0.2,  # 더 빠른 응답
-            max_tokens=800,  # 더 짧게
-            stream=True  # 스트리밍 활성화
+            max_tokens=800  # 더 짧게
         )
         
         # 스트리밍 응답을 SSE 형식으로 변환
         # 줄바꿈을 보존하기 위해 각 청크를 그대로 전송 (마크다운은 프롬프트에서 금지했으므로 최소한만)
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                # 줄바꿈은 그대로 유지하고 전송 (마크다운은 프롬프트에서 금지했으므로 최소한만 제거)
-                # 실시간 스트리밍을 위해 각 청크를 그대로 전송
-                yield f"data: {json.dumps({'content': content, 'done': False}, ensure_ascii=False)}\n\n"
+        for content in stream:
+            # 줄바꿈은 그대로 유지하고 전송 (마크다운은 프롬프트에서 금지했으므로 최소한만 제거)
+            # 실시간 스트리밍을 위해 각 청크를 그대로 전송
+            yield f"data: {json.dumps({'content': content, 'done': False}, ensure_ascii=False)}\n\n"
         
         # 완료 신호
         yield f"data: {json.dumps({'content': '', 'done': True}, ensure_ascii=False)}\n\n"
         
+    except DeadlineExceeded:
+        # 마감이 지난 요청은 대체 문서 없이 중단
+        raise
     except Exception as e:
         # 오류 발생 시 기본 이메일 템플릿 반환
         score_text = f"{final_score}%의 높은 적합도" if final_score else "높은 적합도"
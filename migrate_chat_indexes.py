@@ -0,0 +1,37 @@
+"""
+채팅 테이블 인덱스 마이그레이션
+- 중복된 (지원자, 교수님) 채팅 세션을 가장 오래된 세션으로 병합
+- chat_sessions(applicant_id, professor_id) unique 인덱스 및 채팅 메시지 복합 인덱스 생성
+"""
+from sqlalchemy import inspect
+from database import engine, init_db, merge_duplicate_chat_sessions
+from database import backfill_chat_session_counters, _add_missing_columns
+
+
+def merge_duplicate_sessions():
+    """같은 지원자-교수님 조합의 중복 세션을 하나로 병합 (서버 시작 시 init_db도 같은 병합을 수행)"""
+    try:
+        if not merge_duplicate_chat_sessions():
+            print("✅ 중복된 채팅 세션이 없습니다.")
+    except Exception as e:
+        print(f"❌ 세션 병합 중 오류가 발생했습니다: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    print("=== 채팅 인덱스 마이그레이션 ===\n")
+    # 세션 조회 전에 새 컬럼(message_count 등) 추가
+    added_columns = _add_missing_columns()
+    if added_columns:
+        print(f"새 컬럼 추가: {', '.join(added_columns)}")
+        backfill_chat_session_counters()
+    merge_duplicate_sessions()
+
+    print("\n인덱스 생성 중...")
+    init_db()
+
+    inspector = inspect(engine)
+    for table in ("chat_sessions", "chat_messages"):
+        index_names = [index["name"] for index in inspector.get_indexes(table)]
+        print(f"  - {table}: {', '.join(index_names)}")
+    print("\n마이그레이션 완료!")
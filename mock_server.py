@@ -0,0 +1,449 @@
+"""
+OpenAI / Pinecone 대체(mock) 서버 (부하 테스트 / 용량 계획용)
+- OpenAI: POST /v1/embeddings, POST /v1/chat/completions (스트리밍 / 비스트리밍)
+- Pinecone: POST /query, POST /vectors/upsert, POST /describe_index_stats
+- 지연 분포, 첫 토큰까지 시간(TTFT), 토큰 생성 속도, 오류(5xx / 429) 주입
+- 임베딩은 로컬 임베딩(embedding_provider.LocalEmbeddingProvider)이라 검색 결과도 실제와 비슷하게 나옴
+
+사용법:
+    python mock_server.py
+    # API 서버 쪽 설정
+    OPENAI_BASE_URL=http://localhost:8100/v1
+    PINECONE_HOST=http://localhost:8100
+
+지연 분포 형식: "fixed:ms", "uniform:최소ms:최대ms", "normal:평균ms:표준편차ms", "lognormal:중앙값ms:sigma"
+실행 중 설정 변경: PUT /mock/config {"error_rate": 0.1, "chat_ttft": "fixed:2000"} / 통계: GET /mock/stats
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from corpus import load_corpus, chunk_text, filter_metadata
+from embedding_provider import LOCAL_EMBEDDING_DIMENSION, LocalEmbeddingProvider
+
+# 환경 변수 로드
+load_dotenv()
+
+MOCK_SERVER_HOST = os.getenv("MOCK_SERVER_HOST", "0.0.0.0")
+MOCK_SERVER_PORT = int(os.getenv("MOCK_SERVER_PORT", "8100"))
+
+# 기본값은 gpt-4o-mini / text-embedding-3-small / Pinecone serverless의 일반적인 지연 수준
+mock_config = {
+    "embedding_latency": os.getenv("MOCK_EMBEDDING_LATENCY", "lognormal:120:0.4"),
+    "chat_ttft": os.getenv("MOCK_CHAT_TTFT", "lognormal:500:0.5"),
+    "chat_tokens_per_second": float(os.getenv("MOCK_CHAT_TOKENS_PER_SECOND", "60")),
+    "chat_completion_tokens": int(os.getenv("MOCK_CHAT_COMPLETION_TOKENS", "250")),  # max_tokens가 더 작으면 max_tokens
+    "pinecone_latency": os.getenv("MOCK_PINECONE_LATENCY", "lognormal:40:0.3"),
+    "error_rate": float(os.getenv("MOCK_ERROR_RATE", "0")),  # 5xx 비율
+    "rate_limit_rate": float(os.getenv("MOCK_RATE_LIMIT_RATE", "0")),  # 429 비율 (OpenAI 엔드포인트만)
+    "retry_after_seconds": float(os.getenv("MOCK_RETRY_AFTER_SECONDS", "1")),
+    "preload_corpus": os.getenv("MOCK_PINECONE_PRELOAD", "true").lower() == "true"  # 시작 시 코퍼스를 인덱스에 적재
+}
+
+# 미리 계산한 코퍼스 임베딩 (generate_corpus.py --embeddings local의 embeddings.npy, 없으면 시작 시 로컬 임베딩으로 계산)
+MOCK_PINECONE_EMBEDDINGS = os.getenv("MOCK_PINECONE_EMBEDDINGS")
+
+_random = random.Random(int(os.getenv("MOCK_SEED", "42")))
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+# 응답 문장 (토큰 수 계산은 글자 2개 = 토큰 1개로 근사)
+MOCK_ANSWER = (
+    "좋은 질문입니다. 저는 연구를 시작할 때 선행연구를 충분히 검토하고, 실제 현장의 사례를 바탕으로 "
+    "문제를 정의하는 것을 중요하게 생각합니다. 학생들과는 정기적으로 만나 진행 상황을 함께 점검하고, "
+    "필요한 경우 구체적인 피드백을 드리고 있습니다. 관심 있는 주제가 있다면 편하게 이야기해 주세요. "
+)
+CHARS_PER_TOKEN = 2
+
+app = FastAPI(title="AI Adviser Mock Upstream", description="OpenAI / Pinecone 대체 서버 (부하 테스트용)")
+
+
+# -----------------------------
+# 1. 지연 분포 / 오류 주입
+# -----------------------------
+def parse_latency(spec: str) -> Callable[[], float]:
+    """지연 분포 문자열 → 샘플 함수 (초)"""
+    kind, *args = spec.split(":")
+    values = [float(a) / 1000 for a in args]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: _random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, _random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        median, sigma = values[0], float(args[1])
+        return lambda: _random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"알 수 없는 지연 분포입니다: {spec}")
+
+
+def _sample(key: str) -> float:
+    return parse_latency(mock_config[key])()
+
+
+def _count(endpoint: str, key: str):
+    with _lock:
+        stats = _stats.setdefault(endpoint, {"requests": 0, "errors": 0, "rate_limited": 0})
+        stats[key] += 1
+
+
+def _injected_error(endpoint: str, openai_api: bool = True) -> Optional[JSONResponse]:
+    """설정된 비율로 429 / 500 응답 (없으면 None)"""
+    _count(endpoint, "requests")
+    roll = _random.random()
+    if openai_api and roll < mock_config["rate_limit_rate"]:
+        _count(endpoint, "rate_limited")
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+            headers={"Retry-After": str(mock_config["retry_after_seconds"])}
+        )
+    if roll < mock_config["rate_limit_rate"] + mock_config["error_rate"]:
+        _count(endpoint, "errors")
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": "The server had an error (mock)", "type": "server_error", "code": None}}
+        )
+    return None
+
+
+# -----------------------------
+# 2. OpenAI 임베딩
+# -----------------------------
+_embedders: Dict[int, LocalEmbeddingProvider] = {}
+
+
+def _embedder(dimension: int) -> LocalEmbeddingProvider:
+    with _lock:
+        if dimension not in _embedders:
+            _embedders[dimension] = LocalEmbeddingProvider(dimension)
+        return _embedders[dimension]
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    error = _injected_error("embeddings")
+    await asyncio.sleep(_sample("embedding_latency"))
+    if error is not None:
+        return error
+
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    vectors = _embedder(int(body.get("dimensions") or LOCAL_EMBEDDING_DIMENSION)).embed_texts(inputs)
+    prompt_tokens = sum(max(1, len(text) // CHARS_PER_TOKEN) for text in inputs)
+    return {
+        "object": "list",
+        "model": body.get("model", "text-embedding-3-small"),
+        "data": [{"object": "embedding", "index": i, "embedding": vector} for i, vector in enumerate(vectors)],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+    }
+
+
+# -----------------------------
+# 3. OpenAI Chat Completions
+# -----------------------------
+def _completion_text(body: Dict) -> str:
+    """요청 형식에 맞는 응답 (JSON 모드면 채팅 평가 항목 점수)"""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        scores = {key: _random.randint(15, 25) for key in ("depth_quality", "answer_quality", "engagement", "relevance")}
+        return json.dumps({**scores, "total_score": sum(scores.values()), "analysis": "대화가 구체적이고 연구 주제와 잘 맞습니다."}, ensure_ascii=False)
+
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens") or mock_config["chat_completion_tokens"]
+    length = min(max_tokens, mock_config["chat_completion_tokens"]) * CHARS_PER_TOKEN
+    return (MOCK_ANSWER * (length // len(MOCK_ANSWER) + 1))[:length]
+
+
+def _usage(body: Dict, text: str) -> Dict:
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // CHARS_PER_TOKEN
+    completion_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = _injected_error("chat_completions")
+    ttft = _sample("chat_ttft")
+    if error is not None:
+        await asyncio.sleep(ttft)
+        return error
+
+    text = _completion_text(body)
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+    model = body.get("model", "gpt-4o-mini")
+    created = int(time.time())
+    token_interval = 1 / mock_config["chat_tokens_per_second"]
+
+    if not body.get("stream"):
+        await asyncio.sleep(ttft + token_interval * max(1, len(text) // CHARS_PER_TOKEN))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": _usage(body, text)
+        }
+
+    def chunk(delta: Dict, finish_reason: Optional[str] = None) -> str:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def stream():
+        await asyncio.sleep(ttft)
+        yield chunk({"role": "assistant", "content": ""})
+        for start in range(0, len(text), CHARS_PER_TOKEN):
+            yield chunk({"content": text[start:start + CHARS_PER_TOKEN]})
+            await asyncio.sleep(token_interval)
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# -----------------------------
+# 4. Pinecone (인메모리 인덱스)
+# -----------------------------
+class _Namespace:
+    """
+    네임스페이스 1개의 벡터 (행렬 + id 목록 + 메타데이터)
+
+    업서트는 새 행렬 / 목록을 만들어 교체하므로(copy-on-write), 검색은 잠금 안에서
+    현재 값을 잡은 뒤 잠금 밖(스레드)에서 계산해도 안전합니다.
+    """
+
+    def __init__(self, dimension: int):
+        self.matrix = np.empty((0, dimension), dtype=np.float32)
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        self.rows: Dict[str, int] = {}  # id → 행 번호
+
+    def upsert(self, ids: List[str], matrix: np.ndarray, metadata: List[Dict]):
+        """같은 id는 행을 교체하고 새 id는 행렬 끝에 추가 (한 요청 안의 중복 id는 마지막 값 사용)"""
+        rows = dict(self.rows)
+        stored_ids = list(self.ids)
+        stored_metadata = list(self.metadata)
+        replaced_rows, replaced, added = [], [], []
+        for vector_id, index in {vector_id: index for index, vector_id in enumerate(ids)}.items():
+            row = rows.get(vector_id)
+            if row is None:
+                rows[vector_id] = len(stored_ids)
+                stored_ids.append(vector_id)
+                stored_metadata.append(metadata[index])
+                added.append(index)
+            else:
+                stored_metadata[row] = metadata[index]
+                replaced_rows.append(row)
+                replaced.append(index)
+
+        stored = self.matrix
+        if replaced:
+            stored = stored.copy()
+            stored[replaced_rows] = matrix[replaced]
+        if added:
+            stored = np.vstack([stored, matrix[added]])
+        self.matrix, self.ids, self.metadata, self.rows = stored, stored_ids, stored_metadata, rows
+
+
+_vectors: Dict[str, _Namespace] = {}
+
+
+def _upsert(ids: List[str], matrix: np.ndarray, metadata: List[Dict], namespace: str = "") -> int:
+    """벡터 행렬 업서트 (행 순서는 ids / metadata와 같음, 네임스페이스 차원과 다르면 ValueError)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    with _lock:
+        store = _vectors.get(namespace)
+        if store is None:
+            store = _vectors[namespace] = _Namespace(matrix.shape[1])
+        if matrix.shape[1] != store.matrix.shape[1]:
+            raise ValueError(f"벡터 차원 {matrix.shape[1]}이 네임스페이스 차원 {store.matrix.shape[1]}과 다릅니다.")
+        store.upsert(ids, matrix, metadata)
+    return len(ids)
+
+
+def _matches_filter(metadata: Dict, filter_: Optional[Dict]) -> bool:
+    """Pinecone 메타데이터 필터 중 코드에서 쓰는 형식만 지원 ($eq / $in / 값 직접 비교)"""
+    for field, condition in (filter_ or {}).items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _top_matches(matrix: np.ndarray, metadata: List[Dict], vector: np.ndarray, top_k: int, filter_: Optional[Dict]):
+    """
+    유사도 상위 top_k개 [(행 번호, 점수)]
+
+    행렬-벡터 곱 한 번으로 전체 점수를 계산합니다. 필터가 없으면 상위 top_k만 부분 정렬하고,
+    필터가 있으면 점수 순으로 훑으며 조건에 맞는 행을 top_k개까지 고릅니다.
+    """
+    if not len(matrix) or top_k <= 0:
+        return []
+    # 로컬 임베딩 / OpenAI 임베딩 모두 L2 정규화되어 있으므로 내적 = 코사인 유사도
+    scores = matrix @ vector
+    if not filter_:
+        top = np.argpartition(-scores, top_k - 1)[:top_k] if top_k < len(scores) else np.arange(len(scores))
+        return [(int(row), float(scores[row])) for row in top[np.argsort(-scores[top], kind="stable")]]
+    matches = []
+    for row in np.argsort(-scores, kind="stable"):
+        if _matches_filter(metadata[row], filter_):
+            matches.append((int(row), float(scores[row])))
+            if len(matches) == top_k:
+                break
+    return matches
+
+
+@app.post("/vectors/upsert")
+async def pinecone_upsert(request: Request):
+    body = await request.json()
+    error = _injected_error("pinecone_upsert", openai_api=False)
+    await asyncio.sleep(_sample("pinecone_latency"))
+    if error is not None:
+        return error
+    vectors = body.get("vectors", [])
+    if not vectors:
+        return {"upsertedCount": 0}
+    try:
+        count = _upsert(
+            [vector["id"] for vector in vectors],
+            np.array([vector["values"] for vector in vectors], dtype=np.float32),
+            [vector.get("metadata") or {} for vector in vectors],
+            body.get("namespace", "")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"upsertedCount": count}
+
+
+@app.post("/query")
+async def pinecone_query(request: Request):
+    body = await request.json()
+    error = _injected_error("pinecone_query", openai_api=False)
+    await asyncio.sleep(_sample("pinecone_latency"))
+    if error is not None:
+        return error
+
+    vector = body.get("vector")
+    if not vector:
+        raise HTTPException(status_code=400, detail="vector가 필요합니다.")
+    namespace = body.get("namespace", "")
+    top_k = int(body.get("topK", body.get("top_k", 10)))
+    with _lock:
+        store = _vectors.get(namespace)
+        matrix, ids, metadata = (store.matrix, store.ids, store.metadata) if store else (None, [], [])
+    if matrix is not None and len(vector) != matrix.shape[1]:
+        raise HTTPException(status_code=400, detail=f"벡터 차원 {len(vector)}이 인덱스 차원 {matrix.shape[1]}과 다릅니다.")
+    # 점수 계산은 이벤트 루프를 막지 않도록 스레드에서 실행
+    top = await run_in_threadpool(
+        _top_matches, matrix, metadata, np.asarray(vector, dtype=np.float32), top_k, body.get("filter")
+    ) if ids else []
+
+    include_values = body.get("includeValues", body.get("include_values", False))
+    include_metadata = body.get("includeMetadata", body.get("include_metadata", False))
+    matches = []
+    for row, score in top:
+        match = {"id": ids[row], "score": score, "values": matrix[row].tolist() if include_values else []}
+        if include_metadata:
+            match["metadata"] = metadata[row]
+        matches.append(match)
+    return {"matches": matches, "namespace": namespace, "usage": {"readUnits": 1}}
+
+
+@app.post("/describe_index_stats")
+async def pinecone_describe_index_stats():
+    with _lock:
+        namespaces = {name: {"vectorCount": len(store.ids)} for name, store in _vectors.items()}
+    return {
+        "namespaces": namespaces,
+        "dimension": LOCAL_EMBEDDING_DIMENSION,
+        "indexFullness": 0.0,
+        "totalVectorCount": sum(ns["vectorCount"] for ns in namespaces.values())
+    }
+
+
+# -----------------------------
+# 5. 설정 / 통계
+# -----------------------------
+@app.get("/mock/config")
+async def get_config():
+    return mock_config
+
+
+@app.put("/mock/config")
+async def update_config(request: Request):
+    """실행 중 설정 변경 (알 수 없는 키는 400)"""
+    changes = await request.json()
+    unknown = set(changes) - set(mock_config)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 설정입니다: {', '.join(sorted(unknown))}")
+    for key, value in changes.items():
+        if key.endswith("_latency") or key == "chat_ttft":
+            try:
+                parse_latency(value)
+            except (ValueError, IndexError):
+                raise HTTPException(status_code=400, detail=f"지연 분포 형식이 올바르지 않습니다: {value}")
+    mock_config.update(changes)
+    return mock_config
+
+
+@app.get("/mock/stats")
+async def get_stats():
+    with _lock:
+        return {
+            "endpoints": {endpoint: dict(stats) for endpoint, stats in _stats.items()},
+            "vectors": {name: len(store.ids) for name, store in _vectors.items()}
+        }
+
+
+def _precomputed_vectors(count: int) -> Optional[np.ndarray]:
+    """MOCK_PINECONE_EMBEDDINGS의 임베딩 행렬 (행 수 / 차원이 코퍼스와 맞지 않으면 None)"""
+    if not MOCK_PINECONE_EMBEDDINGS:
+        return None
+    matrix = np.load(MOCK_PINECONE_EMBEDDINGS, mmap_mode="r")
+    if matrix.shape != (count, LOCAL_EMBEDDING_DIMENSION):
+        print(f"[mock] 임베딩 파일 크기 {matrix.shape}가 코퍼스 ({count}, {LOCAL_EMBEDDING_DIMENSION})와 달라 다시 계산합니다.")
+        return None
+    return matrix
+
+
+@app.on_event("startup")
+async def preload_corpus():
+    """코퍼스를 로컬 임베딩으로 인덱스에 적재 (embadding.py를 돌리지 않아도 검색 결과가 나오도록)"""
+    if not mock_config["preload_corpus"]:
+        return
+    corpus = load_corpus()
+    matrix = _precomputed_vectors(len(corpus))
+    if matrix is None:
+        matrix = _embedder(LOCAL_EMBEDDING_DIMENSION).embed_matrix([chunk_text(item) for item in corpus]).toarray()
+    count = _upsert([item["chunk_id"] for item in corpus], matrix, [filter_metadata(item) for item in corpus])
+    print(f"[mock] 코퍼스 {count}개 벡터 적재 완료")
+
+
+# -----------------------------
+# 서버 실행
+# -----------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=MOCK_SERVER_HOST, port=MOCK_SERVER_PORT)
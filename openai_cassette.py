@@ -0,0 +1,204 @@
+"""
+OpenAI 호출 녹화 / 재생 (cassette)
+- record: 모든 embeddings / chat completions 요청과 응답을 cassette 파일(JSONL)에 기록
+  (스트리밍은 청크마다 요청 시작 후 경과 시간도 기록)
+- replay: 같은 요청이면 기록된 응답을 반환 (네트워크 호출 없음, 없는 요청은 CassetteMissError)
+  지연은 기록된 그대로(original) 또는 없이(zero) 재현
+- 같은 요청이 여러 번 기록되어 있으면 기록 순서대로 돌아가며 반환 (temperature > 0인 응답 재현)
+
+벤치마크를 모델 응답 / 네트워크 변동 없이 반복 실행할 때 사용합니다.
+    OPENAI_CASSETTE_MODE=record OPENAI_CASSETTE_PATH=cassettes/match.jsonl python ...
+    OPENAI_CASSETTE_MODE=replay OPENAI_CASSETTE_PATH=cassettes/match.jsonl python ...
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List
+from openai.types import CreateEmbeddingResponse
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from dotenv import load_dotenv
+from openai_singleflight import request_key
+
+# 환경 변수 로드
+load_dotenv()
+
+OPENAI_CASSETTE_MODE = os.getenv("OPENAI_CASSETTE_MODE", "off").lower()  # off | record | replay
+OPENAI_CASSETTE_PATH = os.getenv("OPENAI_CASSETTE_PATH", "cassettes/openai.jsonl")
+OPENAI_CASSETTE_LATENCY = os.getenv("OPENAI_CASSETTE_LATENCY", "original").lower()  # original | zero
+
+# 요청 키에서 제외하는 파라미터 (응답 내용과 무관)
+_IGNORED_PARAMS = ("timeout",)
+
+_RESPONSE_TYPES = {
+    "embeddings": CreateEmbeddingResponse,
+    "chat_completions": ChatCompletion
+}
+
+
+class CassetteMissError(LookupError):
+    """재생 모드에서 cassette에 없는 요청"""
+
+    def __init__(self, operation: str, path: str):
+        super().__init__(f"cassette에 기록되지 않은 {operation} 요청입니다: {path} (OPENAI_CASSETTE_MODE=record로 다시 녹화하세요)")
+
+
+def cassette_key(operation: str, params: Dict) -> str:
+    return request_key(operation, {k: v for k, v in params.items() if k not in _IGNORED_PARAMS})
+
+
+class Cassette:
+    """cassette 파일 1개 (JSONL, 한 줄에 요청 1개)"""
+
+    def __init__(self, path: str = OPENAI_CASSETTE_PATH, latency: str = OPENAI_CASSETTE_LATENCY):
+        self.path = path
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._loaded = False
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    # -----------------------------
+    # 1. 녹화
+    # -----------------------------
+    def append(self, entry: Dict):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.stats["recorded"] += 1
+
+    def record(self, operation: str, params: Dict, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        response = fn()
+        self.append({
+            "key": cassette_key(operation, params),
+            "operation": operation,
+            "request": params,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "response": response.model_dump(mode="json")
+        })
+        return response
+
+    def record_stream(self, params: Dict, fn: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """스트림을 그대로 전달하면서 청크와 경과 시간 기록 (스트림은 바로 열어 오류가 호출 시점에 나도록 함)"""
+        started = time.monotonic()
+        return self._recording(params, fn(), started)
+
+    def _recording(self, params: Dict, upstream: Iterator[Any], started: float) -> Iterator[Any]:
+        """끝까지 읽은 스트림만 저장"""
+        chunks = []
+        for chunk in upstream:
+            chunks.append({
+                "offset_ms": round((time.monotonic() - started) * 1000, 1),
+                "chunk": chunk.model_dump(mode="json")
+            })
+            yield chunk
+        self.append({
+            "key": cassette_key("chat_completions_stream", params),
+            "operation": "chat_completions_stream",
+            "request": params,
+            "chunks": chunks
+        })
+
+    # -----------------------------
+    # 2. 재생
+    # -----------------------------
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries.setdefault(entry["key"], []).append(entry)
+            self._loaded = True
+
+    def _next(self, operation: str, params: Dict) -> Dict:
+        self._load()
+        key = cassette_key(operation, params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMissError(operation, self.path)
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.stats["replayed"] += 1
+            return entries[cursor % len(entries)]
+
+    def replay(self, operation: str, params: Dict) -> Any:
+        entry = self._next(operation, params)
+        if self.latency == "original":
+            time.sleep(entry["latency_ms"] / 1000)
+        return _RESPONSE_TYPES[operation].model_validate(entry["response"])
+
+    def replay_stream(self, params: Dict) -> Iterator[Any]:
+        # 없는 요청이면 스트림을 읽기 전(호출 시점)에 CassetteMissError
+        return self._replaying(self._next("chat_completions_stream", params))
+
+    def _replaying(self, entry: Dict) -> Iterator[Any]:
+        started = time.monotonic()
+        for recorded in entry["chunks"]:
+            if self.latency == "original":
+                delay = recorded["offset_ms"] / 1000 - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield ChatCompletionChunk.model_validate(recorded["chunk"])
+
+
+# 프로세스 공유 cassette (모든 클라이언트가 같은 파일에 녹화 / 재생)
+openai_cassette = Cassette()
+
+
+# -----------------------------
+# 3. OpenAI 클라이언트 래퍼
+# -----------------------------
+class _Embeddings:
+    def __init__(self, client, cassette: Cassette, mode: str):
+        self._client = client
+        self._cassette = cassette
+        self._mode = mode
+
+    def create(self, **params):
+        if self._mode == "replay":
+            return self._cassette.replay("embeddings", params)
+        return self._cassette.record("embeddings", params, lambda: self._client.embeddings.create(**params))
+
+
+class _Completions:
+    def __init__(self, client, cassette: Cassette, mode: str):
+        self._client = client
+        self._cassette = cassette
+        self._mode = mode
+
+    def create(self, **params):
+        if params.get("stream"):
+            if self._mode == "replay":
+                return self._cassette.replay_stream(params)
+            return self._cassette.record_stream(params, lambda: self._client.chat.completions.create(**params))
+        if self._mode == "replay":
+            return self._cassette.replay("chat_completions", params)
+        return self._cassette.record("chat_completions", params, lambda: self._client.chat.completions.create(**params))
+
+
+class _Chat:
+    def __init__(self, client, cassette: Cassette, mode: str):
+        self.completions = _Completions(client, cassette, mode)
+
+
+class CassetteOpenAI:
+    """업스트림 OpenAI 클라이언트를 녹화(record)하거나 cassette로 대체(replay)하는 래퍼"""
+
+    def __init__(self, client, mode: str = OPENAI_CASSETTE_MODE, cassette: Cassette = openai_cassette):
+        self._client = client
+        self.embeddings = _Embeddings(client, cassette, mode)
+        self.chat = _Chat(client, cassette, mode)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,254 @@
+"""
+공유 OpenAI 클라이언트
+- 프로세스당 httpx 연결 풀 1개 (keep-alive, 선택적으로 HTTP/2)
+- 호출 종류별 타임아웃 (embedding / completion / 스트리밍 청크 간, 요청 마감까지 남은 시간 이내)
+- 연결 재사용 통계 (새 연결 / 재사용 / HTTP 버전)
+- 업스트림 호출 결과를 서킷 브레이커에 기록 (열려 있으면 호출하지 않고 CircuitOpenError)
+- create_openai_client(): single-flight → governor → (녹화 / 재생) → 타임아웃 / 서킷 → OpenAI 순으로 감싼 클라이언트
+"""
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+import httpx
+import openai
+from openai import OpenAI
+from dotenv import load_dotenv
+from deadline import check_deadline, remaining
+from circuit_breaker import CircuitOpenError, openai_breaker
+from openai_governor import INTERACTIVE, GovernedOpenAI
+from openai_singleflight import CoalescingOpenAI
+from openai_cassette import OPENAI_CASSETTE_MODE, CassetteOpenAI
+
+# 환경 변수 로드
+load_dotenv()
+
+# 대체 서버(mock_server.py 등)를 쓸 때 지정 (없으면 OpenAI 기본 주소)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() == "true"
+OPENAI_POOL_MAX_CONNECTIONS = int(os.getenv("OPENAI_POOL_MAX_CONNECTIONS", "50"))
+OPENAI_POOL_MAX_KEEPALIVE = int(os.getenv("OPENAI_POOL_MAX_KEEPALIVE", "20"))
+OPENAI_POOL_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_POOL_KEEPALIVE_EXPIRY", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_EMBEDDING_TIMEOUT = float(os.getenv("OPENAI_EMBEDDING_TIMEOUT", "20"))
+OPENAI_COMPLETION_TIMEOUT = float(os.getenv("OPENAI_COMPLETION_TIMEOUT", "60"))
+OPENAI_STREAM_READ_TIMEOUT = float(os.getenv("OPENAI_STREAM_READ_TIMEOUT", "30"))  # 스트림 청크 사이 최대 대기
+
+# 호출 종류별 타임아웃 (연결은 공통, 읽기는 종류별)
+EMBEDDING_TIMEOUT = httpx.Timeout(OPENAI_EMBEDDING_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+COMPLETION_TIMEOUT = httpx.Timeout(OPENAI_COMPLETION_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+STREAM_TIMEOUT = httpx.Timeout(OPENAI_STREAM_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+# 업스트림 장애로 보는 오류 (서킷 실패로 집계, 타임아웃 / 연결 오류 / 5xx)
+UPSTREAM_FAILURES = (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+# 호출한 쪽이 로컬 엔진으로 대체할 오류 (서킷 열림 또는 재시도 후에도 남은 업스트림 장애)
+OPENAI_UNAVAILABLE = (CircuitOpenError,) + UPSTREAM_FAILURES
+
+
+# -----------------------------
+# 1. 연결 재사용 통계
+# -----------------------------
+class ConnectionStats:
+    """응답마다 사용된 연결이 새 연결인지 재사용인지 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = weakref.WeakSet()  # 지금까지 사용된 연결 (닫히면 자동 제거)
+        self.stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+        self.http_versions: Dict[str, int] = {}
+
+    def record(self, network_stream, http_version: str):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.http_versions[http_version] = self.http_versions.get(http_version, 0) + 1
+            if network_stream is None:
+                return
+            if network_stream in self._seen:
+                self.stats["reused_connections"] += 1
+            else:
+                self._seen.add(network_stream)
+                self.stats["new_connections"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counted = self.stats["new_connections"] + self.stats["reused_connections"]
+            return {
+                **self.stats,
+                "reuse_rate": round(self.stats["reused_connections"] / counted, 4) if counted else 0.0,
+                "http_versions": dict(self.http_versions)
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """연결 재사용 통계를 남기는 httpx 전송 계층"""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle_request(request)
+        connection_stats.record(response.extensions.get("network_stream"), response.http_version)
+        return response
+
+    def open_connections(self) -> int:
+        return len(getattr(self._pool, "connections", []))
+
+
+# -----------------------------
+# 2. 공유 연결 풀 / 클라이언트
+# -----------------------------
+_lock = threading.Lock()
+_transport: Optional[_CountingTransport] = None
+_http_client: Optional[httpx.Client] = None
+_http2_enabled = False
+_openai_clients: Dict[str, OpenAI] = {}
+
+
+def _http2_available() -> bool:
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("OPENAI_HTTP2=true 이지만 h2 패키지가 없어 HTTP/1.1을 사용합니다. (pip install httpx[http2])")
+        return False
+
+
+def get_http_client() -> httpx.Client:
+    """프로세스 공유 httpx 클라이언트 (최초 호출 시 생성)"""
+    global _transport, _http_client, _http2_enabled
+    with _lock:
+        if _http_client is None:
+            _http2_enabled = _http2_available()
+            _transport = _CountingTransport(
+                http2=_http2_enabled,
+                limits=httpx.Limits(
+                    max_connections=OPENAI_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_POOL_KEEPALIVE_EXPIRY
+                )
+            )
+            _http_client = httpx.Client(transport=_transport, timeout=COMPLETION_TIMEOUT)
+        return _http_client
+
+
+def _get_openai(api_key: str) -> OpenAI:
+    """API 키별 OpenAI 클라이언트 (모두 같은 연결 풀 사용, 재시도는 governor가 담당)"""
+    http_client = get_http_client()
+    with _lock:
+        if api_key not in _openai_clients:
+            _openai_clients[api_key] = OpenAI(
+                api_key=api_key,
+                base_url=OPENAI_BASE_URL,
+                http_client=http_client,
+                timeout=COMPLETION_TIMEOUT,
+                max_retries=0
+            )
+        return _openai_clients[api_key]
+
+
+def _call_timeout(default: httpx.Timeout) -> httpx.Timeout:
+    """호출 종류별 타임아웃을 요청 마감까지 남은 시간으로 줄임"""
+    check_deadline("OpenAI 호출")
+    left = remaining()
+    if left is None or left >= max(default.read, default.connect):
+        return default
+    return httpx.Timeout(min(default.read, left), connect=min(default.connect, left))
+
+
+def _guarded(fn: Callable[[], Any]) -> Any:
+    """서킷 브레이커를 거치는 업스트림 호출 (스트림은 열릴 때까지의 결과만 기록)"""
+    openai_breaker.before_call()
+    started = time.monotonic()
+    try:
+        result = fn()
+    except UPSTREAM_FAILURES:
+        openai_breaker.on_failure()
+        raise
+    except BaseException:
+        # 4xx / 429 등은 업스트림 장애가 아님
+        openai_breaker.on_ignored()
+        raise
+    openai_breaker.on_success((time.monotonic() - started) * 1000)
+    return result
+
+
+class _TimedEmbeddings:
+    def __init__(self, client: OpenAI):
+        self._client = client
+
+    def create(self, **params):
+        params.setdefault("timeout", _call_timeout(EMBEDDING_TIMEOUT))
+        return _guarded(lambda: self._client.embeddings.create(**params))
+
+
+class _TimedCompletions:
+    def __init__(self, client: OpenAI):
+        self._client = client
+
+    def create(self, **params):
+        params.setdefault("timeout", _call_timeout(STREAM_TIMEOUT if params.get("stream") else COMPLETION_TIMEOUT))
+        return _guarded(lambda: self._client.chat.completions.create(**params))
+
+
+class _TimedChat:
+    def __init__(self, client: OpenAI):
+        self.completions = _TimedCompletions(client)
+
+
+class TimedOpenAI:
+    """
+    업스트림 호출 래퍼
+    - 호출 종류별 기본 타임아웃(요청 마감이 더 가까우면 남은 시간) 적용 (호출 시 timeout을 주면 그 값 사용)
+    - 서킷 브레이커 확인 및 결과 기록
+    """
+
+    def __init__(self, client: OpenAI):
+        self._client = client
+        self.embeddings = _TimedEmbeddings(client)
+        self.chat = _TimedChat(client)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def create_openai_client(api_key: str, priority: str = INTERACTIVE, coalesce: bool = True):
+    """
+    공유 연결 풀을 쓰는 OpenAI 클라이언트
+
+    Args:
+        api_key: OpenAI API 키
+        priority: governor 기본 우선순위 (llm_priority()로 지정되지 않은 호출)
+        coalesce: 동시에 진행 중인 같은 요청 병합 여부
+    """
+    upstream = TimedOpenAI(_get_openai(api_key))
+    if OPENAI_CASSETTE_MODE in ("record", "replay"):
+        # 녹화 / 재생 (replay면 업스트림을 호출하지 않음)
+        upstream = CassetteOpenAI(upstream)
+    client = GovernedOpenAI(upstream, priority=priority)
+    return CoalescingOpenAI(client, priority=priority) if coalesce else client
+
+
+def http_pool_stats() -> Dict:
+    """연결 재사용 통계 및 현재 풀 상태"""
+    with _lock:
+        open_connections = _transport.open_connections() if _transport is not None else 0
+    return {
+        **connection_stats.snapshot(),
+        "open_connections": open_connections,
+        "http2": _http2_enabled,
+        "limits": {
+            "max_connections": OPENAI_POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": OPENAI_POOL_MAX_KEEPALIVE,
+            "keepalive_expiry_seconds": OPENAI_POOL_KEEPALIVE_EXPIRY
+        },
+        "timeouts_seconds": {
+            "connect": OPENAI_CONNECT_TIMEOUT,
+            "embedding": OPENAI_EMBEDDING_TIMEOUT,
+            "completion": OPENAI_COMPLETION_TIMEOUT,
+            "stream_read": OPENAI_STREAM_READ_TIMEOUT
+        }
+    }
+
@@ -0,0 +1,464 @@
+"""
+OpenAI 호출 전역 제어 (프로세스 단위)
+- 동시 요청 수 제한 + 분당 요청 수(RPM) / 분당 토큰 수(TPM) 토큰 버킷
+- 429 / 5xx / 타임아웃은 Retry-After를 우선 따르고, 없으면 지수 백오프 + 지터로 재시도
+- 429를 받으면 모든 호출을 잠시 멈춰 버스트 재시도 방지
+- 우선순위 대기열: interactive(/chat, /match 등) > near_line(턴 평가 등) > batch(일괄 임베딩 등)
+  batch는 동시성 / RPM / TPM의 여유분만 사용
+- 등급별 대기열 길이 / 대기 시간 / 소요 시간, 재시도 / 429 수 집계
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import openai
+from dotenv import load_dotenv
+from deadline import DeadlineExceeded, current_deadline, remaining
+
+# 환경 변수 로드
+load_dotenv()
+
+OPENAI_GOVERNOR_ENABLED = os.getenv("OPENAI_GOVERNOR_ENABLED", "true").lower() == "true"
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_RETRY_BASE_MS = int(os.getenv("OPENAI_RETRY_BASE_MS", "500"))
+OPENAI_RETRY_MAX_MS = int(os.getenv("OPENAI_RETRY_MAX_MS", "20000"))
+OPENAI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("OPENAI_QUEUE_TIMEOUT_SECONDS", "60"))
+OPENAI_BATCH_MAX_SHARE = float(os.getenv("OPENAI_BATCH_MAX_SHARE", "0.5"))  # batch가 쓸 수 있는 동시성 비율
+OPENAI_BATCH_RESERVE = float(os.getenv("OPENAI_BATCH_RESERVE", "0.2"))  # batch 실행 시 버킷에 남겨 둘 비율
+
+# 우선순위 등급 (숫자가 작을수록 먼저 실행)
+INTERACTIVE = "interactive"
+NEAR_LINE = "near_line"
+BATCH = "batch"
+PRIORITY_RANK = {INTERACTIVE: 0, NEAR_LINE: 1, BATCH: 2}
+
+_current_priority: ContextVar[Optional[str]] = ContextVar("openai_priority", default=None)
+
+
+class GovernorTimeout(RuntimeError):
+    """대기열에서 OPENAI_QUEUE_TIMEOUT_SECONDS 이상 기다린 경우"""
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """with 블록 안의 OpenAI 호출 우선순위 지정 (예: 백그라운드 평가는 NEAR_LINE)"""
+    if priority not in PRIORITY_RANK:
+        raise ValueError(f"알 수 없는 우선순위입니다: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority(default: str = INTERACTIVE) -> str:
+    """현재 컨텍스트의 우선순위 (지정되지 않았으면 default)"""
+    return _current_priority.get() or default
+
+
+def estimate_tokens(operation: str, params: Dict) -> int:
+    """
+    요청 토큰 수 추정 (TPM 버킷 선차감용, 응답 후 실제 사용량으로 보정)
+
+    영문은 4글자당 1토큰, 한글 등 그 외 문자는 1글자당 1토큰으로 계산하고
+    completion은 max_tokens를 더합니다.
+    """
+    if operation == "embeddings":
+        inputs = params.get("input", "")
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        output_tokens = 0
+    else:
+        texts = [message.get("content") or "" for message in params.get("messages", [])]
+        output_tokens = params.get("max_tokens") or 500
+
+    prompt_tokens = 0
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+        prompt_tokens += ascii_chars // 4 + (len(text) - ascii_chars)
+    return max(1, prompt_tokens + output_tokens)
+
+
+class TokenBucket:
+    """분당 한도 토큰 버킷 (연속 충전, 용량 = 분당 한도)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount만큼 차감 가능해질 때까지 남은 시간 (초)"""
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+
+class OpenAIGovernor:
+    """OpenAI 호출 수 / 토큰 / 동시성 제어, 우선순위 대기열 및 재시도"""
+
+    def __init__(
+        self,
+        rpm: int = OPENAI_RPM_LIMIT,
+        tpm: int = OPENAI_TPM_LIMIT,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        queue_timeout: float = OPENAI_QUEUE_TIMEOUT_SECONDS,
+        batch_max_share: float = OPENAI_BATCH_MAX_SHARE,
+        batch_reserve: float = OPENAI_BATCH_RESERVE
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_slots = max(1, int(self.max_concurrency * batch_max_share))
+        self.batch_reserve = batch_reserve
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters: List[Tuple[int, int]] = []  # (우선순위, 도착 순번) 힙
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0  # 429 수신 시 전체 호출 일시 중지
+        self.stats = {
+            "requests": 0, "retries": 0, "rate_limited": 0, "failures": 0,
+            "queue_timeouts": 0, "deadline_exceeded": 0
+        }
+        self._classes = {
+            priority: {
+                "requests": 0, "queued": 0, "in_flight": 0,
+                "queue_waits": deque(maxlen=1000),  # 최근 대기 시간 (초)
+                "latencies": deque(maxlen=1000)  # 최근 전체 소요 시간 (대기 + 재시도 포함, 초)
+            }
+            for priority in PRIORITY_RANK
+        }
+
+    # -----------------------------
+    # 1. 우선순위 대기열 / 버킷
+    # -----------------------------
+    def _admission_wait(self, ticket: Tuple[int, int], priority: str, estimated_tokens: int, now: float) -> float:
+        """지금 실행 가능하면 0, 아니면 다시 확인할 때까지 대기 시간 (초, _lock 보유 상태에서 호출)"""
+        if self._waiters[0] != ticket:
+            # 우선순위가 높거나 먼저 온 대기자가 있음 (상대가 실행/포기하면 notify)
+            return 1.0
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= (self.batch_slots if priority == BATCH else self.max_concurrency):
+            return 1.0
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        # batch는 버킷에 batch_reserve 비율을 남겨 두어야 실행 (interactive 요청용 여유분)
+        reserve = self.batch_reserve if priority == BATCH else 0.0
+        return max(
+            self.requests.wait_time(1 + reserve * self.requests.capacity),
+            self.tokens.wait_time(estimated_tokens + reserve * self.tokens.capacity)
+        )
+
+    def acquire(self, estimated_tokens: int, priority: str = INTERACTIVE):
+        """
+        동시성 슬롯과 RPM / TPM 여유가 생길 때까지 대기
+
+        대기열은 우선순위 → 도착 순서로 정렬되므로, interactive 요청이 들어오면
+        먼저 대기 중이던 near_line / batch 요청보다 앞서 실행됩니다.
+        요청 마감 시각이 있으면 그때까지만 대기합니다 (병합된 호출은 대기 중 연장된 공유 마감 시각을 매번 다시 확인).
+        """
+        started = time.monotonic()
+        queue_deadline = started + self.queue_timeout
+        ticket = (PRIORITY_RANK[priority], next(self._seq))
+        stats = self._classes[priority]
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            stats["queued"] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    request_deadline = current_deadline()
+                    deadline = queue_deadline if request_deadline is None else min(queue_deadline, request_deadline)
+                    wait = self._admission_wait(ticket, priority, estimated_tokens, now)
+                    if wait <= 0:
+                        self.requests.tokens -= 1
+                        self.tokens.tokens -= min(estimated_tokens, self.tokens.capacity)
+                        self._in_flight += 1
+                        self.stats["requests"] += 1
+                        stats["requests"] += 1
+                        stats["in_flight"] += 1
+                        stats["queue_waits"].append(now - started)
+                        return
+                    if now >= deadline:
+                        if request_deadline is not None and now >= request_deadline:
+                            self.stats["deadline_exceeded"] += 1
+                            raise DeadlineExceeded("OpenAI 호출 대기")
+                        self.stats["queue_timeouts"] += 1
+                        raise GovernorTimeout("OpenAI 호출 대기열 대기 시간을 초과했습니다.")
+                    self._cond.wait(min(wait, deadline - now, 1.0))
+            finally:
+                stats["queued"] -= 1
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def release(self, priority: str = INTERACTIVE):
+        with self._cond:
+            self._in_flight -= 1
+            self._classes[priority]["in_flight"] -= 1
+            self._cond.notify_all()
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """실제 사용 토큰으로 TPM 버킷 보정 (추정보다 많이 쓰면 추가 차감, 적게 쓰면 환급)"""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + estimated_tokens - actual_tokens)
+
+    def _record_latency(self, priority: str, started: float):
+        with self._lock:
+            self._classes[priority]["latencies"].append(time.monotonic() - started)
+
+    # -----------------------------
+    # 2. 재시도
+    # -----------------------------
+    def retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """재시도 대기 시간 (초), 재시도하지 않을 오류면 None"""
+        if isinstance(error, openai.RateLimitError):
+            pass
+        elif isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            pass
+        elif isinstance(error, openai.APIStatusError) and error.status_code >= 500:
+            pass
+        else:
+            return None
+
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, 0.1 * retry_after + 0.05)
+        # 지수 백오프 + full jitter
+        ceiling = min(OPENAI_RETRY_MAX_MS, OPENAI_RETRY_BASE_MS * (2 ** attempt)) / 1000
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _backoff(self, error: Exception, attempt: int) -> bool:
+        """재시도 가능하면 대기 후 True (재시도 대기 중 요청 마감 시각이 지나면 DeadlineExceeded)"""
+        delay = self.retry_delay(error, attempt)
+        if delay is None or attempt >= self.max_retries:
+            with self._lock:
+                self.stats["failures"] += 1
+            return False
+
+        left = remaining()
+        if left is not None and left <= delay:
+            with self._lock:
+                self.stats["failures"] += 1
+                self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("OpenAI 재시도") from error
+
+        with self._lock:
+            self.stats["retries"] += 1
+            if isinstance(error, openai.RateLimitError):
+                # 한도 초과: 다른 호출도 함께 멈춰 429 연쇄 방지
+                self.stats["rate_limited"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        time.sleep(delay)
+        return True
+
+    # -----------------------------
+    # 3. 호출
+    # -----------------------------
+    def call(self, operation: str, fn: Callable[[], Any], params: Dict, priority: Optional[str] = None) -> Any:
+        """일반 요청 실행 (대기열 → 호출 → 실패 시 재시도)"""
+        priority = priority or current_priority()
+        estimated_tokens = estimate_tokens(operation, params)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens, priority)
+            try:
+                result = fn()
+            except Exception as e:
+                self.release(priority)
+                if not self._backoff(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            self.release(priority)
+            self._record_latency(priority, started)
+            usage = getattr(result, "usage", None)
+            self.settle(estimated_tokens, getattr(usage, "total_tokens", None))
+            return result
+
+    def stream(
+        self,
+        operation: str,
+        fn: Callable[[], Iterator[Any]],
+        params: Dict,
+        priority: Optional[str] = None
+    ) -> Iterator[Any]:
+        """
+        스트리밍 요청 실행 (스트림 시작까지만 재시도, 스트림이 끝나거나 닫힐 때까지 동시성 슬롯 유지)
+
+        소요 시간은 스트림이 열릴 때까지(대기 + 재시도 포함)로 기록합니다.
+        """
+        priority = priority or current_priority()
+        estimated_tokens = estimate_tokens(operation, params)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens, priority)
+            try:
+                upstream = fn()
+                break
+            except Exception as e:
+                self.release(priority)
+                if not self._backoff(e, attempt):
+                    raise
+                attempt += 1
+        self._record_latency(priority, started)
+
+        try:
+            for chunk in upstream:
+                yield chunk
+        finally:
+            # 중간에 닫히면 업스트림 HTTP 응답도 닫아 남은 토큰 생성 중단
+            close = getattr(upstream, "close", None)
+            if close is not None:
+                close()
+            self.release(priority)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            classes = {
+                priority: {
+                    "requests": c["requests"],
+                    "queued": c["queued"],
+                    "in_flight": c["in_flight"],
+                    "queue_wait_ms": _summary(c["queue_waits"]),
+                    "latency_ms": _summary(c["latencies"])
+                }
+                for priority, c in self._classes.items()
+            }
+            all_waits = [w for c in self._classes.values() for w in c["queue_waits"]]
+            in_flight = self._in_flight
+            queued = len(self._waiters)
+            paused_ms = max(0.0, self._paused_until - time.monotonic()) * 1000
+
+        return {
+            **stats,
+            "in_flight": in_flight,
+            "queued": queued,
+            "paused_ms": round(paused_ms, 1),
+            "queue_wait_ms": _summary(all_waits),
+            "classes": classes,
+            "limits": {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "max_concurrency": self.max_concurrency,
+                "batch_slots": self.batch_slots,
+                "batch_reserve": self.batch_reserve
+            }
+        }
+
+
+def _summary(samples) -> Dict:
+    """최근 표본(초)의 p50 / p95 / max (ms)"""
+    values = sorted(samples)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0, "samples": 0}
+
+    def percentile(pct):
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] * 1000
+
+    return {
+        "p50": round(percentile(50), 2),
+        "p95": round(percentile(95), 2),
+        "max": round(values[-1] * 1000, 2),
+        "samples": len(values)
+    }
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """응답 헤더의 retry-after-ms / retry-after (초)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP 날짜 형식 등은 지수 백오프 사용
+        return None
+    return None
+
+
+# 프로세스 전역 governor (모든 OpenAI 클라이언트가 공유)
+openai_governor = OpenAIGovernor()
+
+
+# -----------------------------
+# 4. OpenAI 클라이언트 래퍼
+# -----------------------------
+class _Embeddings:
+    def __init__(self, client, priority: str):
+        self._client = client
+        self._priority = priority
+
+    def create(self, **params):
+        return openai_governor.call(
+            "embeddings",
+            lambda: self._client.embeddings.create(**params),
+            params,
+            current_priority(self._priority)
+        )
+
+
+class _Completions:
+    def __init__(self, client, priority: str):
+        self._client = client
+        self._priority = priority
+
+    def create(self, **params):
+        operation = openai_governor.stream if params.get("stream") else openai_governor.call
+        return operation(
+            "chat_completions",
+            lambda: self._client.chat.completions.create(**params),
+            params,
+            current_priority(self._priority)
+        )
+
+
+class _Chat:
+    def __init__(self, client, priority: str):
+        self.completions = _Completions(client, priority)
+
+
+class GovernedOpenAI:
+    """
+    모든 embeddings.create / chat.completions.create 호출을 openai_governor로 제어하는 래퍼
+
+    priority는 llm_priority()로 지정되지 않은 호출의 기본 우선순위입니다.
+    """
+
+    def __init__(self, client, priority: str = INTERACTIVE):
+        self._client = client
+        if OPENAI_GOVERNOR_ENABLED:
+            self.embeddings = _Embeddings(client, priority)
+            self.chat = _Chat(client, priority)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
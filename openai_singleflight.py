@@ -0,0 +1,333 @@
+"""
+OpenAI 호출 single-flight (동일 요청 병합)
+- 동시에 진행 중인 같은 요청(embeddings / chat completions)은 업스트림 요청 1개를 공유
+- 스트리밍 completion은 업스트림 스트림 1개를 여러 구독자에게 나눠 전달 (늦게 합류해도 처음부터 수신)
+  구독자가 모두 끊기면 업스트림 스트림을 닫아 남은 토큰 생성 / 동시성 슬롯을 반납
+- 실제 요청 수(issued)와 병합된 요청 수(coalesced), 구독자가 모두 끊겨 닫은 스트림 수(cancelled) 집계
+- governor 우선순위가 다른 요청은 병합하지 않음 (interactive 요청이 batch 대기열 뒤에서 기다리지 않도록)
+- 공유 요청은 처음 시작한 요청의 스레드에서 실행하며(별도 스레드 없음), 마감 시각은 기다리는 요청 중
+  가장 늦은 마감 시각(합류할 때마다 연장)을 사용하고, 각 요청은 자기 마감 시각까지만 결과를 기다림
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List
+from dotenv import load_dotenv
+from deadline import DeadlineExceeded, SharedDeadline, check_deadline, current_deadline, remaining, shared_deadline_scope
+from openai_governor import INTERACTIVE, current_priority
+
+# 환경 변수 로드
+load_dotenv()
+
+OPENAI_SINGLEFLIGHT_ENABLED = os.getenv("OPENAI_SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+
+
+def request_key(operation: str, params: Dict, priority: str = INTERACTIVE) -> str:
+    """
+    요청 종류 + governor 우선순위 + 파라미터의 SHA-256
+
+    병합된 요청은 처음 요청한 쪽의 우선순위로 governor 대기열에 들어가므로,
+    우선순위가 다른 요청끼리는 키를 달리해 높은 우선순위 요청이 낮은 등급 대기열에서 기다리지 않게 합니다.
+    """
+    payload = json.dumps(
+        {"operation": operation, "priority": priority, **params}, ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """진행 중인 일반 요청"""
+
+    def __init__(self, deadline: SharedDeadline):
+        self.event = threading.Event()
+        self.deadline = deadline
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class _StreamCall:
+    """
+    진행 중인 스트리밍 요청 (받은 청크를 모든 구독자가 처음부터 읽음)
+
+    별도 펌프 스레드 없이, 아직 받지 않은 청크가 필요한 구독자 1명이 업스트림에서 다음 청크를 읽고
+    (pulling) 나머지 구독자는 그 결과를 기다립니다.
+    """
+
+    def __init__(self, operation: str, fn: Callable[[], Iterator[Any]], deadline: SharedDeadline):
+        self.cond = threading.Condition()
+        self.operation = operation
+        self.fn = fn
+        self.deadline = deadline
+        self.upstream: Iterator[Any] = None
+        self.pulling = False
+        self.subscribers = 0  # SingleFlight._lock 보유 상태에서 변경
+        self.cancelled = False
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException = None
+
+
+class _Subscription:
+    """스트림 구독자 1명 (끝까지 읽거나, 오류가 나거나, close()하면 구독 해제)"""
+
+    def __init__(self, flight: "SingleFlight", key: str, call: _StreamCall):
+        self._flight = flight
+        self._key = key
+        self._call = call
+        self.index = 0
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        try:
+            return self._flight._next_chunk(self._key, self._call, self)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._flight._unsubscribe(self._key, self._call)
+
+    def __del__(self):
+        # 닫지 않고 버려진 구독자도 구독 해제
+        self.close()
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 하나로 병합"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _StreamCall] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, operation: str, coalesced: bool):
+        stats = self._stats.setdefault(operation, {"issued": 0, "coalesced": 0})
+        stats["coalesced" if coalesced else "issued"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {operation: dict(stats) for operation, stats in self._stats.items()}
+
+    # -----------------------------
+    # 1. 일반 요청
+    # -----------------------------
+    def do(self, operation: str, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        같은 키의 요청이 진행 중이면 그 결과를 기다려 공유, 아니면 fn()을 직접 실행
+
+        fn()은 처음 요청한 쪽의 스레드에서 공유 마감 시각으로 실행됩니다. 늦게 끝나는 요청이 합류하면
+        마감 시각이 연장되고, 기다리는 요청이 모두 마감되면 fn() 안의 대기 / 재시도도 마감으로 중단됩니다.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(SharedDeadline(current_deadline()))
+                self._calls[key] = call
+            else:
+                call.deadline.extend(current_deadline())
+            self._count(operation, coalesced=not leader)
+
+        if leader:
+            self._run(key, call, fn)
+            # 합류한 요청 때문에 연장된 시간만큼 기다렸더라도 자기 마감 시각은 그대로 적용
+            check_deadline("OpenAI 병합 요청")
+        elif not call.event.wait(remaining()):
+            raise DeadlineExceeded("OpenAI 병합 요청 대기")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key: str, call: _Call, fn: Callable[[], Any]):
+        try:
+            with shared_deadline_scope(call.deadline):
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    # -----------------------------
+    # 2. 스트리밍 요청
+    # -----------------------------
+    def stream(self, operation: str, key: str, fn: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """
+        같은 키의 스트림이 진행 중이면 구독, 아니면 업스트림 스트림을 시작
+
+        업스트림은 구독자가 청크를 요청할 때 구독자의 스레드에서 읽으므로, 한 구독자가 중간에 연결을 끊어도
+        남은 구독자가 이어서 읽습니다. 마지막 구독자가 끝까지 읽기 전에 끊으면 업스트림을 닫습니다.
+        """
+        with self._lock:
+            call = self._streams.get(key)
+            leader = call is None
+            if leader:
+                call = _StreamCall(operation, fn, SharedDeadline(current_deadline()))
+                self._streams[key] = call
+            else:
+                call.deadline.extend(current_deadline())
+            call.subscribers += 1
+            self._count(operation, coalesced=not leader)
+
+        return _Subscription(self, key, call)
+
+    def _unsubscribe(self, key: str, call: _StreamCall):
+        """구독 해제 (마지막 구독자면 스트림을 목록에서 빼고, 아직 진행 중이면 업스트림을 닫음)"""
+        with self._lock:
+            call.subscribers -= 1
+            if call.subscribers > 0:
+                return
+            # 이후 같은 요청은 닫히는 스트림에 합류하지 않고 새로 시작
+            if self._streams.get(key) is call:
+                self._streams.pop(key)
+
+        with call.cond:
+            if call.done:
+                return
+            call.cancelled = True
+            if call.pulling:
+                # 청크를 읽는 중이면 읽기를 마친 쪽(_pull)이 닫음
+                return
+            call.done = True
+        self._close_upstream(call)
+
+    def _close_upstream(self, call: _StreamCall):
+        """끝까지 읽지 않은 업스트림 스트림 닫기 (governor 슬롯 반납 / HTTP 응답 종료)"""
+        if call.upstream is None:
+            # 아직 업스트림 요청을 시작하지 않음
+            return
+        with self._lock:
+            stats = self._stats.setdefault(call.operation, {"issued": 0, "coalesced": 0})
+            stats["cancelled"] = stats.get("cancelled", 0) + 1
+        close = getattr(call.upstream, "close", None)
+        if close is not None:
+            close()
+
+    def _pull(self, key: str, call: _StreamCall):
+        """업스트림에서 다음 청크 1개 읽기 (call.pulling을 잡은 구독자만 호출)"""
+        chunk, finished, error = None, False, None
+        try:
+            with shared_deadline_scope(call.deadline):
+                if call.upstream is None:
+                    call.upstream = iter(call.fn())
+                chunk = next(call.upstream)
+        except StopIteration:
+            finished = True
+        except BaseException as e:
+            finished, error = True, e
+
+        if finished:
+            with self._lock:
+                if self._streams.get(key) is call:
+                    self._streams.pop(key)
+        with call.cond:
+            cancelled = call.cancelled and not finished
+            if finished or cancelled:
+                call.done = True
+                call.error = error
+            else:
+                call.chunks.append(chunk)
+            call.pulling = False
+            call.cond.notify_all()
+        if cancelled:
+            # 읽는 동안 구독자가 모두 끊김
+            self._close_upstream(call)
+
+    def _next_chunk(self, key: str, call: _StreamCall, subscription: _Subscription) -> Any:
+        """구독자의 다음 청크 (없으면 다른 구독자가 읽을 때까지 대기하거나 직접 읽음)"""
+        while True:
+            pull = False
+            with call.cond:
+                while subscription.index >= len(call.chunks) and not call.done:
+                    left = remaining()
+                    if left is not None and left <= 0:
+                        raise DeadlineExceeded("OpenAI 스트림 대기")
+                    if not call.pulling:
+                        # 다음 청크를 읽는 구독자가 없으면 직접 읽음
+                        call.pulling = pull = True
+                        break
+                    call.cond.wait(left)
+                if not pull:
+                    if subscription.index >= len(call.chunks):
+                        if call.error is not None:
+                            raise call.error
+                        raise StopIteration
+                    chunk = call.chunks[subscription.index]
+                    subscription.index += 1
+                    return chunk
+            self._pull(key, call)
+
+
+# 프로세스 전역 single-flight 그룹 (chat.py / matching.py 클라이언트가 공유)
+openai_singleflight = SingleFlight()
+
+
+# -----------------------------
+# 3. OpenAI 클라이언트 래퍼
+# -----------------------------
+class _Embeddings:
+    def __init__(self, client, priority: str):
+        self._client = client
+        self._priority = priority
+
+    def create(self, **params):
+        if not OPENAI_SINGLEFLIGHT_ENABLED:
+            return self._client.embeddings.create(**params)
+        return openai_singleflight.do(
+            "embeddings",
+            request_key("embeddings", params, current_priority(self._priority)),
+            lambda: self._client.embeddings.create(**params)
+        )
+
+
+class _Completions:
+    def __init__(self, client, priority: str):
+        self._client = client
+        self._priority = priority
+
+    def create(self, **params):
+        if not OPENAI_SINGLEFLIGHT_ENABLED:
+            return self._client.chat.completions.create(**params)
+        if params.get("stream"):
+            return openai_singleflight.stream(
+                "chat_completions_stream",
+                request_key("chat_completions", params, current_priority(self._priority)),
+                lambda: self._client.chat.completions.create(**params)
+            )
+        return openai_singleflight.do(
+            "chat_completions",
+            request_key("chat_completions", params, current_priority(self._priority)),
+            lambda: self._client.chat.completions.create(**params)
+        )
+
+
+class _Chat:
+    def __init__(self, client, priority: str):
+        self.completions = _Completions(client, priority)
+
+
+class CoalescingOpenAI:
+    """
+    OpenAI 클라이언트 앞단의 single-flight 래퍼 (embeddings.create / chat.completions.create 호환)
+
+    priority는 감싼 GovernedOpenAI의 기본 우선순위와 같아야 합니다 (llm_priority()로 지정되지 않은 호출의 병합 키).
+    """
+
+    def __init__(self, client, priority: str = INTERACTIVE):
+        self._client = client
+        self.embeddings = _Embeddings(client, priority)
+        self.chat = _Chat(client, priority)
+
+    def __getattr__(self, name):
+        # 그 외 API는 원래 클라이언트로 전달
+        return getattr(self._client, name)
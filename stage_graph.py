@@ -0,0 +1,82 @@
+"""
+단계(stage) 그래프 실행기
+- 각 단계는 의존하는 단계가 끝나는 즉시 시작 (서로 독립인 단계는 동시에 실행)
+- 단계별 시작 시점 / 소요 시간 기록
+- 요청 마감 시각이 있으면 각 단계는 남은 시간을 타임아웃으로 실행
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from deadline import DeadlineExceeded, check_deadline, deadline_scope, remaining
+
+
+class Stage:
+    """그래프의 단계 하나 (func는 지금까지의 결과 dict를 받아 이 단계의 결과를 반환하는 async 함수)"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]], deps: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+
+
+class StageGraph:
+    """단계 그래프 (단계는 의존 단계보다 뒤에 추가)"""
+
+    def __init__(self, stages: Optional[List[Stage]] = None):
+        self.stages: List[Stage] = []
+        self.timings: Dict[str, Dict[str, float]] = {}  # 단계 → {"start_ms", "duration_ms"}
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage):
+        known = {s.name for s in self.stages}
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"단계 {stage.name}의 의존 단계가 먼저 추가되지 않았습니다: {', '.join(missing)}")
+        self.stages.append(stage)
+
+    async def run(self, results: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        모든 단계 실행 (한 단계라도 실패하면 나머지를 취소하고 예외 전달)
+
+        deadline(time.monotonic 기준)이 있으면 단계 안의 호출에도 마감 시각이 전달되고,
+        시작 전에 마감이 지났거나 남은 시간 안에 끝나지 않은 단계는 DeadlineExceeded로 중단됩니다.
+        """
+        results = dict(results or {})
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage):
+            if stage.deps:
+                await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+            check_deadline(stage.name, deadline)
+            stage_start = time.perf_counter()
+            try:
+                results[stage.name] = await asyncio.wait_for(stage.func(results), timeout=remaining(deadline))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(stage.name)
+            self.timings[stage.name] = {
+                "start_ms": (stage_start - started) * 1000,
+                "duration_ms": (time.perf_counter() - stage_start) * 1000
+            }
+
+        # 태스크는 생성 시점의 컨텍스트를 복사하므로 마감 시각이 단계 안의 스레드풀 호출까지 전달됨
+        with deadline_scope(deadline):
+            for stage in self.stages:
+                tasks[stage.name] = asyncio.create_task(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return results
+
+    def format_timings(self) -> str:
+        """로그용 단계별 시간 문자열 (예: "messages=+0ms/12ms, initial=+0ms/840ms")"""
+        return ", ".join(
+            f"{name}=+{timing['start_ms']:.0f}ms/{timing['duration_ms']:.0f}ms"
+            for name, timing in self.timings.items()
+        )
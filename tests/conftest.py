@@ -0,0 +1,20 @@
+"""
+테스트 공통 설정
+- 모듈 import 전에 임시 SQLite DB / 더미 API 키를 지정해 운영 DB와 외부 API를 사용하지 않음
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp_dir = tempfile.mkdtemp(prefix="advisor_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["CHAT_WRITE_JOURNAL_DIR"] = os.path.join(_tmp_dir, "chat_journal")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PINECONE_API_KEY", "test")
+# 인덱스 이름 조회(네트워크) 없이 chat 모듈을 import하기 위한 호스트
+os.environ.setdefault("PINECONE_HOST", "http://localhost:8100")
+os.environ["OPENAI_CASSETTE_MODE"] = "off"
@@ -0,0 +1,91 @@
+"""
+GET /chat/sessions/applicant/{applicant_id} 쿼리 수 테스트
+- 세션 수와 관계없이 기본 1개, include_messages=true면 2개의 SQL만 실행되어야 함 (세션별 N+1 조회 방지)
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
+from api import app
+
+SESSION_COUNT = 5
+MESSAGES_PER_SESSION = 3
+
+
+@pytest.fixture(scope="module")
+def applicant_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        school = GraduateSchool(name="테스트 대학원")
+        db.add(school)
+        db.flush()
+        applicant = Applicant(interest_keyword="디지털 전환", learning_styles="사례 기반,협업형")
+        db.add(applicant)
+        db.flush()
+
+        started = datetime(2026, 1, 1)
+        for i in range(SESSION_COUNT):
+            professor_id = f"test_prof_{i:03d}"
+            db.add(Professor(professor_id=professor_id, name=f"교수{i}", graduate_school_id=school.id))
+            session = ChatSession(applicant_id=applicant.id, professor_id=professor_id)
+            db.add(session)
+            db.flush()
+            for j in range(MESSAGES_PER_SESSION):
+                timestamp = started + timedelta(minutes=i * 10 + j)
+                db.add(ChatMessage(
+                    session_id=session.id,
+                    role="user" if j % 2 == 0 else "professor",
+                    content=f"세션 {i} 메시지 {j}",
+                    timestamp=timestamp
+                ))
+            session.message_count = MESSAGES_PER_SESSION
+            session.last_message_at = started + timedelta(minutes=i * 10 + MESSAGES_PER_SESSION - 1)
+        db.commit()
+        return applicant.id
+    finally:
+        db.close()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_session_list_uses_one_query(applicant_id):
+    client = TestClient(app)
+    with count_statements() as statements:
+        response = client.get(f"/chat/sessions/applicant/{applicant_id}")
+
+    assert response.status_code == 200
+    sessions = response.json()
+    assert len(sessions) == SESSION_COUNT
+    assert all(session["message_count"] == MESSAGES_PER_SESSION for session in sessions)
+    assert all(session["last_message_preview"].endswith(f"메시지 {MESSAGES_PER_SESSION - 1}") for session in sessions)
+    assert all(session["professor_name"] for session in sessions)
+    assert len(statements) == 1, statements
+
+
+def test_session_list_with_messages_uses_two_queries(applicant_id):
+    client = TestClient(app)
+    with count_statements() as statements:
+        response = client.get(f"/chat/sessions/applicant/{applicant_id}", params={"include_messages": "true"})
+
+    assert response.status_code == 200
+    sessions = response.json()
+    assert len(sessions) == SESSION_COUNT
+    assert all(len(session["messages"]) == MESSAGES_PER_SESSION for session in sessions)
+    assert len(statements) == 2, statements
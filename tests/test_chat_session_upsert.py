@@ -0,0 +1,108 @@
+"""
+채팅 세션 생성 / 중복 세션 병합 테스트
+- 같은 지원자-교수님 조합으로 동시에 POST /chat/session을 보내도 세션 1개만 생성
+- 중복 세션 병합 시 메시지와 턴별 채팅 품질 평가 누적값을 남는 세션으로 합산
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from database import (
+    Base, engine, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage,
+    merge_duplicate_chat_sessions
+)
+from api import app
+
+CONCURRENT_REQUESTS = 8
+
+
+@pytest.fixture(scope="module")
+def applicant_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        school = GraduateSchool(name="세션 테스트 대학원")
+        db.add(school)
+        db.flush()
+        db.add(Professor(professor_id="upsert_prof", name="세션교수", graduate_school_id=school.id))
+        db.add(Professor(professor_id="merge_prof", name="병합교수", graduate_school_id=school.id))
+        applicant = Applicant(interest_keyword="세션", learning_styles="사례 기반")
+        db.add(applicant)
+        db.commit()
+        return applicant.id
+    finally:
+        db.close()
+
+
+async def post_concurrently(payload):
+    """같은 이벤트 루프에서 POST /chat/session 요청을 동시에 보냄"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*[
+            client.post("/chat/session", json=payload) for _ in range(CONCURRENT_REQUESTS)
+        ])
+
+
+def test_concurrent_session_creation_returns_one_row(applicant_id):
+    payload = {"applicant_id": applicant_id, "professor_id": "upsert_prof"}
+    responses = asyncio.run(post_concurrently(payload))
+
+    assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+    assert len({response.json()["id"] for response in responses}) == 1
+
+    db = SessionLocal()
+    try:
+        count = db.query(ChatSession).filter(
+            ChatSession.applicant_id == applicant_id, ChatSession.professor_id == "upsert_prof"
+        ).count()
+    finally:
+        db.close()
+    assert count == 1
+
+
+def test_merge_folds_turn_score_counters(applicant_id):
+    started = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        # 기존 DB처럼 unique 인덱스가 없는 상태에서 만들어진 중복 세션
+        conn.execute(text("DROP INDEX ux_chat_sessions_applicant_professor"))
+    try:
+        db = SessionLocal()
+        try:
+            for i, (turns, score) in enumerate([(2, 3), (1, 5)]):
+                session = ChatSession(
+                    applicant_id=applicant_id, professor_id="merge_prof",
+                    created_at=started + timedelta(days=i), updated_at=started + timedelta(days=i),
+                    scored_turns=turns, depth_quality_sum=turns * score, answer_quality_sum=turns * score,
+                    engagement_sum=turns * score, relevance_sum=turns * score
+                )
+                db.add(session)
+                db.flush()
+                for j in range(turns * 2):
+                    db.add(ChatMessage(
+                        session_id=session.id, role="user" if j % 2 == 0 else "professor",
+                        content=f"병합 {i}-{j}", timestamp=started + timedelta(days=i, minutes=j)
+                    ))
+            db.commit()
+        finally:
+            db.close()
+
+        assert merge_duplicate_chat_sessions() == 1
+    finally:
+        for table_index in Base.metadata.tables["chat_sessions"].indexes:
+            table_index.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        sessions = db.query(ChatSession).filter(
+            ChatSession.applicant_id == applicant_id, ChatSession.professor_id == "merge_prof"
+        ).all()
+        assert len(sessions) == 1
+        merged = sessions[0]
+        assert merged.message_count == 6
+        assert merged.scored_turns == merged.message_count // 2 == 3
+        assert merged.depth_quality_sum == merged.relevance_sum == 2 * 3 + 1 * 5
+    finally:
+        db.close()
@@ -0,0 +1,140 @@
+"""
+채팅 메시지 write-behind 저널 테스트
+- 배치마다 새 segment로 넘기고, 레코드가 모두 저장된 segment는 삭제
+- 종료된 워커의 저널과 재생 도중 종료된 워커가 선점해 둔 저널(*.replay.<pid>)을 재생
+- 혼자서도 계속 실패하는 레코드는 dead-letter 파일로 옮기고 나머지는 저장
+"""
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from chat_writer import ChatMessageWriter, DEAD_LETTER_FILE, JOURNAL_PREFIX
+from database import Base, engine, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
+
+
+@pytest.fixture(scope="module")
+def session_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        school = GraduateSchool(name="저널 테스트 대학원")
+        db.add(school)
+        db.flush()
+        applicant = Applicant(interest_keyword="저널", learning_styles="사례 기반")
+        db.add(applicant)
+        db.flush()
+        db.add(Professor(professor_id="journal_prof", name="저널교수", graduate_school_id=school.id))
+        session = ChatSession(applicant_id=applicant.id, professor_id="journal_prof")
+        db.add(session)
+        db.commit()
+        return session.id
+    finally:
+        db.close()
+
+
+def saved_questions(session_id):
+    db = SessionLocal()
+    try:
+        rows = db.query(ChatMessage.content).filter(
+            ChatMessage.session_id == session_id, ChatMessage.role == "user"
+        ).all()
+        return {content for (content,) in rows}
+    finally:
+        db.close()
+
+
+def dead_pid() -> int:
+    """이미 종료된 프로세스의 pid"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def journal_record(session_id, question):
+    return {
+        "id": question, "session_id": session_id, "question": question, "answer": "답변",
+        "asked_at": "2026-01-01T00:00:00", "answered_at": "2026-01-01T00:00:01"
+    }
+
+
+def write_journal(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def test_completed_segments_are_deleted(tmp_path, session_id):
+    writer = ChatMessageWriter(mode="journal", batch_size=2, flush_interval_ms=10, journal_dir=str(tmp_path))
+    writer.start()
+    try:
+        for i in range(5):
+            writer.submit(session_id, f"segment-{i}", "답변")
+        assert writer.flush(timeout=5)
+        # 저장이 끝난 segment는 삭제되고 지금 기록 중인 빈 segment만 남음
+        segments = glob.glob(os.path.join(str(tmp_path), f"{JOURNAL_PREFIX}.{os.getpid()}.*.jsonl"))
+        assert len(segments) == 1
+        assert os.path.getsize(segments[0]) == 0
+        assert len(writer._segments) == 1
+    finally:
+        writer.stop()
+
+    assert {f"segment-{i}" for i in range(5)} <= saved_questions(session_id)
+    assert not os.listdir(str(tmp_path))
+
+
+def test_replays_dead_and_stale_claimed_journals(tmp_path, session_id):
+    journal_dir = str(tmp_path)
+    crashed = dead_pid()
+    write_journal(os.path.join(journal_dir, f"{JOURNAL_PREFIX}.{crashed}.3.jsonl"), [journal_record(session_id, "crashed")])
+    # 재생 도중 종료된 워커가 선점해 둔 저널
+    stale_claim = os.path.join(journal_dir, f"{JOURNAL_PREFIX}.{crashed}.4.jsonl.replay.{crashed}")
+    write_journal(stale_claim, [journal_record(session_id, "stale-claim")])
+    # 살아 있는 워커가 재생 중인 저널은 건드리지 않음
+    live_claim = os.path.join(journal_dir, f"{JOURNAL_PREFIX}.{crashed}.5.jsonl.replay.{os.getppid()}")
+    write_journal(live_claim, [journal_record(session_id, "live-claim")])
+
+    writer = ChatMessageWriter(mode="journal", flush_interval_ms=10, journal_dir=journal_dir)
+    writer.start()
+    writer.stop()
+
+    questions = saved_questions(session_id)
+    assert {"crashed", "stale-claim"} <= questions
+    assert "live-claim" not in questions
+    assert writer.stats["replayed"] == 2
+    assert os.listdir(journal_dir) == [os.path.basename(live_claim)]
+
+
+class FailingWriter(ChatMessageWriter):
+    """질문이 "poison"인 레코드가 들어 있으면 배치 저장 실패"""
+
+    def _write_batch(self, records):
+        if any(record["question"] == "poison" for record in records):
+            raise ValueError("저장할 수 없는 레코드")
+        super()._write_batch(records)
+
+
+def test_poison_record_is_dead_lettered(tmp_path, session_id):
+    journal_dir = str(tmp_path)
+    writer = FailingWriter(
+        mode="journal", batch_size=10, flush_interval_ms=10, journal_dir=journal_dir, max_attempts=2
+    )
+    writer.start()
+    try:
+        for question in ("before-poison", "poison", "after-poison"):
+            writer.submit(session_id, question, "답변")
+        assert writer.flush(timeout=5)
+    finally:
+        writer.stop()
+
+    assert {"before-poison", "after-poison"} <= saved_questions(session_id)
+    with open(os.path.join(journal_dir, DEAD_LETTER_FILE), encoding="utf-8") as f:
+        dead = [json.loads(line) for line in f]
+    assert [record["question"] for record in dead] == ["poison"]
+    assert dead[0]["attempts"] == 2
+    assert writer.stats["dead_lettered"] == 1
+    # dead-letter로 옮긴 레코드도 저널에서 제거
+    assert os.listdir(journal_dir) == [DEAD_LETTER_FILE]
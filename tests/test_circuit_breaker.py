@@ -0,0 +1,94 @@
+"""
+서킷 브레이커 상태 전이 테스트
+- 실패율이 임계값을 넘으면 open, open_seconds 후 half-open (시험 호출은 한 번에 하나)
+- 시험 호출이 연속 성공하면 closed, 실패하면 다시 open
+"""
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+OPEN_SECONDS = 0.05
+
+
+def make_breaker(**overrides):
+    options = {
+        "window": 4, "min_calls": 4, "failure_rate": 0.5, "slow_call_ms": 100,
+        "open_seconds": OPEN_SECONDS, "half_open_successes": 2, "enabled": True
+    }
+    return CircuitBreaker("test", **{**options, **overrides})
+
+
+def call(breaker, failed=False, latency_ms=1.0):
+    breaker.before_call()
+    if failed:
+        breaker.on_failure()
+    else:
+        breaker.on_success(latency_ms)
+
+
+def open_breaker(breaker):
+    for failed in (False, True, False, True):
+        call(breaker, failed=failed)
+    assert breaker.snapshot()["state"] == OPEN
+
+
+def test_open_half_open_closed():
+    breaker = make_breaker()
+    call(breaker, failed=True)
+    # 최소 호출 수 전에는 실패가 있어도 닫힌 상태 유지
+    assert breaker.snapshot()["state"] == CLOSED
+
+    breaker = make_breaker()
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.is_open()
+
+    time.sleep(OPEN_SECONDS * 1.5)
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    breaker.before_call()
+    # 시험 호출이 진행 중이면 다른 호출은 거절
+    assert breaker.is_open()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_success(1.0)
+    assert breaker.snapshot()["state"] == HALF_OPEN
+
+    call(breaker)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == CLOSED
+    assert snapshot["window_calls"] == 0
+    assert snapshot["opened"] == 1 and snapshot["rejected"] == 2
+
+
+def test_failed_probe_reopens():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+
+    call(breaker, failed=True)
+    assert breaker.snapshot()["state"] == OPEN
+    assert breaker.stats["opened"] == 2
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker()
+    for latency_ms in (1.0, 500.0, 1.0, 500.0):
+        call(breaker, latency_ms=latency_ms)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == OPEN
+    assert snapshot["slow_calls"] == 2 and snapshot["failures"] == 0
+
+
+def test_ignored_result_returns_probe_slot():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+
+    breaker.before_call()
+    # 4xx / 429 등은 집계하지 않고 시험 호출 자리만 반납
+    breaker.on_ignored()
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    assert not breaker.is_open()
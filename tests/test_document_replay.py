@@ -0,0 +1,129 @@
+"""
+생성 문서 재생 테스트
+- 입력 지문이 같으면 저장된 이메일 초안을 LLM 호출 없이 같은 SSE 형식으로 재생
+- 입력이 바뀌면 새로 생성해 별도 문서로 저장
+- 최종 리포트 스트림은 스트림 안에서 연 DB 세션을 끝나면 닫음
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+import matching
+from database import Base, engine, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession
+from api import app
+
+
+@pytest.fixture(scope="module")
+def applicant_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        school = GraduateSchool(name="문서 테스트 대학원")
+        db.add(school)
+        db.flush()
+        db.add(Professor(
+            professor_id="draft_prof", name="초안교수", graduate_school_id=school.id, research_fields="기술경영"
+        ))
+        applicant = Applicant(name="홍길동", interest_keyword="기술 전략", learning_styles="사례 기반")
+        db.add(applicant)
+        db.flush()
+        db.add(ChatSession(applicant_id=applicant.id, professor_id="draft_prof"))
+        db.commit()
+        return applicant.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def draft_calls(monkeypatch):
+    """LLM 대신 고정 본문을 스트리밍하는 초안 생성기 (호출 입력 기록)"""
+    calls = []
+
+    def fake_stream(**inputs):
+        calls.append(inputs)
+        for part in ("교수님께, ", f"{inputs['appointment_time']}에 ", "상담을 요청드립니다."):
+            yield f"data: {json.dumps({'content': part, 'done': False}, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+    monkeypatch.setattr(matching, "generate_email_draft_stream", fake_stream)
+    return calls
+
+
+def read_events(response):
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+def request_draft(client, applicant_id, appointment_time):
+    response = client.post("/email/draft", json={
+        "applicant_id": applicant_id,
+        "professor_id": "draft_prof",
+        "appointment_date": "2026년 1월 5일",
+        "appointment_time": appointment_time
+    })
+    assert response.status_code == 200
+    events = read_events(response)
+    content = "".join(event["content"] for event in events if not event["done"])
+    return content, events[-1]
+
+
+def test_same_inputs_replay_stored_draft(applicant_id, draft_calls):
+    client = TestClient(app)
+    content, done = request_draft(client, applicant_id, "오후 3시")
+    assert len(draft_calls) == 1
+    assert done["done"] and done["cached"] is False
+
+    replayed, replay_done = request_draft(client, applicant_id, "오후 3시")
+    assert len(draft_calls) == 1
+    assert replayed == content == "교수님께, 오후 3시에 상담을 요청드립니다."
+    assert replay_done["cached"] is True
+    assert replay_done["document_id"] == done["document_id"]
+
+
+def test_changed_inputs_generate_new_draft(applicant_id, draft_calls):
+    client = TestClient(app)
+    _, first = request_draft(client, applicant_id, "오전 10시")
+    content, second = request_draft(client, applicant_id, "오전 11시")
+    assert len(draft_calls) == 2
+    assert content == "교수님께, 오전 11시에 상담을 요청드립니다."
+    assert second["cached"] is False
+    assert second["document_id"] != first["document_id"]
+
+
+def test_final_report_replay_closes_stream_sessions(applicant_id, monkeypatch):
+    db = SessionLocal()
+    try:
+        session_id = db.query(ChatSession.id).filter(ChatSession.applicant_id == applicant_id).scalar()
+    finally:
+        db.close()
+
+    report_calls = []
+
+    def fake_report(**inputs):
+        report_calls.append(inputs)
+        yield f"data: {json.dumps({'content': '최종 리포트 본문', 'done': False}, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+    opened = []
+
+    def tracking_session():
+        db = SessionLocal()
+        opened.append(db)
+        return db
+
+    monkeypatch.setattr(api, "calculate_matching_score", lambda applicant_data, professor_id: {"total_score": 70})
+    monkeypatch.setattr(matching, "generate_final_report_stream", fake_report)
+    monkeypatch.setattr(api, "SessionLocal", tracking_session)
+
+    client = TestClient(app)
+    first = read_events(client.post("/match/final", params={"session_id": session_id}))
+    replayed = read_events(client.post("/match/final", params={"session_id": session_id}))
+
+    assert len(report_calls) == 1
+    assert first[-1]["cached"] is False and replayed[-1]["cached"] is True
+    assert replayed[-1]["document_id"] == first[-1]["document_id"]
+    assert [event["final_score"] for event in (first[0], replayed[0])] == [70, 70]
+    # 요청마다 스트림 안에서 연 세션 1개, 응답이 끝나면 모두 닫힘 (트랜잭션 / 연결 반환)
+    assert len(opened) == 2
+    assert all(not db.in_transaction() for db in opened)
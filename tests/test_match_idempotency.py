@@ -0,0 +1,94 @@
+"""
+POST /match Idempotency-Key 테스트
+- 같은 키로 재요청하면 저장된 응답을 재계산 없이 반환 (Idempotent-Replayed 헤더)
+- 같은 키로 다른 내용을 보내면 422
+- 처리 중인 같은 키의 요청은 완료될 때까지 기다렸다가 같은 응답 반환
+- 실패한 요청은 선점을 해제해 같은 키로 바로 재시도 가능
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from database import Base, engine
+from api import app
+
+# professor_ids도 본문 파라미터이므로 지원자 정보는 "request" 키 아래에 전달
+PAYLOAD = {"request": {"name": "홍길동", "interest_keyword": "기술 전략", "learning_styles": ["사례 기반", "협업형"]}}
+
+
+@pytest.fixture
+def match_calls(monkeypatch):
+    """매칭 점수 계산 대신 고정 결과를 반환 (호출 횟수 기록)"""
+    Base.metadata.create_all(bind=engine)
+    calls = []
+
+    def fake_match_all(applicant_data, professor_ids=None):
+        calls.append(applicant_data)
+        time.sleep(0.3)
+        return [{
+            "professor_id": "idem_prof",
+            "total_score": 80,
+            "indicator_scores": [{"indicator": "A", "score": 80, "qa_count": 1, "details": []}],
+            "breakdown": {"A": 80}
+        }]
+
+    monkeypatch.setattr(api, "match_all_professors", fake_match_all)
+    return calls
+
+
+def test_same_key_replays_stored_response(match_calls):
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "idem-replay"}
+    first = client.post("/match", json=PAYLOAD, headers=headers)
+    replayed = client.post("/match", json=PAYLOAD, headers=headers)
+
+    assert first.status_code == replayed.status_code == 200
+    assert replayed.json() == first.json()
+    assert replayed.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(match_calls) == 1
+
+
+def test_same_key_with_different_payload_conflicts(match_calls):
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "idem-conflict"}
+    assert client.post("/match", json=PAYLOAD, headers=headers).status_code == 200
+
+    changed = {"request": {**PAYLOAD["request"], "interest_keyword": "기술 혁신"}}
+    response = client.post("/match", json=changed, headers=headers)
+    assert response.status_code == 422
+    assert "Idempotency-Key" in response.json()["detail"]
+    assert len(match_calls) == 1
+
+
+def test_concurrent_same_key_waits_for_first_response(match_calls):
+    async def post_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "idem-pending"}
+            return await asyncio.gather(*[client.post("/match", json=PAYLOAD, headers=headers) for _ in range(2)])
+
+    responses = asyncio.run(post_twice())
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert len(match_calls) == 1
+
+
+def test_failed_request_releases_key(match_calls, monkeypatch):
+    def failing_match_all(applicant_data, professor_ids=None):
+        raise RuntimeError("매칭 실패")
+
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "idem-retry"}
+    with monkeypatch.context() as failing:
+        failing.setattr(api, "match_all_professors", failing_match_all)
+        assert client.post("/match", json=PAYLOAD, headers=headers).status_code == 500
+
+    retried = client.post("/match", json=PAYLOAD, headers=headers)
+    assert retried.status_code == 200
+    assert "Idempotent-Replayed" not in retried.headers
+    assert len(match_calls) == 1
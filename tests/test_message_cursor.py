@@ -0,0 +1,105 @@
+"""
+GET /chat/session/{session_id} 메시지 키셋 페이지네이션 테스트
+- prev_cursor / next_cursor로 페이지를 넘겨도 (timestamp, id) 순서로 누락 / 중복 없이 조회
+- timestamp가 같은 메시지는 id로 순서를 정해 페이지 경계에서도 빠지지 않음
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database import Base, engine, SessionLocal, GraduateSchool, Professor, Applicant, ChatSession, ChatMessage
+from api import app, encode_message_cursor
+
+# 같은 timestamp가 페이지 경계에 걸치도록 분 단위 오프셋 구성
+MINUTE_OFFSETS = [0, 1, 1, 1, 2, 3, 3]
+PAGE_SIZE = 2
+
+
+@pytest.fixture(scope="module")
+def session_messages():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        school = GraduateSchool(name="커서 테스트 대학원")
+        db.add(school)
+        db.flush()
+        db.add(Professor(professor_id="cursor_prof", name="커서교수", graduate_school_id=school.id))
+        applicant = Applicant(interest_keyword="커서", learning_styles="사례 기반")
+        db.add(applicant)
+        db.flush()
+        session = ChatSession(applicant_id=applicant.id, professor_id="cursor_prof")
+        db.add(session)
+        db.flush()
+
+        started = datetime(2026, 1, 1)
+        messages = [
+            ChatMessage(
+                session_id=session.id,
+                role="user" if i % 2 == 0 else "professor",
+                content=f"커서 메시지 {i}",
+                timestamp=started + timedelta(minutes=offset)
+            )
+            for i, offset in enumerate(MINUTE_OFFSETS)
+        ]
+        db.add_all(messages)
+        session.message_count = len(messages)
+        db.commit()
+        return session.id, [message.id for message in messages]
+    finally:
+        db.close()
+
+
+def get_page(client, session_id, **params):
+    response = client.get(f"/chat/session/{session_id}", params={"limit": PAGE_SIZE, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_backward_pages_cover_every_message_once(session_messages):
+    session_id, message_ids = session_messages
+    client = TestClient(app)
+
+    page = get_page(client, session_id)
+    seen = [message["id"] for message in page["messages"]]
+    while page["has_more"]:
+        page = get_page(client, session_id, before=page["prev_cursor"])
+        seen = [message["id"] for message in page["messages"]] + seen
+
+    assert seen == message_ids
+
+
+def test_forward_pages_resume_after_cursor(session_messages):
+    session_id, message_ids = session_messages
+    client = TestClient(app)
+
+    db = SessionLocal()
+    try:
+        # 같은 timestamp 메시지 3개 중 첫 번째 메시지 이후부터 조회
+        after = encode_message_cursor(db.get(ChatMessage, message_ids[1]))
+    finally:
+        db.close()
+
+    seen = []
+    while True:
+        page = get_page(client, session_id, after=after)
+        seen += [message["id"] for message in page["messages"]]
+        after = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert seen == message_ids[2:]
+    # 새 메시지가 없으면 전달한 커서를 그대로 돌려받아 폴링을 이어감
+    polled = get_page(client, session_id, after=after)
+    assert polled["messages"] == [] and polled["next_cursor"] == after
+
+
+def test_invalid_cursor_rejected(session_messages):
+    session_id, _ = session_messages
+    client = TestClient(app)
+    assert client.get(f"/chat/session/{session_id}", params={"before": "not-a-cursor"}).status_code == 400
+    page = get_page(client, session_id)
+    response = client.get(
+        f"/chat/session/{session_id}", params={"before": page["prev_cursor"], "after": page["next_cursor"]}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,134 @@
+"""
+OpenAI single-flight 병합 범위 테스트
+- 우선순위가 같은 동일 요청만 병합 (interactive 요청이 near_line / batch 요청에 합류하지 않음)
+- 병합된 스트림은 구독자가 모두 끊기면 업스트림을 닫음
+"""
+import threading
+import time
+
+from openai_governor import INTERACTIVE, NEAR_LINE, llm_priority
+from openai_singleflight import CoalescingOpenAI, SingleFlight, openai_singleflight
+
+
+class SlowEmbeddings:
+    """release가 설정될 때까지 응답하지 않는 embeddings.create (호출 수 기록)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def create(self, **params):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return f"embedding:{params['input']}"
+
+
+class FakeClient:
+    def __init__(self):
+        self.embeddings = SlowEmbeddings()
+
+
+def call_in_thread(client, priority, text, outcome):
+    def target():
+        with llm_priority(priority):
+            outcome.append(client.embeddings.create(model="test", input=text))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def wait_for_coalesced(operation, count):
+    """openai_singleflight 통계에서 병합된 요청 수가 count가 될 때까지 대기"""
+    deadline = time.monotonic() + 5
+    while openai_singleflight.stats().get(operation, {}).get("coalesced", 0) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_interactive_call_does_not_join_near_line_call():
+    fake = FakeClient()
+    client = CoalescingOpenAI(fake, priority=INTERACTIVE)
+    outcome = []
+
+    background = call_in_thread(client, NEAR_LINE, "priority-split", outcome)
+    assert fake.embeddings.started.wait(1)
+    interactive = call_in_thread(client, INTERACTIVE, "priority-split", outcome)
+    time.sleep(0.1)
+    # interactive 요청은 near_line 요청을 기다리지 않고 별도 업스트림 요청을 시작
+    assert fake.embeddings.calls == 2
+
+    fake.embeddings.release.set()
+    background.join()
+    interactive.join()
+    assert outcome == ["embedding:priority-split"] * 2
+
+
+def test_same_priority_calls_are_coalesced():
+    fake = FakeClient()
+    client = CoalescingOpenAI(fake, priority=INTERACTIVE)
+    outcome = []
+    coalesced = openai_singleflight.stats().get("embeddings", {}).get("coalesced", 0)
+
+    first = call_in_thread(client, NEAR_LINE, "priority-same", outcome)
+    assert fake.embeddings.started.wait(1)
+    second = call_in_thread(client, NEAR_LINE, "priority-same", outcome)
+    wait_for_coalesced("embeddings", coalesced + 1)
+
+    fake.embeddings.release.set()
+    first.join()
+    second.join()
+    assert fake.embeddings.calls == 1
+    assert outcome == ["embedding:priority-same"] * 2
+
+
+class UpstreamStream:
+    """청크를 하나씩 내보내고 닫혔는지 / 몇 개 읽혔는지 기록하는 업스트림 스트림"""
+
+    def __init__(self, size):
+        self.size = size
+        self.read = 0
+        self.closed = False
+
+    def __call__(self):
+        try:
+            for i in range(self.size):
+                self.read += 1
+                yield i
+        finally:
+            self.closed = True
+
+
+def test_stream_upstream_closed_when_last_subscriber_leaves():
+    flight = SingleFlight()
+    upstream = UpstreamStream(100)
+
+    first = flight.stream("chat_completions_stream", "key", upstream)
+    second = flight.stream("chat_completions_stream", "key", upstream)
+    assert [next(first), next(first)] == [0, 1]
+    first.close()
+    # 남은 구독자가 있으면 계속 읽음
+    assert next(second) == 0 and next(second) == 1 and next(second) == 2
+    assert not upstream.closed
+
+    second.close()
+    assert upstream.closed
+    assert upstream.read == 3
+    assert flight.stats()["chat_completions_stream"] == {"issued": 1, "coalesced": 1, "cancelled": 1}
+
+    # 닫힌 스트림에는 합류하지 않고 새 업스트림 요청 시작
+    restarted = UpstreamStream(2)
+    assert list(flight.stream("chat_completions_stream", "key", restarted)) == [0, 1]
+    assert restarted.closed
+
+
+def test_finished_stream_is_not_counted_as_cancelled():
+    flight = SingleFlight()
+    upstream = UpstreamStream(3)
+
+    subscriber = flight.stream("chat_completions_stream", "key", upstream)
+    assert list(subscriber) == [0, 1, 2]
+    subscriber.close()
+    assert "cancelled" not in flight.stats()["chat_completions_stream"]
@@ -0,0 +1,129 @@
+"""
+OpenAI single-flight 마감 시각 테스트
+- 처음 요청한 쪽은 별도 스레드 없이 자기 마감 시각으로 직접 실행
+- 공유 작업의 마감 시각은 기다리는 요청 중 가장 늦은 마감 시각 (합류 시 연장)
+- 각 요청은 자기 마감 시각까지만 기다리고, 기다리는 요청이 모두 마감되면 공유 작업도 중단
+"""
+import threading
+import time
+
+import pytest
+
+from deadline import DeadlineExceeded, check_deadline, deadline_scope, remaining
+from openai_singleflight import SingleFlight
+
+
+def run_in_thread(fn, seconds):
+    """seconds 마감 시각으로 fn()을 실행하는 스레드 (결과 / 예외는 outcome에 기록)"""
+    outcome = {}
+
+    def target():
+        with deadline_scope(time.monotonic() + seconds):
+            try:
+                outcome["result"] = fn()
+            except BaseException as e:
+                outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def test_leader_runs_inline_under_its_own_deadline():
+    flight = SingleFlight()
+    seen = {}
+
+    def fn():
+        seen["thread"] = threading.current_thread()
+        seen["remaining"] = remaining()
+        return "ok"
+
+    with deadline_scope(time.monotonic() + 0.3):
+        assert flight.do("embeddings", "key", fn) == "ok"
+
+    assert seen["thread"] is threading.current_thread()
+    assert 0 < seen["remaining"] <= 0.3
+
+
+def test_follower_extends_shared_deadline_and_gets_result():
+    flight = SingleFlight()
+    started = threading.Event()
+    seen = {}
+
+    def fn():
+        started.set()
+        time.sleep(0.5)
+        # 0.2초 마감 요청이 시작했지만 5초 마감 요청이 합류해 연장됨
+        seen["remaining"] = remaining()
+        return "shared"
+
+    leader, leader_outcome = run_in_thread(lambda: flight.do("chat_completions", "key", fn), 0.2)
+    assert started.wait(1)
+    follower, follower_outcome = run_in_thread(lambda: flight.do("chat_completions", "key", fn), 5)
+    leader.join()
+    follower.join()
+
+    assert follower_outcome["result"] == "shared"
+    assert seen["remaining"] > 3
+    # 작업을 실행한 요청도 자기 마감 시각은 그대로 적용
+    assert isinstance(leader_outcome["error"], DeadlineExceeded)
+    assert flight.stats()["chat_completions"] == {"issued": 1, "coalesced": 1}
+
+
+def test_short_follower_gives_up_without_affecting_leader():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(0.5)
+        return "shared"
+
+    leader, leader_outcome = run_in_thread(lambda: flight.do("embeddings", "key", fn), 5)
+    assert started.wait(1)
+    waited = time.monotonic()
+    follower, follower_outcome = run_in_thread(lambda: flight.do("embeddings", "key", fn), 0.1)
+    follower.join()
+    assert isinstance(follower_outcome["error"], DeadlineExceeded)
+    assert time.monotonic() - waited < 0.4
+    leader.join()
+    assert leader_outcome["result"] == "shared"
+
+
+def test_shared_work_stops_when_every_waiter_has_expired():
+    flight = SingleFlight()
+    checks = []
+
+    def fn():
+        # governor 대기 / 재시도처럼 단계마다 마감 시각 확인
+        while True:
+            checks.append(time.monotonic())
+            check_deadline("테스트 대기")
+            time.sleep(0.05)
+
+    started = time.monotonic()
+    with deadline_scope(started + 0.3):
+        with pytest.raises(DeadlineExceeded):
+            flight.do("embeddings", "key", fn)
+    assert checks[-1] - started < 0.5
+
+
+def test_stream_continues_after_leader_disconnects():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        for i in range(5):
+            time.sleep(0.02)
+            yield i
+
+    with deadline_scope(time.monotonic() + 5):
+        leader = flight.stream("chat_completions_stream", "key", fn)
+        follower = flight.stream("chat_completions_stream", "key", fn)
+        assert [next(leader), next(leader)] == [0, 1]
+        leader.close()
+        assert list(follower) == [0, 1, 2, 3, 4]
+    assert len(calls) == 1
+    # 청크는 구독자의 스레드에서 읽음 (펌프 스레드 없음)
+    assert not [thread for thread in threading.enumerate() if thread.name == "openai-stream-pump"]